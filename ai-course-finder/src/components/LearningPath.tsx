@@ -1,7 +1,8 @@
+import * as React from "react";
 import { Rocket, CheckCircle2, ExternalLink } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { cn } from "@/lib/utils";
-import { Course } from "@/lib/api";
+import { Course, getLearningPath, isAbortError, LearningPathStage } from "@/lib/api";
 
 interface LearningStep {
   step: number;
@@ -18,7 +19,7 @@ interface LearningPathProps {
   courses?: Course[];
 }
 
-const getLearningPath = (query: string, courses: Course[] = []): LearningStep[] => {
+const buildLocalPath = (query: string, courses: Course[] = []): LearningStep[] => {
   // Use actual courses if available, otherwise use mock data
   if (courses.length >= 3) {
     return [
@@ -102,11 +103,48 @@ const getLearningPath = (query: string, courses: Course[] = []): LearningStep[]
   ];
 };
 
+// Turns the backend's staged path into steps; the first course of a stage is the one shown
+const fromServerPath = (stages: LearningPathStage[]): LearningStep[] =>
+  stages.map((stage) => {
+    const [main, ...alternatives] = stage.courses;
+    return {
+      step: stage.step,
+      title: stage.title,
+      description: stage.description,
+      courseName: main.title,
+      courseUrl: main.url,
+      details: [
+        `${main.provider}${main.duration ? ` · ${main.duration}` : ""}`,
+        ...(stage.estimated_hours ? [`About ${stage.estimated_hours} hours of study`] : []),
+        ...alternatives.map((course) => `Alternative: ${course.title}`),
+      ],
+    };
+  });
 
 export const LearningPath = ({ searchQuery, show, courses = [] }: LearningPathProps) => {
+  const [serverPath, setServerPath] = React.useState<LearningStep[] | null>(null);
+
+  React.useEffect(() => {
+    setServerPath(null);
+    if (!show || !searchQuery) return;
+    const controller = new AbortController();
+    getLearningPath(searchQuery, controller.signal)
+      .then((stages) => {
+        if (stages && stages.length > 0) {
+          setServerPath(fromServerPath(stages));
+        }
+      })
+      .catch((error) => {
+        if (!isAbortError(error)) {
+          console.warn("Learning path unavailable, using the local one:", error);
+        }
+      });
+    return () => controller.abort();
+  }, [searchQuery, show]);
+
   if (!show) return null;
 
-  const learningPath = getLearningPath(searchQuery, courses);
+  const learningPath = serverPath ?? buildLocalPath(searchQuery, courses);
 
   return (
     <section className="w-full max-w-6xl mx-auto mt-16">
@@ -2,13 +2,14 @@ import { useEffect, useState } from "react";
 // FIX: Import XCircle (the correct name for XCircleIcon)
 import { ArrowRight, Loader2, XCircle, ExternalLink } from "lucide-react"; 
 import { cn } from "@/lib/utils";
-import { Course } from "@/lib/api";
+import { Course, getRelatedTopics, isAbortError, RelatedTopic } from "@/lib/api";
 
 interface Recommendation {
   id: number;
   title: string;
   description: string;
   url?: string;
+  topic?: string;
   type: "topic" | "project" | "course";
 }
 
@@ -16,8 +17,19 @@ interface NextRecommendationsProps {
   searchQuery: string;
   show: boolean;
   courses?: Course[];
+  onSelectTopic?: (topic: string) => void;
 }
 
+// Related topics from the backend come first; courses fill the remaining slots
+const mapRelatedTopics = (related: RelatedTopic[]): Recommendation[] =>
+  related.map((item, index) => ({
+    id: -(index + 1),
+    title: item.topic,
+    description: "Learners who searched this topic also explored it",
+    topic: item.topic,
+    type: "topic" as const,
+  }));
+
 // Helper function to map API courses to our recommendation format
 const mapCoursesToRecommendations = (courses: Course[]): Recommendation[] => {
   return courses.slice(0, 3).map((course, index) => ({
@@ -63,21 +75,44 @@ const typeLabels = {
   course: "Course",
 };
 
-export const NextRecommendations = ({ searchQuery, show, courses = [] }: NextRecommendationsProps) => {
+export const NextRecommendations = ({ searchQuery, show, courses = [], onSelectTopic }: NextRecommendationsProps) => {
   const [recommendations, setRecommendations] = useState<Recommendation[]>([]);
+  const [related, setRelated] = useState<Recommendation[]>([]);
+
+  useEffect(() => {
+    setRelated([]);
+    if (!show || !searchQuery) return;
+    const controller = new AbortController();
+    getRelatedTopics(searchQuery, controller.signal)
+      .then((topics) => setRelated(mapRelatedTopics(topics)))
+      .catch((error) => {
+        if (!isAbortError(error)) {
+          setRelated([]);
+        }
+      });
+    return () => controller.abort();
+  }, [searchQuery, show]);
 
   useEffect(() => {
     if (!show) return;
     
-    if (courses.length > 0) {
-      // Use provided courses
-      const mapped = mapCoursesToRecommendations(courses);
+    if (courses.length > 0 || related.length > 0) {
+      // Related topics first, then the provided courses
+      const mapped = [...related, ...mapCoursesToRecommendations(courses)].slice(0, 3);
       setRecommendations(mapped);
     } else {
       // Use fallback recommendations
       setRecommendations(getFallbackRecommendations());
     }
-  }, [searchQuery, show, courses]);
+  }, [searchQuery, show, courses, related]);
+
+  const open = (rec: Recommendation) => {
+    if (rec.topic && onSelectTopic) {
+      onSelectTopic(rec.topic);
+    } else if (rec.url) {
+      window.open(rec.url, "_blank");
+    }
+  };
 
   if (!show) return null;
 
@@ -108,17 +143,13 @@ export const NextRecommendations = ({ searchQuery, show, courses = [] }: NextRec
                 "hover:scale-[1.02] hover:shadow-lg transition-all duration-300 opacity-0 animate-fade-in-up"
               )}
               style={{ animationDelay: `${700 + index * 100}ms`, animationFillMode: "forwards" }}
-              onClick={() => {
-                if (rec.url) {
-                  window.open(rec.url, "_blank");
-                }
-              }}
+              onClick={() => open(rec)}
               role="button"
               tabIndex={0}
               onKeyDown={(e) => {
-                if ((e.key === "Enter" || e.key === " ") && rec.url) {
+                if (e.key === "Enter" || e.key === " ") {
                   e.preventDefault();
-                  window.open(rec.url, "_blank");
+                  open(rec);
                 }
               }}
             >
@@ -2,7 +2,7 @@ import { useState } from "react";
 import { Sparkles, Send } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
-import { Course } from "@/lib/api";
+import { Course, refineRecommendations } from "@/lib/api";
 
 interface RefinementInputProps {
   courses: Course[];
@@ -10,8 +10,6 @@ interface RefinementInputProps {
   isLoading?: boolean;
 }
 
-const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api';
-
 export const RefinementInput = ({ courses, onRefine, isLoading = false }: RefinementInputProps) => {
   const [query, setQuery] = useState("");
   const [isRefining, setIsRefining] = useState(false);
@@ -22,49 +20,7 @@ export const RefinementInput = ({ courses, onRefine, isLoading = false }: Refine
 
     setIsRefining(true);
     try {
-      // Map frontend courses to backend format
-      const backendCourses = courses.map((course) => ({
-        title: course.name,
-        url: course.url,
-        provider: course.provider,
-        description: course.description,
-        duration: course.duration,
-        level: course.level,
-        rating: course.rating,
-        price: course.price,
-      }));
-
-      const response = await fetch(`${API_BASE_URL}/refine`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          courses: backendCourses,
-          query: query.trim(),
-        }),
-      });
-
-      if (!response.ok) {
-        throw new Error('Failed to refine recommendations');
-      }
-
-      const data = await response.json();
-      
-      // Map backend courses back to frontend format
-      const refinedCourses = data.results.map((course: any, index: number) => ({
-        id: index + 1,
-        name: course.title,
-        provider: course.provider || "Unknown",
-        level: course.level?.toLowerCase().includes("beginner") ? "beginner" :
-              course.level?.toLowerCase().includes("advanced") ? "advanced" : "intermediate",
-        pricing: course.price?.toLowerCase().includes("free") ? "free" : "paid",
-        description: course.description || "",
-        url: course.url,
-        duration: course.duration,
-        rating: course.rating,
-        price: course.price,
-      }));
+      const refinedCourses = await refineRecommendations(courses, query.trim());
 
       onRefine(refinedCourses);
       setQuery("");
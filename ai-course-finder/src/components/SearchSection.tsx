@@ -2,6 +2,7 @@ import { useState } from "react";
 import { Search, Sparkles } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
+import { useTopicSuggestions } from "@/hooks/use-topic-suggestions";
 
 interface SearchSectionProps {
   onSearch: (query: string) => void;
@@ -10,6 +11,7 @@ interface SearchSectionProps {
 
 export const SearchSection = ({ onSearch, isLoading }: SearchSectionProps) => {
   const [query, setQuery] = useState("");
+  const suggestions = useTopicSuggestions(query);
 
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
@@ -33,7 +35,14 @@ export const SearchSection = ({ onSearch, isLoading }: SearchSectionProps) => {
               value={query}
               onChange={(e) => setQuery(e.target.value)}
               className="pl-14 pr-6"
+              list="topic-suggestions-hero"
+              autoComplete="off"
             />
+            <datalist id="topic-suggestions-hero">
+              {suggestions.map((suggestion) => (
+                <option key={suggestion.text} value={suggestion.text} />
+              ))}
+            </datalist>
           </div>
           <Button
             type="submit"
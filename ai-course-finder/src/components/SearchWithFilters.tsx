@@ -2,6 +2,7 @@ import { useState } from "react";
 import { Search, Sparkles, Filter } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
+import { useTopicSuggestions } from "@/hooks/use-topic-suggestions";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Checkbox } from "@/components/ui/checkbox";
 import { Label } from "@/components/ui/label";
@@ -21,6 +22,7 @@ export const SearchWithFilters = ({
   onFiltersChange,
 }: SearchWithFiltersProps) => {
   const [query, setQuery] = useState("");
+  const suggestions = useTopicSuggestions(query);
   const [showFilters, setShowFilters] = useState(true);
 
   const handleSubmit = (e: React.FormEvent) => {
@@ -91,7 +93,14 @@ export const SearchWithFilters = ({
                 value={query}
                 onChange={(e) => setQuery(e.target.value)}
                 className="pl-14 pr-6"
+                list="topic-suggestions"
+                autoComplete="off"
               />
+              <datalist id="topic-suggestions">
+                {suggestions.map((suggestion) => (
+                  <option key={suggestion.text} value={suggestion.text} />
+                ))}
+              </datalist>
             </div>
             <Button
               type="submit"
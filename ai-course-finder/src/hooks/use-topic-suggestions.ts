@@ -0,0 +1,36 @@
+import * as React from "react";
+import { getTopicSuggestions, isAbortError, TopicSuggestion } from "@/lib/api";
+
+const SUGGEST_DEBOUNCE_MS = 120;
+
+/**
+ * Suggestions for the topic being typed. Only the latest keystroke's request is kept:
+ * earlier ones are aborted, and failures just leave the list empty.
+ */
+export function useTopicSuggestions(query: string) {
+  const [suggestions, setSuggestions] = React.useState<TopicSuggestion[]>([]);
+
+  React.useEffect(() => {
+    const prefix = query.trim();
+    if (prefix.length < 2) {
+      setSuggestions([]);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = window.setTimeout(() => {
+      getTopicSuggestions(prefix, controller.signal)
+        .then(setSuggestions)
+        .catch((error) => {
+          if (!isAbortError(error)) {
+            setSuggestions([]);
+          }
+        });
+    }, SUGGEST_DEBOUNCE_MS);
+    return () => {
+      window.clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query]);
+
+  return suggestions;
+}
@@ -15,6 +15,10 @@ export interface BackendCourseDetails {
 export interface BackendRecommendationResponse {
   topic: string;
   results: BackendCourseDetails[];
+  cursor?: string | null;
+  result_id?: string | null;
+  degraded?: boolean;
+  stale?: boolean;
 }
 
 // Frontend Course interface (for UI components)
@@ -70,6 +74,25 @@ function mapBackendToFrontendCourse(
   };
 }
 
+// Server-side result session ids, keyed by the Course[] array they were returned with.
+// Lets /refine reference the list by id instead of re-uploading every course.
+const resultIds = new WeakMap<Course[], string>();
+
+/**
+ * Returns the server-side result id for a course list, if it came from the backend
+ */
+export const getResultId = (courses: Course[]): string | undefined => resultIds.get(courses);
+
+const mapResponse = (data: BackendRecommendationResponse): Course[] => {
+  const mappedCourses = data.results.map((course, index) =>
+    mapBackendToFrontendCourse(course, index)
+  );
+  if (data.result_id) {
+    resultIds.set(mappedCourses, data.result_id);
+  }
+  return mappedCourses;
+};
+
 export interface SearchFilters {
   levels?: string[];
   pricings?: string[];
@@ -77,12 +100,157 @@ export interface SearchFilters {
   durations?: string[];
 }
 
+// Client-side result cache: mapped results per topic + filters, persisted across reloads
+const CACHE_STORAGE_KEY = 'course-finder:recommendations:v1';
+const CACHE_TTL_MS = 15 * 60 * 1000;
+const CACHE_MAX_ENTRIES = 30;
+
+interface CachedRecommendations {
+  savedAt: number;
+  courses: Course[];
+  resultId?: string;
+}
+
+/**
+ * Canonical key for a search: trimmed, case-insensitive topic and sorted filter values
+ */
+const searchKey = (topic: string, filters?: SearchFilters): string => {
+  const sorted = (values?: string[]) => [...(values ?? [])].map((v) => v.toLowerCase()).sort();
+  return JSON.stringify([
+    topic.trim().toLowerCase(),
+    sorted(filters?.levels),
+    sorted(filters?.pricings),
+    sorted(filters?.providers),
+    sorted(filters?.durations),
+  ]);
+};
+
+const SESSION_STORAGE_KEY = 'course-finder:session-id';
+
+/**
+ * Per-tab id sent with searches, so the backend can link topics searched one after
+ * another into related topics. Random and not tied to the user.
+ */
+const getSessionId = (): string => {
+  try {
+    let sessionId = sessionStorage.getItem(SESSION_STORAGE_KEY);
+    if (!sessionId) {
+      sessionId = crypto.randomUUID();
+      sessionStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+    }
+    return sessionId;
+  } catch {
+    return '';
+  }
+};
+
+const loadCache = (): Map<string, CachedRecommendations> => {
+  try {
+    const raw = localStorage.getItem(CACHE_STORAGE_KEY);
+    const entries: [string, CachedRecommendations][] = raw ? JSON.parse(raw) : [];
+    const now = Date.now();
+    return new Map(entries.filter(([, entry]) => now - entry.savedAt < CACHE_TTL_MS));
+  } catch {
+    return new Map();
+  }
+};
+
+const recommendationCache = loadCache();
+
+const persistCache = () => {
+  try {
+    localStorage.setItem(CACHE_STORAGE_KEY, JSON.stringify([...recommendationCache.entries()]));
+  } catch {
+    // Storage full or unavailable (private mode): the in-memory cache still works
+  }
+};
+
+const readCache = (key: string): Course[] | undefined => {
+  const entry = recommendationCache.get(key);
+  if (!entry) return undefined;
+  if (Date.now() - entry.savedAt >= CACHE_TTL_MS) {
+    recommendationCache.delete(key);
+    persistCache();
+    return undefined;
+  }
+  // Re-register the server-side result id so /refine can keep referencing it
+  if (entry.resultId && !resultIds.has(entry.courses)) {
+    resultIds.set(entry.courses, entry.resultId);
+  }
+  return entry.courses;
+};
+
+const writeCache = (key: string, courses: Course[]) => {
+  // Map preserves insertion order: re-inserting moves the key to the newest position
+  recommendationCache.delete(key);
+  recommendationCache.set(key, { savedAt: Date.now(), courses, resultId: getResultId(courses) });
+  while (recommendationCache.size > CACHE_MAX_ENTRIES) {
+    recommendationCache.delete(recommendationCache.keys().next().value);
+  }
+  persistCache();
+};
+
+// Results served while an upstream was failing: shown, but never cached client-side
+const degradedResults = new WeakSet<Course[]>();
+
+// The search currently in flight. Identical searches share it; a different search aborts it.
+let activeSearch: { key: string; controller: AbortController; promise: Promise<Course[]> } | null = null;
+
 /**
- * Fetches course recommendations from the backend API
+ * True when a request was cancelled because a newer search superseded it
+ */
+export const isAbortError = (error: unknown): boolean =>
+  error instanceof DOMException && error.name === 'AbortError';
+
+/**
+ * Fetches course recommendations from the backend API.
+ *
+ * Fresh cached results are returned without a request. An identical search that is
+ * already in flight is shared instead of duplicated. Starting a different search
+ * aborts the previous one, whose promise then rejects with an AbortError (see isAbortError).
  */
 export const getRecommendations = async (
   topic: string,
   filters?: SearchFilters
+): Promise<Course[]> => {
+  const key = searchKey(topic, filters);
+
+  if (activeSearch?.key === key) {
+    return activeSearch.promise;
+  }
+  // Whatever happens next, the previous search's answer is no longer wanted
+  activeSearch?.controller.abort();
+  activeSearch = null;
+
+  const cached = readCache(key);
+  if (cached) {
+    console.log(`[API] Using cached recommendations for: ${topic}`);
+    return cached;
+  }
+
+  const controller = new AbortController();
+  const promise = fetchRecommendations(topic, filters, controller.signal).then((courses) => {
+    if (courses.length > 0 && !degradedResults.has(courses)) {
+      writeCache(key, courses);
+    }
+    return courses;
+  });
+  const search = { key, controller, promise };
+  activeSearch = search;
+
+  try {
+    return await promise;
+  } finally {
+    if (activeSearch === search) {
+      activeSearch = null;
+    }
+  }
+};
+
+const fetchRecommendations = async (
+  topic: string,
+  filters: SearchFilters | undefined,
+  signal: AbortSignal
 ): Promise<Course[]> => {
   const params = new URLSearchParams({ topic });
   
@@ -103,7 +271,9 @@ export const getRecommendations = async (
       method: 'GET',
       headers: {
         'Content-Type': 'application/json',
+        'X-Session-Id': getSessionId(),
       },
+      signal,
     });
 
     console.log(`[API] Response status: ${response.status}`);
@@ -127,12 +297,17 @@ export const getRecommendations = async (
     console.log(`[API] Received ${data.results.length} courses`);
     
     // Map backend courses to frontend format
-    const mappedCourses = data.results.map((course, index) => 
-      mapBackendToFrontendCourse(course, index)
-    );
-    
-    return mappedCourses;
+    const courses = mapResponse(data);
+    if (data.degraded) {
+      degradedResults.add(courses);
+    }
+    return courses;
   } catch (error) {
+    if (isAbortError(error)) {
+      console.log(`[API] Superseded request for: ${topic} was cancelled`);
+      throw error;
+    }
+
     // Enhanced error logging
     if (error instanceof TypeError && error.message.includes('fetch')) {
       console.error('[API] Network error - is the backend running?', error);
@@ -142,4 +317,117 @@ export const getRecommendations = async (
     console.error('[API] Error fetching recommendations:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+
+export interface TopicSuggestion {
+  text: string;
+  source: 'topic' | 'catalog';
+  popularity: number;
+}
+
+/**
+ * Autocomplete suggestions for a partially typed topic. Topics other users already
+ * searched successfully come first, so picking one is usually a cache hit.
+ */
+export const getTopicSuggestions = async (
+  prefix: string,
+  signal?: AbortSignal
+): Promise<TopicSuggestion[]> => {
+  const params = new URLSearchParams({ prefix, limit: '8' });
+  const response = await fetch(`${API_BASE_URL}/suggest?${params.toString()}`, { signal });
+  if (!response.ok) {
+    return [];
+  }
+  return response.json();
+};
+
+export interface LearningPathStage {
+  step: number;
+  title: string;
+  description: string;
+  level: string;
+  estimated_hours: number | null;
+  courses: BackendCourseDetails[];
+}
+
+/**
+ * Staged learning path built server-side from the topic's cached results.
+ * Resolves to null when the backend has no courses for the topic yet.
+ */
+export const getLearningPath = async (
+  topic: string,
+  signal?: AbortSignal
+): Promise<LearningPathStage[] | null> => {
+  const params = new URLSearchParams({ topic });
+  const response = await fetch(`${API_BASE_URL}/learning-path?${params.toString()}`, { signal });
+  if (!response.ok) {
+    return null;
+  }
+  const data = await response.json();
+  return data.stages;
+};
+
+export interface RelatedTopic {
+  topic: string;
+  score: number;
+}
+
+/**
+ * Topics related to a searched one (searched in the same sessions, or sharing courses).
+ * Each has returned courses before, so searching it is usually served from cache.
+ */
+export const getRelatedTopics = async (
+  topic: string,
+  signal?: AbortSignal
+): Promise<RelatedTopic[]> => {
+  const params = new URLSearchParams({ topic, limit: '3' });
+  const response = await fetch(`${API_BASE_URL}/related?${params.toString()}`, { signal });
+  if (!response.ok) {
+    return [];
+  }
+  return response.json();
+};
+
+/**
+ * Refines a course list with a conversational query.
+ * Sends only the list's result id when the backend still holds it, and falls back
+ * to uploading the courses if that session has expired.
+ */
+export const refineRecommendations = async (
+  courses: Course[],
+  query: string
+): Promise<Course[]> => {
+  const send = async (body: Record<string, unknown>) =>
+    fetch(`${API_BASE_URL}/refine`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ query, ...body }),
+    });
+
+  const resultId = getResultId(courses);
+  let response = resultId ? await send({ result_id: resultId }) : null;
+
+  if (!response || response.status === 404) {
+    // Map frontend courses to backend format
+    const backendCourses = courses.map((course) => ({
+      title: course.name,
+      url: course.url,
+      provider: course.provider,
+      description: course.description,
+      duration: course.duration,
+      level: course.level,
+      rating: course.rating,
+      price: course.price,
+    }));
+    response = await send({ courses: backendCourses });
+  }
+
+  if (!response.ok) {
+    throw new Error('Failed to refine recommendations');
+  }
+
+  const data: BackendRecommendationResponse = await response.json();
+  return mapResponse(data);
+};
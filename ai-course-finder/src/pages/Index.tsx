@@ -5,7 +5,7 @@ import { CourseResults } from "@/components/CourseResults";
 import { LearningPath } from "@/components/LearningPath";
 import { NextRecommendations } from "@/components/NextRecommendations";
 import { Footer } from "@/components/Footer";
-import { getRecommendations, Course, SearchFilters } from "@/lib/api";
+import { getRecommendations, isAbortError, Course, SearchFilters } from "@/lib/api";
 import { toast } from "sonner";
 
 const Index = () => {
@@ -20,6 +20,7 @@ const Index = () => {
     setIsLoading(true);
     setSearchQuery(query);
     setError(null);
+    let superseded = false;
     
     try {
       const results = await getRecommendations(query, filtersToUse);
@@ -36,6 +37,12 @@ const Index = () => {
         });
       }
     } catch (error) {
+      // A newer search replaced this one: leave the UI to that search
+      if (isAbortError(error)) {
+        superseded = true;
+        return;
+      }
+
       const errorMessage = error instanceof Error ? error.message : "Failed to fetch courses";
       setError(errorMessage);
       setCourses([]);
@@ -46,7 +53,9 @@ const Index = () => {
       });
       console.error("Error fetching courses:", error);
     } finally {
-      setIsLoading(false);
+      if (!superseded) {
+        setIsLoading(false);
+      }
     }
   };
 
@@ -84,7 +93,12 @@ const Index = () => {
             onCoursesUpdate={setCourses}
           />
           <LearningPath searchQuery={searchQuery} show={hasSearched && courses.length > 0} courses={courses} />
-          <NextRecommendations searchQuery={searchQuery} show={hasSearched && courses.length > 0} courses={courses} />
+          <NextRecommendations
+            searchQuery={searchQuery}
+            show={hasSearched && courses.length > 0}
+            courses={courses}
+            onSelectTopic={(topic) => handleSearch(topic, filters)}
+          />
         </div>
       </main>
 
@@ -17,6 +17,135 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
     GOOGLE_CSE_ID: str = os.getenv("GOOGLE_CSE_ID", "")
 
+    # --- Result Cache ---
+    # memory:// (per worker), sqlite:///cache.db (shared on host) or redis://host:6379/0
+    CACHE_BACKEND_URL: str = "memory://"
+    RESULT_CACHE_TTL_SECONDS: int = 3600
+    RESULT_CACHE_MAX_ENTRIES: int = 4096
+    SEARCH_CACHE_TTL_SECONDS: int = 86400
+    # Expired results are kept this much longer as a fallback while upstreams are failing
+    RESULT_CACHE_STALE_SECONDS: int = 86400
+    # memory:// only: snapshot file reloaded on startup so restarts begin warm ("" disables)
+    CACHE_SNAPSHOT_PATH: str = "cache_snapshot.bin"
+    CACHE_SNAPSHOT_INTERVAL_SECONDS: int = 300
+
+    # --- Upstream Timeouts & Circuit Breakers ---
+    LLM_TIMEOUT_SECONDS: float = 20.0
+    AGENT_TIMEOUT_SECONDS: float = 45.0
+    SEARCH_TIMEOUT_SECONDS: float = 8.0
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_SECONDS: float = 30.0
+
+    # --- Model Routing ---
+    # Comma-separated model:tier pool (tiers: fast, strong); each call goes to the fastest healthy model
+    MODEL_POOL: str = "llama-3.1-8b-instant:fast,llama-3.3-70b-versatile:strong"
+    # Minimum tier per task: agent search orchestration and conversational refinement
+    MODEL_TIER_SEARCH: str = "fast"
+    MODEL_TIER_REFINE: str = "fast"
+    # Models tried per call before giving up (failover on errors and timeouts)
+    MODEL_MAX_ATTEMPTS: int = 2
+    MODEL_FAILURE_THRESHOLD: int = 3
+    MODEL_COOLDOWN_SECONDS: float = 30.0
+    # Share of calls sent to a random eligible model to keep its latency estimate current
+    MODEL_EXPLORE_RATE: float = 0.02
+
+    # --- Admission Control (agent runs for /api/recommend misses and /api/refine) ---
+    AGENT_MAX_CONCURRENT: int = 4
+    AGENT_MAX_QUEUE: int = 16
+    AGENT_MAX_QUEUE_WAIT_SECONDS: float = 5.0
+
+    # --- Background Jobs (POST /api/recommend/jobs) ---
+    JOBS_WORKERS: int = 4
+    # Jobs allowed to wait for a worker before submissions get 429
+    JOBS_MAX_QUEUE: int = 200
+    # How long finished job results can be fetched
+    JOBS_RESULT_TTL_SECONDS: int = 900
+    JOBS_MAX_BATCH: int = 10
+    # How long a job keeps backing off for a free agent slot while the server is busy
+    JOBS_MAX_ADMISSION_WAIT_SECONDS: float = 120.0
+
+    # --- Agent Budgets (per request; exhausting one forces a final answer) ---
+    AGENT_MAX_TURNS: int = 6
+    AGENT_MAX_TOOL_CALLS: int = 5
+    AGENT_MAX_TOKENS: int = 12000
+    # Should leave room under AGENT_TIMEOUT_SECONDS for the forced final answer
+    AGENT_DEADLINE_SECONDS: float = 30.0
+    # Tool calls from one model turn executed concurrently (per request)
+    AGENT_MAX_TOOL_CONCURRENCY: int = 4
+    # Per-provider CSE queries issued concurrently by one web_search call
+    SEARCH_MAX_PARALLEL_QUERIES: int = 4
+
+    # --- Shadow Pipelines (compared against the agent, never served) ---
+    # Share of agent-backed /api/recommend requests replayed against the variants (0 disables)
+    SHADOW_SAMPLE_RATE: float = 0.0
+    # Comma-separated: direct_search (CSE pages, no LLM), lean_agent (half the agent budget)
+    SHADOW_VARIANTS: str = "direct_search"
+    SHADOW_MAX_CONCURRENT: int = 2
+    # Comparisons kept per variant for /api/shadow
+    SHADOW_WINDOW: int = 500
+
+    # --- Result Sessions (referenced by /api/refine) ---
+    RESULT_SESSION_TTL_SECONDS: int = 7200
+
+    # --- Popularity-driven Prefetch ---
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_INTERVAL_SECONDS: int = 60
+    PREFETCH_TOP_K: int = 20
+    PREFETCH_MIN_HITS: float = 2.0
+    PREFETCH_HALF_LIFE_SECONDS: int = 3600
+    PREFETCH_REFRESH_AHEAD_SECONDS: int = 300
+    PREFETCH_MAX_REFRESHES_PER_HOUR: int = 30
+    PREFETCH_IDLE_MAX_ACTIVE: int = 0
+
+    # --- Logging ---
+    LOG_LEVEL: str = "INFO"
+    # "json" (one object per line) or "text"
+    LOG_FORMAT: str = "json"
+    # Records beyond this many waiting to be written are dropped rather than blocking requests
+    LOG_QUEUE_SIZE: int = 10000
+    # High-volume messages (logged with extra={"sampled": True}) are kept 1 in N
+    LOG_SAMPLE_EVERY: int = 20
+    # LangGraph's step-by-step debug output on stdout; never enable in production
+    AGENT_DEBUG: bool = False
+
+    # --- Admin / On-demand Profiling ---
+    # Requests carrying this token in X-Admin-Token may ask for a profile and read the
+    # diagnostic endpoints (traces, shadow, models); empty disables both
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 50
+
+    # --- Request Tracing (X-Trace-Id, /api/traces) ---
+    TRACING_ENABLED: bool = True
+    TRACE_MAX_ENTRIES: int = 500
+
+    # --- Local Course Catalog (filled by app.services.catalog_ingest) ---
+    CATALOG_PATH: str = "catalog.db"
+    # Minimum catalog matches for a first page to be served without running the agent
+    CATALOG_MIN_RESULTS: int = 5
+    # Read-only columnar copy of the catalog, memory-mapped and shared by all workers (empty disables)
+    CATALOG_COLUMNAR_PATH: str = "catalog.cols"
+    # Topics with more full-text matches than this are filtered and ranked in SQLite instead
+    CATALOG_COLUMNAR_MAX_MATCHES: int = 20000
+
+    # --- Topic Suggestions (/api/suggest) ---
+    SUGGEST_MAX_TOPICS: int = 20000
+    # Best-rated catalog titles loaded into the suggestion index (0 disables)
+    SUGGEST_MAX_CATALOG_TITLES: int = 100000
+
+    # --- Learning Paths (/api/learning-path) ---
+    LEARNING_PATH_COURSES_PER_STAGE: int = 2
+    # Catalog matches a path is built from when the topic has no cached result set
+    LEARNING_PATH_CATALOG_CANDIDATES: int = 30
+
+    # --- Related Topics (/api/related) ---
+    RELATED_MAX_TOPICS: int = 20000
+    # Neighbours kept per topic, precomputed on every graph update
+    RELATED_TOP_K: int = 10
+    # Earlier topics in the same client session (X-Session-Id) that a search is linked to
+    RELATED_SESSION_WINDOW: int = 5
+    RELATED_MAX_SESSIONS: int = 50000
+    RELATED_SESSION_TTL_SECONDS: int = 1800
 
     # --- MOCK & Fallback Configuration ---
     @property
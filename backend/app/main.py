@@ -7,18 +7,50 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 # FIX: Import settings here to ensure env vars are loaded before config use
 from app.config import settings 
+from app.utils.logging_setup import setup_logging, RequestIdMiddleware
+
+# Configure the queue-based JSON logging pipeline before anything starts logging
+setup_logging()
+
 # FIX: Router import is correct
-from app.routers import recommend
+from app.routers import recommend, admin, discovery
+from app.services.cache_snapshot import cache_snapshotter
+from app.services.jobs import job_manager
+from app.services.suggest import topic_suggester
+from app.services.prefetch import prefetch_scheduler
+from app.services.shadow import shadow_runner
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.tracing import TracingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on startup and stop them on shutdown."""
+    # Reload the last cache snapshot in the background; requests are served meanwhile
+    cache_snapshotter.start()
+    prefetch_scheduler.start()
+    job_manager.start()
+    topic_suggester.start()
+    yield
+    await job_manager.stop()
+    await prefetch_scheduler.stop()
+    await shadow_runner.stop()
+    # Last, so the snapshot includes anything the workers above stored
+    await cache_snapshotter.stop()
+
 
 app = FastAPI(
     # FIX: Update the title and description to reflect the Groq/Google CSE architecture
     title="AI Learning Course Advisor Backend (Groq Agent)",
     description="Backend service using **Groq** and **Google CSE** for stable, free course recommendations.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS configuration
@@ -35,10 +67,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Profile-Id", "X-Trace-Id", "X-Request-Id", "Location", "Retry-After"],
 )
+# Compress larger JSON payloads (multi-course result lists); tiny responses are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+# Opt-in per-request profiling for admins (no-op unless ADMIN_TOKEN is set)
+app.add_middleware(ProfilingMiddleware)
+# Per-request span tree of agent steps, exposed via X-Trace-Id and /api/traces
+app.add_middleware(TracingMiddleware)
+# Outermost: every log record for a request carries its id
+app.add_middleware(RequestIdMiddleware)
 
 # Include the main router
 app.include_router(router=recommend.router, prefix="/api", tags=["recommendations"])
+app.include_router(router=discovery.router, prefix="/api", tags=["discovery"])
+app.include_router(router=admin.router, prefix="/api", tags=["admin"])
 
 # --- HEALTH CHECK ---
 @app.get("/")
@@ -55,14 +55,14 @@ async def recommend_courses(
 
     except RuntimeError as e:
         # Catch errors related to uninitialized agent or core setup issues
-        logger.error(f"Agent Runtime Error for topic '{topic}': {e}")
+        logger.error("Agent Runtime Error for topic '%s': %s", topic, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Agent setup failed or external API error occurred: {str(e)}"
         )
     except Exception as e:
         # Catch all other unexpected errors during the API call or parsing
-        logger.error(f"Unexpected Error during recommendation for '{topic}': {e}")
+        logger.error("Unexpected Error during recommendation for '%s': %s", topic, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while processing the request."
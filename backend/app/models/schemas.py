@@ -16,6 +16,10 @@ class RecommendationResponse(BaseModel):
     """Response model for course recommendations."""
     topic: str = Field(..., description="The topic that was searched for")
     results: List[CourseDetails] = Field(..., description="List of recommended courses")
+    cursor: Optional[str] = Field(None, description="Opaque cursor for the next page of results (null when there are no more)")
+    result_id: Optional[str] = Field(None, description="Server-side id of this result list; pass it to /api/refine instead of the courses")
+    degraded: bool = Field(False, description="True when an upstream (LLM or search) was unavailable and the result is a fallback")
+    stale: bool = Field(False, description="True when the results are a cached copy served past their normal TTL")
 
 class SearchResult(BaseModel):
     """Model for search results from the search service."""
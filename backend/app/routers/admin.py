@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from dataclasses import asdict
+from typing import List, Dict, Any
+
+from app.services.shadow import shadow_runner
+from app.utils import llm_agent
+from app.utils.admin_auth import require_admin
+from app.utils.tracing import trace_store
+
+# Diagnostic endpoints; only served to callers sending X-Admin-Token: <ADMIN_TOKEN>
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get(
+    "/traces",
+    summary="List recent request traces with model / tool call and token totals"
+)
+async def list_traces(
+    limit: int = Query(50, ge=1, le=500, description="Number of most recent traces to return"),
+    min_tool_calls: int = Query(0, ge=0, description="Only traces with at least this many tool calls"),
+) -> List[Dict[str, Any]]:
+    """
+    Summaries of the most recent traced requests, newest first. Use ``min_tool_calls``
+    to find runs where the agent looped or over-searched.
+    """
+    summaries = [trace.summary() for trace in trace_store.recent(trace_store.max_entries)]
+    return [s for s in summaries if s["tool_calls"] >= min_tool_calls][:limit]
+
+
+@router.get(
+    "/traces/{trace_id}",
+    summary="Export one request trace in OTLP/JSON format"
+)
+async def get_trace(trace_id: str) -> Dict[str, Any]:
+    """
+    Returns the span tree for the ``X-Trace-Id`` of a previous response as an
+    OTLP/JSON ``ExportTraceServiceRequest``, ready to POST to a collector's ``/v1/traces``.
+    """
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found or evicted")
+    return trace.to_otlp()
+
+
+@router.get(
+    "/shadow",
+    summary="Compare shadow pipeline variants with the production agent"
+)
+async def shadow_stats(
+    variant: str = Query(None, description="Also list this variant's most recent comparisons"),
+    limit: int = Query(20, ge=1, le=500, description="Number of recent comparisons to list"),
+) -> Dict[str, Any]:
+    """
+    Per-variant latency percentiles, mean token usage, and result overlap with the
+    primary (Jaccard similarity and recall by normalized URL), next to the primary's
+    own numbers for the same requests. Each comparison's ``trace_id`` resolves via
+    ``/traces/{trace_id}``.
+    """
+    stats = shadow_runner.stats()
+    if variant:
+        stats["recent"] = [asdict(c) for c in shadow_runner.recent(variant, limit)]
+    return stats
+
+
+@router.get(
+    "/models",
+    summary="Live latency and error statistics of the routed model pool"
+)
+async def model_stats() -> Dict[str, Any]:
+    """
+    Each pooled model with its tier, smoothed latency, recent error rate and breaker
+    state, plus the minimum tier each task is routed to.
+    """
+    model_router = llm_agent.model_router
+    if model_router is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="No model pool configured")
+    return {"tasks": model_router.task_tiers, "models": model_router.stats()}
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Query, Response, HTTPException, status
+from typing import List, Dict, Any
+
+from app.services.suggest import topic_suggester
+from app.services.learning_path import get_learning_path
+from app.services.related import related_topics
+
+# Endpoints that help users find and move between topics, answered from in-memory state only
+router = APIRouter()
+
+
+@router.get(
+    "/suggest",
+    summary="Autocomplete a topic from previously successful searches and catalog titles"
+)
+async def suggest_topics(
+    response: Response,
+    prefix: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions"),
+) -> List[Dict[str, Any]]:
+    """
+    Topics that already returned courses come first, most popular first, so picking
+    one usually hits the result cache. Catalog course titles fill the remaining
+    slots. Words inside a suggestion match too ("learn" finds "Machine Learning").
+    Cheap enough to call on every keystroke.
+    """
+    response.headers["Cache-Control"] = "public, max-age=30"
+    return topic_suggester.suggest(prefix, limit)
+
+
+@router.get(
+    "/learning-path",
+    summary="Staged learning path for a topic, built from its cached results"
+)
+async def learning_path(
+    response: Response,
+    topic: str = Query(..., min_length=1, max_length=200, description="The topic to build a path for"),
+) -> Dict[str, Any]:
+    """
+    Orders the courses already found for a topic into Foundations → Practice →
+    Mastery stages by their level and duration. Uses the topic's cached result set
+    (fresh or stale), or the local catalog when the topic has not been searched
+    yet; no agent or search call is made. Paths are cached per topic until the
+    underlying result set changes.
+    """
+    path = await get_learning_path(topic)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No courses are known for this topic yet. Search for it first.",
+        )
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return path
+
+
+@router.get(
+    "/related",
+    summary="Topics related to a topic, from search sessions and shared courses"
+)
+async def related(
+    response: Response,
+    topic: str = Query(..., min_length=1, max_length=200, description="The topic to find neighbours of"),
+    limit: int = Query(5, ge=1, le=50, description="Maximum number of related topics"),
+) -> List[Dict[str, Any]]:
+    """
+    Topics users searched in the same session as this one, or whose results share
+    courses with it, strongest first. Every related topic has returned courses
+    before, so searching it is likely a cache hit. Neighbour lists are precomputed
+    as searches come in; an unknown topic just has none.
+    """
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return related_topics.related(topic, limit)
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Query, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Query, HTTPException, Header, Response, status
+from typing import List, Optional, Dict, Any
+import json
+import time
+import base64
+import hashlib
 import logging
 import asyncio # Keep asyncio import for compatibility
 
@@ -9,13 +13,174 @@ logger = logging.getLogger(__name__)
 # Project imports
 from app.models.schemas import RecommendationResponse, CourseDetails
 # Import the agent function which now runs Groq + Google CSE
-from app.utils.llm_agent import run_cohere_agent_for_recommendations, refine_recommendations
+from app.utils.llm_agent import (
+    run_cohere_agent_for_recommendations,
+    refine_recommendations,
+    fetch_additional_courses,
+    normalize_url,
+)
+from app.utils.resilience import UpstreamUnavailable
+from app.utils.admission import agent_admission, AdmissionRejected
+from app.utils.local_refine import refine_locally
 from app.config import settings
-from pydantic import BaseModel
+from app.services.result_cache import recommendation_cache, make_cache_key, CacheEntry
+from app.services.prefetch import prefetch_scheduler
+from app.services.sessions import result_sessions
+from app.services.catalog import get_catalog
+from app.services.shadow import shadow_runner
+from app.services.jobs import job_manager
+from app.services.suggest import topic_suggester
+from app.services.related import related_topics
+from app.utils.tracing import trace_span
+from app.utils.serialization import pack_courses, construct_courses, recommendation_response, rows_to_dicts
+from pydantic import BaseModel, Field
 
 # Initialize the router
 router = APIRouter()
 
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison per RFC 9110)."""
+    if not if_none_match or not etag:
+        return False
+    opaque = etag.removeprefix("W/")
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def _page_etag(entry: CacheEntry, topic: str, offset: int, limit: int) -> str:
+    """
+    Weak ETag for one page of an entry: the pool's content hash, the echoed topic and
+    the page window. Weak because the bytes vary (gzip or identity, a fresh result_id)
+    while the page itself is the same.
+    """
+    raw = f"{entry.etag}:{topic}:{offset}:{limit}".encode("utf-8")
+    return f'W/"{hashlib.blake2b(raw, digest_size=16).hexdigest()}"'
+
+
+def _set_cache_headers(response: Response, entry: CacheEntry, etag: str) -> None:
+    """Advertise the page's ETag and let clients reuse it for as long as the server would."""
+    response.headers["ETag"] = etag
+    max_age = max(0, int(entry.expires_in(recommendation_cache.ttl_seconds)))
+    response.headers["Cache-Control"] = f"public, max-age={max_age}"
+
+
+def _encode_cursor(cache_key: str, offset: int) -> str:
+    """Opaque cursor: the next offset, bound to the topic + filters it was issued for."""
+    key_hash = hashlib.blake2b(cache_key.encode("utf-8"), digest_size=6).hexdigest()
+    raw = json.dumps({"o": offset, "k": key_hash}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, cache_key: str) -> int:
+    """Return the offset stored in a cursor, rejecting cursors issued for another search."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+        key_hash = data["k"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from e
+    expected = hashlib.blake2b(cache_key.encode("utf-8"), digest_size=6).hexdigest()
+    if offset < 0 or key_hash != expected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not belong to this topic and filter combination"
+        )
+    return offset
+
+
+def _next_cursor(cache_key: str, entry: CacheEntry, offset: int, page: list) -> Optional[str]:
+    next_offset = offset + len(page)
+    has_more = next_offset < len(entry.rows) or not entry.exhausted
+    return _encode_cursor(cache_key, next_offset) if page and has_more else None
+
+
+async def _search_catalog(topic: str, filters: dict, limit: int, offset: int = 0) -> Optional[List[CourseDetails]]:
+    """Look the topic up in the local catalog; None when no catalog has been ingested or it fails."""
+    catalog = get_catalog()
+    if catalog is None:
+        return None
+    try:
+        with trace_span("catalog.search", limit=limit, offset=offset) as span:
+            results = await asyncio.to_thread(catalog.search, topic, filters, limit, offset)
+            if span is not None:
+                span.attributes["courses"] = len(results)
+        return results
+    except Exception as e:
+        logger.warning("Catalog lookup failed for topic '%s': %s", topic, e)
+        return None
+
+
+async def _fill_cache(cache_key: str, topic: str, filters: dict, wanted: int,
+                      background: bool = False) -> Optional[CacheEntry]:
+    """
+    Build and cache the candidate set for a cache miss: from the local catalog when it
+    covers the topic well enough, otherwise from an agent run. Returns None when nothing
+    was found. Raises AdmissionRejected when no agent slot is free and
+    UpstreamUnavailable when Groq or Google CSE is failing. ``background`` callers
+    never queue for a slot, so they cannot delay interactive requests.
+    """
+    # Serve from the local catalog when it covers the topic well enough
+    catalog_results = await _search_catalog(topic, filters, wanted)
+    if catalog_results and len(catalog_results) >= min(wanted, settings.CATALOG_MIN_RESULTS):
+        logger.info("Catalog hit for topic: %s (%s courses)", topic, len(catalog_results))
+        return recommendation_cache.set(
+            cache_key, topic, filters, catalog_results,
+            exhausted=len(catalog_results) < wanted, source="catalog",
+        )
+
+    # The entire process is now handled by the agent function (which is Groq)
+    # NOTE: The function name 'run_cohere_agent_for_recommendations' is preserved 
+    # but internally it calls the Groq agent.
+    # Only cache misses take an agent slot; hits never wait behind the limiter
+    async with (agent_admission.try_slot() if background else agent_admission.slot()):
+        with prefetch_scheduler.foreground():
+            primary = shadow_runner.start_primary()
+            structured_results: List[CourseDetails] = await run_cohere_agent_for_recommendations(
+                topic, filters, limit=wanted
+            )
+    # Sampled requests are replayed against candidate pipelines in the background
+    shadow_runner.submit(primary, topic, filters, wanted, structured_results)
+
+    if not structured_results:
+        logger.info("Agent found no results for topic: %s. Returning empty list.", topic)
+        return None
+    return recommendation_cache.set(cache_key, topic, filters, structured_results)
+
+
+def _too_busy(error: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="The server is busy with other searches. Please retry shortly.",
+        headers={"Retry-After": str(max(1, int(error.retry_after)))},
+    )
+
+
+def _serve_stale(cache_key: str, topic: str, offset: int, limit: int, error: UpstreamUnavailable) -> Response:
+    """Serve the last known good result for a key while an upstream is down, or 503 if there is none."""
+    entry = recommendation_cache.get_stale(cache_key)
+    if entry is None:
+        retry_after = max(1, int(error.retry_after or settings.BREAKER_RESET_SECONDS))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Upstream service '{error.upstream}' is temporarily unavailable. Please retry shortly.",
+            headers={"Retry-After": str(retry_after)},
+        )
+    logger.warning("Serving stale results for topic '%s' (%s)", topic, error)
+    page = entry.rows[offset:offset + limit]
+    response = recommendation_response(
+        topic,
+        page,
+        cursor=_next_cursor(cache_key, entry, offset, page),
+        result_id=result_sessions.save(topic, page) if page else None,
+        degraded=True,
+        stale=True,
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @router.get(
     "/recommend",
     response_model=RecommendationResponse,
@@ -28,11 +193,25 @@ async def recommend_courses(
     pricing: List[str] = Query(None, description="Filter by pricing: free or paid"),
     provider: List[str] = Query(None, description="Filter by provider name (e.g., Coursera, edX)"),
     duration: List[str] = Query(None, description="Filter by duration: Short (< 4 weeks), Medium (4-12 weeks), or Long (> 12 weeks)"),
+    limit: int = Query(5, ge=1, le=50, description="Number of courses to return in this page"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response to fetch the next page"),
+    if_none_match: Optional[str] = Header(None),
+    x_session_id: Optional[str] = Header(None, max_length=128),
 ):
     """
     1. Runs the Groq ReAct Agent (Tool Use) to search the web via Google CSE.
     2. Enforces the final JSON schema using Pydantic validation on the agent output.
     3. Returns a clean, structured JSON list of recommendations.
+
+    Topics covered by the local course catalog are answered from it without running
+    the agent.
+
+    Results are paginated: pass the returned ``cursor`` to get the next ``limit`` courses.
+    Later pages are cut from the cached candidate set and only extended with further
+    Google CSE result pages once that set runs out.
+
+    If Groq or Google CSE is down, the last known good result is returned with
+    ``degraded`` and ``stale`` set instead of waiting on the failing upstream.
     """
     
     # Check for missing API keys BEFORE calling the agent (best practice)
@@ -43,54 +222,247 @@ async def recommend_courses(
             detail="Backend API keys (GROQ or GOOGLE) are missing. Agent is disabled and cannot serve requests."
         )
 
+    # Build filter criteria
+    filters = {
+        "level": level or [],
+        "pricing": pricing or [],
+        "provider": provider or [],
+        "duration": duration or [],
+    }
+    cache_key = make_cache_key(topic, filters)
+    offset = _decode_cursor(cursor, cache_key) if cursor else 0
+
     try:
-        # Build filter criteria
-        filters = {
-            "level": level or [],
-            "pricing": pricing or [],
-            "provider": provider or [],
-            "duration": duration or [],
-        }
-        
-        # The entire process is now handled by the agent function (which is Groq)
-        # NOTE: The function name 'run_cohere_agent_for_recommendations' is preserved 
-        # but internally it calls the Groq agent.
-        structured_results: List[CourseDetails] = await run_cohere_agent_for_recommendations(topic, filters)
-
-        if not structured_results:
-            # If the agent runs but finds no courses, return an empty list with a 200 OK
-            logger.info(f"Agent found no results for topic: {topic}. Returning empty list.")
-            return RecommendationResponse(
-                topic=topic,
-                results=[],
+        # Count the request towards topic popularity and serve warm results if cached
+        if offset == 0:
+            prefetch_scheduler.record(topic, filters)
+        with trace_span("cache.lookup") as span:
+            entry = recommendation_cache.get(cache_key)
+            if span is not None:
+                span.attributes["hit"] = entry is not None
+        if entry is not None:
+            logger.info("Cache hit for topic: %s", topic)
+        else:
+            try:
+                entry = await _fill_cache(cache_key, topic, filters, wanted=max(5, offset + limit))
+            except AdmissionRejected as e:
+                raise _too_busy(e)
+            except UpstreamUnavailable as e:
+                return _serve_stale(cache_key, topic, offset, limit, e)
+
+            if entry is None:
+                # If the agent runs but finds no courses, return an empty list with a 200 OK
+                response = recommendation_response(topic, [])
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+
+        # The first page is exactly what the agent found; later pages extend the
+        # candidate set from further search pages only when they need it
+        degraded = False
+        if offset > 0 and len(entry.rows) < offset + limit and not entry.exhausted and entry.source == "catalog":
+            # Catalog pools continue from the catalog itself, never from CSE
+            needed = offset + limit - len(entry.rows)
+            more = await _search_catalog(topic, filters, needed, offset=len(entry.rows)) or []
+            entry = recommendation_cache.extend(
+                cache_key, entry, more, entry.search_start, exhausted=len(more) < needed
             )
+        elif offset > 0 and len(entry.rows) < offset + limit and not entry.exhausted:
+            exclude = {normalize_url(row[1]) for row in entry.rows}
+            try:
+                with prefetch_scheduler.foreground():
+                    more, next_start, exhausted = await fetch_additional_courses(
+                        topic, filters, entry.search_start, exclude, offset + limit - len(entry.rows)
+                    )
+                entry = recommendation_cache.extend(cache_key, entry, more, next_start, exhausted)
+            except UpstreamUnavailable as e:
+                # Serve the shorter page we already have rather than failing it
+                logger.warning("Could not extend results for topic '%s': %s", topic, e)
+                degraded = True
+
+        if offset == 0 and entry.rows:
+            # Topics that return courses become autocomplete suggestions and related-topic nodes
+            topic_suggester.record_success(topic)
+            related_topics.record_search(topic, entry.rows, x_session_id)
 
-        # Return final structured response
-        return RecommendationResponse(
-            topic=topic,
-            results=structured_results
+        etag = _page_etag(entry, topic, offset, limit)
+        if not degraded and _etag_matches(if_none_match, etag):
+            # Client already holds this exact page: skip unpacking and serialization
+            not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+            _set_cache_headers(not_modified, entry, etag)
+            return not_modified
+
+        # Cached rows were validated when first parsed: serialize them as-is
+        page = entry.rows[offset:offset + limit]
+        response = recommendation_response(
+            topic,
+            page,
+            cursor=_next_cursor(cache_key, entry, offset, page),
+            result_id=result_sessions.save(topic, page) if page else None,
+            degraded=degraded,
         )
+        if degraded:
+            response.headers["Cache-Control"] = "no-cache"
+        else:
+            _set_cache_headers(response, entry, etag)
+        return response
 
+    except HTTPException:
+        raise
     except RuntimeError as e:
         # Catch errors related to uninitialized agent or core setup issues
-        logger.error(f"Agent Runtime Error for topic '{topic}': {e}")
+        logger.error("Agent Runtime Error for topic '%s': %s", topic, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Agent setup failed or external API error occurred: {str(e)}. Check backend logs."
         )
     except Exception as e:
         # Catch all other unexpected errors during the API call or parsing
-        logger.error(f"Unexpected Error during recommendation for '{topic}': {e}")
+        logger.error("Unexpected Error during recommendation for '%s': %s", topic, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while processing the request. Check API usage limits."
         )
 
 
+class RecommendationQuery(BaseModel):
+    """One search: the same parameters as ``GET /api/recommend``."""
+    topic: str = Field(..., min_length=1, description="The learning topic to search for")
+    level: List[str] = Field(default_factory=list)
+    pricing: List[str] = Field(default_factory=list)
+    provider: List[str] = Field(default_factory=list)
+    duration: List[str] = Field(default_factory=list)
+    limit: int = Field(5, ge=1, le=50, description="Number of courses to return")
+
+
+class RecommendationJobRequest(BaseModel):
+    """One or more searches to run in the background as a single job."""
+    searches: List[RecommendationQuery] = Field(..., min_length=1)
+
+
+async def _fill_cache_when_admitted(cache_key: str, topic: str, filters: dict, wanted: int) -> Optional[CacheEntry]:
+    """
+    _fill_cache for background jobs: take an agent slot only when one is free and no
+    interactive request is queuing for it, backing off exponentially until then.
+    """
+    deadline = time.monotonic() + settings.JOBS_MAX_ADMISSION_WAIT_SECONDS
+    delay = 0.0
+    while True:
+        try:
+            return await _fill_cache(cache_key, topic, filters, wanted, background=True)
+        except AdmissionRejected as e:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+            delay = max(e.retry_after, 2 * delay)
+            await asyncio.sleep(min(delay, remaining))
+
+
+async def _run_search_job(query: RecommendationQuery) -> Dict[str, Any]:
+    """Answer one queued search, shaped like a RecommendationResponse."""
+    filters = {"level": query.level, "pricing": query.pricing, "provider": query.provider, "duration": query.duration}
+    cache_key = make_cache_key(query.topic, filters)
+    prefetch_scheduler.record(query.topic, filters)
+    degraded = False
+    entry = recommendation_cache.get(cache_key)
+    if entry is None:
+        try:
+            entry = await _fill_cache_when_admitted(cache_key, query.topic, filters, max(5, query.limit))
+        except UpstreamUnavailable:
+            entry = recommendation_cache.get_stale(cache_key)
+            if entry is None:
+                raise
+            degraded = True
+
+    page = entry.rows[:query.limit] if entry is not None else []
+    if page:
+        topic_suggester.record_success(query.topic)
+        related_topics.record_search(query.topic, entry.rows)
+    return {
+        "topic": query.topic,
+        "results": rows_to_dicts(page),
+        "cursor": _next_cursor(cache_key, entry, 0, page) if entry is not None else None,
+        "result_id": result_sessions.save(query.topic, page) if page else None,
+        "degraded": degraded,
+        "stale": degraded,
+    }
+
+
+async def _run_search_batch(searches: List[RecommendationQuery]) -> Dict[str, Any]:
+    # One search at a time, so a job holds at most one agent slot (JOBS_WORKERS caps the lane)
+    responses = []
+    for query in searches:
+        try:
+            outcome = await _run_search_job(query)
+        except Exception as e:
+            logger.warning("Background search for '%s' failed: %s", query.topic, e)
+            outcome = {"topic": query.topic, "results": [], "degraded": True, "error": str(e) or type(e).__name__}
+        responses.append(outcome)
+    return {"responses": responses}
+
+
+@router.post(
+    "/recommend/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue one or more recommendation searches and return a job id immediately"
+)
+async def create_recommendation_job(request: RecommendationJobRequest, response: Response) -> Dict[str, Any]:
+    """
+    Runs the same pipeline as ``GET /api/recommend`` (cache, catalog, agent) on a
+    background worker instead of holding the connection open. Poll
+    ``GET /api/recommend/jobs/{job_id}``, optionally with ``wait`` to long-poll.
+    The job's ``result.responses`` holds one response per search, in order; a search
+    that failed has an ``error`` field instead of results.
+    Returns 429 with ``Retry-After`` when the job queue is full.
+    """
+    if settings.IS_GROQ_MOCK or settings.IS_SEARCH_MOCK:
+        logger.error("API keys (GROQ or GOOGLE) are missing. Agent is disabled.")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Backend API keys (GROQ or GOOGLE) are missing. Agent is disabled and cannot serve requests."
+        )
+    if len(request.searches) > settings.JOBS_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A job can hold at most {settings.JOBS_MAX_BATCH} searches"
+        )
+
+    searches = request.searches
+    try:
+        job = job_manager.submit("recommend", lambda: _run_search_batch(searches))
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    response.headers["Location"] = f"/api/recommend/jobs/{job.job_id}"
+    return job.to_dict()
+
+
+@router.get(
+    "/recommend/jobs/{job_id}",
+    summary="Get the status and, once done, the result of a recommendation job"
+)
+async def get_recommendation_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Long-poll: wait up to this many seconds for the job to finish"),
+) -> Dict[str, Any]:
+    """
+    ``status`` is ``queued``, ``running``, ``done`` or ``failed``. Finished jobs are kept
+    for JOBS_RESULT_TTL_SECONDS, after which this returns 404.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found or expired")
+    job = await job_manager.wait(job, wait)
+    return job.to_dict()
+
+
 class RefinementRequest(BaseModel):
-    """Request model for course recommendation refinement."""
-    courses: List[CourseDetails]
+    """
+    Request model for course recommendation refinement.
+    Pass the ``result_id`` of a previous response; ``courses`` is only needed
+    when no server-side result session is available.
+    """
     query: str
+    result_id: Optional[str] = None
+    courses: Optional[List[CourseDetails]] = None
 
 
 @router.post(
@@ -108,7 +480,10 @@ async def refine_courses(request: RefinementRequest):
     - "Only free courses"
     - "Intermediate level courses from Coursera"
     
-    The agent processes the original results and returns filtered/modified recommendations.
+    Requests that only filter or sort by level, price, provider, duration or rating
+    are applied directly; anything else goes to the agent, which processes the original
+    results and returns filtered/modified recommendations.
+    The response carries a new ``result_id`` so refinements can be chained.
     """
     
     # Check for missing API keys
@@ -120,7 +495,20 @@ async def refine_courses(request: RefinementRequest):
         )
 
     try:
-        if not request.courses:
+        if request.result_id:
+            # Courses stored server-side were validated when first parsed: skip re-validation
+            session = result_sessions.get(request.result_id)
+            if session is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Result session not found or expired. Resend the course list."
+                )
+            rows = session.rows
+            courses = construct_courses(rows)
+        elif request.courses:
+            courses = request.courses
+            rows = pack_courses(courses)
+        else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No courses provided for refinement"
@@ -132,22 +520,47 @@ async def refine_courses(request: RefinementRequest):
                 detail="Refinement query is required"
             )
         
+        refined_topic = f"Refined: {request.query}"
+
+        # Simple filter / sort requests are answered locally, without an agent run
+        refined_results: Optional[List[CourseDetails]] = refine_locally(courses, request.query.strip())
+        if refined_results is not None:
+            logger.info("Refined locally to %s courses", len(refined_results))
+            refined_rows = pack_courses(refined_results)
+            return recommendation_response(
+                refined_topic,
+                refined_rows,
+                result_id=result_sessions.save(refined_topic, refined_rows) if refined_rows else None,
+            )
+
         # Refine the recommendations using the agent
-        refined_results: List[CourseDetails] = await refine_recommendations(
-            request.courses,
-            request.query.strip()
-        )
+        try:
+            async with agent_admission.slot():
+                refined_results = await refine_recommendations(
+                    courses,
+                    request.query.strip()
+                )
+        except AdmissionRejected as e:
+            raise _too_busy(e)
+        except UpstreamUnavailable as e:
+            # Keep the user's current list rather than failing the refinement
+            logger.warning("Refinement unavailable, returning original courses: %s", e)
+            return recommendation_response(
+                refined_topic, rows, result_id=result_sessions.save(refined_topic, rows), degraded=True
+            )
 
-        # Return refined results
-        return RecommendationResponse(
-            topic=f"Refined: {request.query}",
-            results=refined_results
+        # Return refined results, stored so the next refinement can chain on them
+        refined_rows = pack_courses(refined_results)
+        return recommendation_response(
+            refined_topic,
+            refined_rows,
+            result_id=result_sessions.save(refined_topic, refined_rows) if refined_rows else None,
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected Error during refinement: {e}")
+        logger.error("Unexpected Error during refinement: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while processing the refinement request."
@@ -0,0 +1,299 @@
+import json
+import time
+import zlib
+import socket
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Version byte prepended to every encoded value so the format can evolve safely
+_FORMAT_VERSION = b"\x01"
+
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a JSON-compatible value into compact, zlib-compressed bytes."""
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _FORMAT_VERSION + zlib.compress(raw, 6)
+
+
+def decode_value(data: Optional[bytes]) -> Any:
+    """Inverse of encode_value. Returns None for missing or unreadable data."""
+    if not data or data[:1] != _FORMAT_VERSION:
+        return None
+    try:
+        return json.loads(zlib.decompress(data[1:]))
+    except (zlib.error, ValueError) as e:
+        logger.warning("Discarding unreadable cache value: %s", e)
+        return None
+
+
+class CacheBackend(ABC):
+    """Byte-oriented key/value store with per-key TTLs."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU store. Not shared between workers."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def dump(self) -> List[Tuple[str, float, bytes]]:
+        """Unexpired (key, expires_at, value) items, least recently used first."""
+        now = time.time()
+        with self._lock:
+            return [(key, expires_at, value) for key, (expires_at, value) in self._data.items() if expires_at > now]
+
+    def restore(self, items: Iterable[Tuple[str, float, bytes]]) -> int:
+        """
+        Load items from ``dump`` (possibly of another process), keeping their absolute
+        expiry. Keys written since startup win, and restored items rank as least recently
+        used, so they are evicted first. Returns how many items were loaded.
+        """
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            # Most recently used first, until the LRU is full
+            for key, expires_at, value in reversed(list(items)):
+                if len(self._data) >= self.max_entries:
+                    break
+                if expires_at <= now or key in self._data:
+                    continue
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key, last=False)
+                loaded += 1
+        return loaded
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Local SQLite file store. Every worker on the host opens the same file, so
+    results computed by one worker are visible to all of them.
+    """
+
+    _PURGE_EVERY = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisError(Exception):
+    """Error reply or protocol failure from a Redis-protocol server."""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Minimal Redis (RESP2) client covering GET / SET PX / DEL.
+    Works against Redis, KeyDB, Valkey or any local fake speaking the same protocol.
+    Connection failures degrade to cache misses instead of failing requests. After a
+    failed connect, commands are short-circuited to misses for ``retry_seconds``, so
+    an unreachable server does not cost every request (on the event loop) a connect
+    timeout.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 1.0, retry_seconds: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        # No reconnect attempts before this time (monotonic) after a failed connect
+        self._retry_at = 0.0
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _disconnect(self) -> None:
+        try:
+            if self._reader is not None:
+                self._reader.close()
+            if self._sock is not None:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    @staticmethod
+    def _pack(*args: Any) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise RedisError("Connection closed by server")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode("utf-8")
+        if prefix == b"-":
+            raise RedisError(body.decode("utf-8"))
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply prefix: {prefix!r}")
+
+    def _send(self, *args: Any) -> Any:
+        self._sock.sendall(self._pack(*args))
+        return self._read_reply()
+
+    def _command(self, *args: Any) -> Any:
+        if self._sock is None and time.monotonic() < self._retry_at:
+            return None
+        with self._lock:
+            connecting = self._sock is None
+            if connecting and time.monotonic() < self._retry_at:
+                return None
+            try:
+                if connecting:
+                    self._connect()
+                return self._send(*args)
+            except (OSError, RedisError) as e:
+                if connecting:
+                    # Server unreachable: serve misses for a while instead of reconnecting per call
+                    self._retry_at = time.monotonic() + self.retry_seconds
+                    logger.warning("Redis cache unavailable, retrying in %ss: %s", self.retry_seconds, e)
+                else:
+                    # A dropped connection is retried on the next command
+                    logger.warning("Redis cache command %s failed: %s", args[0], e)
+                self._disconnect()
+                return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._command("SET", key, value, "PX", max(1, int(ttl_seconds * 1000)))
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+def create_backend(url: str, max_entries: int = 4096) -> CacheBackend:
+    """
+    Build a cache backend from a URL:
+    - ``memory://`` (default) – per-process LRU
+    - ``sqlite:///cache.db`` / ``sqlite:////abs/path/cache.db`` – file shared by all workers on the host
+    - ``redis://[:password@]host:port/db`` – shared Redis-protocol server
+    """
+    parsed = urlparse(url or "memory://")
+    scheme = parsed.scheme.lower()
+    if scheme == "memory":
+        return MemoryBackend(max_entries=max_entries)
+    if scheme == "sqlite":
+        # Same convention as SQLAlchemy: three slashes = relative, four = absolute
+        path = parsed.netloc + parsed.path[1:] if parsed.path.startswith("/") else parsed.netloc + parsed.path
+        return SQLiteBackend(path or "cache.db")
+    if scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisBackend(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=db,
+            password=parsed.password,
+        )
+    raise ValueError(f"Unsupported cache backend URL: {url}")
@@ -0,0 +1,143 @@
+import os
+import time
+import struct
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.services.cache_backends import CacheBackend, MemoryBackend
+from app.services.result_cache import cache_backend
+
+logger = logging.getLogger(__name__)
+
+# File layout: header, then one record per cache item. Values are stored exactly as the
+# backend holds them (already versioned + zlib-compressed by encode_value).
+_MAGIC = b"CSNP"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBdI")   # magic, version, written_at, item count
+_ITEM = struct.Struct("<HdI")       # key length, expires_at (unix time), value length
+
+
+def write_snapshot(path: str, items: List[Tuple[str, float, bytes]]) -> None:
+    """Write items atomically: readers (other workers) never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, time.time(), len(items)))
+        for key, expires_at, value in items:
+            raw_key = key.encode("utf-8")
+            f.write(_ITEM.pack(len(raw_key), expires_at, len(value)))
+            f.write(raw_key)
+            f.write(value)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> List[Tuple[str, float, bytes]]:
+    """Read a snapshot file. Raises ValueError for a foreign, newer or truncated file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError("truncated header")
+    magic, version, _, count = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"unsupported snapshot format {magic!r} v{version}")
+
+    items: List[Tuple[str, float, bytes]] = []
+    pos = _HEADER.size
+    for _ in range(count):
+        if pos + _ITEM.size > len(data):
+            raise ValueError("truncated item")
+        key_len, expires_at, value_len = _ITEM.unpack_from(data, pos)
+        pos += _ITEM.size
+        end = pos + key_len + value_len
+        if end > len(data):
+            raise ValueError("truncated item")
+        items.append((data[pos:pos + key_len].decode("utf-8"), expires_at, data[pos + key_len:end]))
+        pos = end
+    return items
+
+
+class CacheSnapshotter:
+    """
+    Keeps the in-process cache (recommendation results / candidate pools, search
+    results and result sessions) warm across restarts. On startup the last snapshot
+    is loaded in the background while the server already takes traffic; entries keep
+    their original expiry, so nothing is served past its TTL. Snapshots are written
+    every ``interval_seconds`` and once more on graceful shutdown.
+
+    Only the memory backend needs this: SQLite and Redis backends outlive the process.
+    """
+
+    def __init__(self, backend: CacheBackend, path: str, interval_seconds: float):
+        self.backend = backend
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and isinstance(self.backend, MemoryBackend)
+
+    def load(self) -> int:
+        """Restore the snapshot into the backend; returns how many entries were loaded."""
+        if not self.enabled or not os.path.exists(self.path):
+            return 0
+        started = time.monotonic()
+        try:
+            items = read_snapshot(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache snapshot %s: %s", self.path, e)
+            return 0
+        loaded = self.backend.restore(items)
+        logger.info(
+            "Restored %s of %s cached entries from %s in %.0f ms",
+            loaded, len(items), self.path, (time.monotonic() - started) * 1000,
+        )
+        return loaded
+
+    def save(self) -> int:
+        """Write the backend's unexpired entries to the snapshot file; returns the entry count."""
+        if not self.enabled:
+            return 0
+        items = self.backend.dump()
+        try:
+            write_snapshot(self.path, items)
+        except OSError as e:
+            logger.warning("Could not write cache snapshot %s: %s", self.path, e)
+            return 0
+        logger.info("Wrote %s cached entries to %s", len(items), self.path)
+        return len(items)
+
+    async def _loop(self) -> None:
+        await asyncio.to_thread(self.load)
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                logger.warning("Periodic cache snapshot failed: %s", e)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic task and write a final snapshot."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self.save)
+
+
+cache_snapshotter = CacheSnapshotter(
+    backend=cache_backend,
+    path=settings.CACHE_SNAPSHOT_PATH,
+    interval_seconds=settings.CACHE_SNAPSHOT_INTERVAL_SECONDS,
+)
@@ -0,0 +1,199 @@
+import os
+import re
+import sqlite3
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+from app.models.schemas import CourseDetails
+from app.config import settings
+from app.utils.serialization import construct_courses
+from app.services.catalog_columnar import open_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Column order of the rows produced by the ingestion pipeline
+CATALOG_COLUMNS = (
+    "norm_url", "title", "url", "provider", "description", "duration",
+    "duration_bucket", "level", "rating", "price", "is_free",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    norm_url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    description TEXT NOT NULL,
+    duration TEXT,
+    duration_bucket TEXT,
+    level TEXT,
+    rating REAL,
+    price TEXT,
+    is_free INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_courses_provider ON courses (provider COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_courses_level ON courses (level COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_courses_free ON courses (is_free);
+CREATE INDEX IF NOT EXISTS idx_courses_duration ON courses (duration_bucket);
+CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+    title, description, content='courses', content_rowid='id'
+);
+"""
+
+
+class CatalogStore:
+    """
+    Local, indexed course catalog backed by SQLite with an FTS5 index on titles
+    and descriptions. Filled by ``app.services.catalog_ingest`` and read by the API.
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        # Optional memory-mapped columnar snapshot (see app.services.catalog_columnar)
+        self.columns = None
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.executescript(_SCHEMA)
+
+    def insert_rows(self, rows: Iterable[Tuple]) -> int:
+        """Insert normalized rows; URLs already in the catalog are skipped. Returns rows added."""
+        placeholders = ", ".join("?" for _ in CATALOG_COLUMNS)
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO courses ({', '.join(CATALOG_COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def rebuild_search_index(self) -> None:
+        """Rebuild the full-text index in one pass (much faster than per-row triggers for bulk loads)."""
+        with self._lock:
+            self._conn.execute("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0]
+
+    @staticmethod
+    def _match_query(topic: str) -> Optional[str]:
+        terms = re.findall(r"\w+", topic.lower())
+        return " AND ".join(f'"{term}"' for term in terms) if terms else None
+
+    def search(self, topic: str, filters: Optional[Dict[str, Any]], limit: int, offset: int = 0) -> List[CourseDetails]:
+        """
+        Full-text search on the topic with the same filter semantics as
+        filter_courses_by_constraints, ordered by relevance, then rating.
+
+        With a columnar snapshot attached and at most CATALOG_COLUMNAR_MAX_MATCHES
+        matches, SQLite only finds the matches; filtering, ordering and decoding
+        the page run on the snapshot. Otherwise everything runs inside SQLite.
+        """
+        match = self._match_query(topic)
+        if match is None:
+            return []
+        if self.columns is not None:
+            row_ids, scores = self.match(match, settings.CATALOG_COLUMNAR_MAX_MATCHES + 1)
+            # Only a complete match set can be ranked on the snapshot; broader topics use SQLite
+            if len(row_ids) <= settings.CATALOG_COLUMNAR_MAX_MATCHES:
+                return self.columns.search(row_ids, scores, filters, limit, offset)
+
+        clauses = ["courses_fts MATCH ?"]
+        params: List[Any] = [match]
+        filters = filters or {}
+
+        levels = [l.lower() for l in filters.get("level") or []]
+        if levels:
+            clauses.append(f"(c.level IS NULL OR lower(c.level) IN ({', '.join('?' for _ in levels)}))")
+            params.extend(levels)
+        pricing = {p.lower() for p in filters.get("pricing") or []}
+        if pricing and pricing != {"free", "paid"}:
+            clauses.append("c.is_free = ?")
+            params.append(1 if "free" in pricing else 0)
+        providers = [p.lower() for p in filters.get("provider") or []]
+        if providers:
+            clauses.append(f"lower(c.provider) IN ({', '.join('?' for _ in providers)})")
+            params.extend(providers)
+        durations = list(filters.get("duration") or [])
+        if durations:
+            clauses.append(f"c.duration_bucket IN ({', '.join('?' for _ in durations)})")
+            params.extend(durations)
+
+        sql = (
+            "SELECT c.title, c.url, c.provider, c.description, c.duration, c.level, c.rating, c.price "
+            "FROM courses_fts JOIN courses c ON c.id = courses_fts.rowid "
+            f"WHERE {' AND '.join(clauses)} "
+            "ORDER BY bm25(courses_fts), c.rating DESC, c.id LIMIT ? OFFSET ?"
+        )
+        params.extend([limit, offset])
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        # Rows were validated as CourseDetails during ingestion
+        return construct_courses([list(row) for row in rows])
+
+    def match(self, match: str, limit: int) -> Tuple[List[int], List[float]]:
+        """Row ids and bm25 scores (lower is better) of up to ``limit`` full-text matches, unordered."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, bm25(courses_fts) FROM courses_fts WHERE courses_fts MATCH ? LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    def iter_rows(self, batch_size: int) -> Iterator[List[Tuple]]:
+        """All courses as (id, *CATALOG_COLUMNS[1:]) tuples in id order, ``batch_size`` at a time."""
+        last_id = 0
+        while True:
+            with self._lock:
+                batch = self._conn.execute(
+                    f"SELECT id, {', '.join(CATALOG_COLUMNS[1:])} FROM courses WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1][0]
+
+    def titles(self, limit: int) -> List[str]:
+        """Up to ``limit`` course titles, best rated first."""
+        if self.columns is not None:
+            return self.columns.strings("title", self.columns.top_rated(limit))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title FROM courses ORDER BY rating IS NULL, rating DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        if self.columns is not None:
+            self.columns.close()
+            self.columns = None
+
+
+_catalog: Optional[CatalogStore] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Optional[CatalogStore]:
+    """Open the configured catalog read-only on first use; None if none has been ingested."""
+    global _catalog
+    if _catalog is None and settings.CATALOG_PATH and os.path.exists(settings.CATALOG_PATH):
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = CatalogStore(settings.CATALOG_PATH, read_only=True)
+                logger.info("Opened course catalog at %s", settings.CATALOG_PATH)
+                # A snapshot from an earlier ingestion (different size) is ignored
+                catalog.columns = open_snapshot(settings.CATALOG_COLUMNAR_PATH, expected_rows=catalog.count())
+                _catalog = catalog
+    return _catalog
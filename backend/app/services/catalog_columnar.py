@@ -0,0 +1,355 @@
+"""
+Read-only columnar snapshot of the course catalog.
+
+Exported from the SQLite catalog after ingestion and opened with ``mmap`` by every
+worker, so they all share one page-cache copy instead of each holding the courses
+as Python objects. Filter columns are fixed-width arrays that numpy reads in
+place; text fields are UTF-8 blobs indexed by an offsets array and decoded only
+for the rows that are returned.
+
+File layout: ``<4sBI`` header (magic, version, JSON length), a JSON description
+of every section (dtype, byte offset, item count), then the sections, each
+aligned to 8 bytes.
+
+    python -m app.services.catalog_columnar [--db catalog.db] [--out catalog.cols]
+"""
+import os
+import json
+import mmap
+import time
+import array
+import struct
+import shutil
+import logging
+import argparse
+import tempfile
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from app.models.schemas import CourseDetails
+from app.utils.course_utils import LEVELS, DURATION_BUCKETS, level_rank, duration_hours
+from app.utils.serialization import construct_courses
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"CCOL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBI")
+_ALIGN = 8
+
+# Text columns, in CourseDetails order where they map to a field
+_STRING_COLUMNS = ("title", "url", "description", "duration", "level", "price")
+# Text columns that may be NULL (kept apart from empty strings by a null flag column)
+_NULLABLE = ("duration", "level", "price")
+
+
+def _code(value: Optional[str], labels: Sequence[str]) -> int:
+    return labels.index(value) if value in labels else -1
+
+
+def _pad(out, position: int) -> int:
+    padding = -position % _ALIGN
+    out.write(b"\0" * padding)
+    return position + padding
+
+
+def export_snapshot(db_path: str, out_path: str, batch_size: int = 50000) -> int:
+    """
+    Write the columnar snapshot of the SQLite catalog at ``db_path`` to ``out_path``
+    (atomically: written to a temporary file, then renamed). Returns the row count.
+
+    Rows are streamed in batches; text goes to one temporary blob file per column,
+    so memory use stays bounded by the fixed-width columns.
+    """
+    from app.services.catalog import CatalogStore
+
+    store = CatalogStore(db_path, read_only=True)
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    fixed = {
+        "row_id": array.array("q"),
+        "level_code": array.array("b"),
+        "is_free": array.array("b"),
+        "duration_bucket": array.array("b"),
+        "duration_hours": array.array("f"),
+        "rating": array.array("d"),
+        "provider_id": array.array("i"),
+    }
+    offsets = {name: array.array("Q", [0]) for name in _STRING_COLUMNS}
+    nulls = {name: array.array("B") for name in _NULLABLE}
+    blobs = {name: tempfile.TemporaryFile(dir=out_dir) for name in _STRING_COLUMNS}
+    providers: Dict[str, int] = {}
+    nan = float("nan")
+
+    try:
+        for batch in store.iter_rows(batch_size):
+            for row_id, title, url, provider, description, duration, bucket, level, rating, price, is_free in batch:
+                fixed["row_id"].append(row_id)
+                fixed["level_code"].append(-1 if level_rank(level) is None else level_rank(level))
+                fixed["is_free"].append(is_free)
+                fixed["duration_bucket"].append(_code(bucket, DURATION_BUCKETS))
+                hours = duration_hours(duration)
+                fixed["duration_hours"].append(nan if hours is None else hours)
+                fixed["rating"].append(nan if rating is None else rating)
+                fixed["provider_id"].append(providers.setdefault(provider, len(providers)))
+                values = {"title": title, "url": url, "description": description,
+                          "duration": duration, "level": level, "price": price}
+                for name in _STRING_COLUMNS:
+                    value = values[name]
+                    if name in nulls:
+                        nulls[name].append(value is None)
+                    data = (value or "").encode("utf-8")
+                    blobs[name].write(data)
+                    offsets[name].append(offsets[name][-1] + len(data))
+        rows = len(fixed["row_id"])
+
+        # Provider names: a small dictionary-encoded string column of their own
+        provider_offsets = array.array("Q", [0])
+        provider_blob = bytearray()
+        for name in providers:
+            provider_blob += name.encode("utf-8")
+            provider_offsets.append(len(provider_blob))
+
+        sections: List[tuple] = [(name, column) for name, column in fixed.items()]
+        for name in _STRING_COLUMNS:
+            sections.append((f"{name}.offsets", offsets[name]))
+            if name in nulls:
+                sections.append((f"{name}.null", nulls[name]))
+            sections.append((f"{name}.data", blobs[name]))
+        sections.append(("provider.offsets", provider_offsets))
+        sections.append(("provider.data", bytes(provider_blob)))
+
+        # The header lists the section offsets, which depend on the header's size:
+        # grow the reserved space until the header fits in front of the first section
+        created_at = time.time()
+        start = 0
+        while True:
+            layout: Dict[str, Dict[str, Any]] = {}
+            position = start
+            for name, column in sections:
+                if isinstance(column, array.array):
+                    dtype, count, nbytes = np.dtype(column.typecode).str, len(column), column.itemsize * len(column)
+                elif isinstance(column, bytes):
+                    dtype, count, nbytes = "|u1", len(column), len(column)
+                else:
+                    nbytes = column.seek(0, os.SEEK_END)
+                    dtype, count = "|u1", nbytes
+                layout[name] = {"dtype": dtype, "offset": position, "count": count}
+                position += nbytes + -nbytes % _ALIGN
+            meta = json.dumps({"rows": rows, "created_at": created_at, "sections": layout}).encode("utf-8")
+            header_size = _HEADER.size + len(meta)
+            if header_size <= start:
+                break
+            start = header_size + -header_size % _ALIGN
+
+        tmp_path = f"{out_path}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(_HEADER.pack(_MAGIC, _VERSION, len(meta)))
+            out.write(meta)
+            out.write(b"\0" * (start - header_size))
+            position = start
+            for name, column in sections:
+                assert position == layout[name]["offset"]
+                if isinstance(column, array.array):
+                    out.write(column.tobytes())
+                    position += column.itemsize * len(column)
+                elif isinstance(column, bytes):
+                    out.write(column)
+                    position += len(column)
+                else:
+                    column.seek(0)
+                    shutil.copyfileobj(column, out, 1 << 20)
+                    position += layout[name]["count"]
+                position = _pad(out, position)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, out_path)
+    finally:
+        for blob in blobs.values():
+            blob.close()
+        store.close()
+    logger.info("Exported columnar catalog snapshot of %s courses to %s", rows, out_path)
+    return rows
+
+
+class ColumnarCatalog:
+    """
+    Memory-mapped view over a snapshot written by ``export_snapshot``.
+
+    Every column is a numpy array over the shared mapping, so opening the snapshot
+    costs no copying and filters run as vectorized masks over all rows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} columnar catalog snapshot")
+        meta = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_len])
+        self.rows: int = meta["rows"]
+        self.created_at: float = meta["created_at"]
+        self._columns = {
+            name: np.frombuffer(self._mmap, dtype=section["dtype"], count=section["count"], offset=section["offset"])
+            for name, section in meta["sections"].items()
+        }
+        self.row_id = self._columns["row_id"]
+        self.level_code = self._columns["level_code"]
+        self.is_free = self._columns["is_free"]
+        self.duration_bucket = self._columns["duration_bucket"]
+        self.duration_hours = self._columns["duration_hours"]
+        self.rating = self._columns["rating"]
+        self.provider_id = self._columns["provider_id"]
+        # A few hundred names at most: decoded once
+        self.providers = [self._string("provider", i) for i in range(len(self._columns["provider.offsets"]) - 1)]
+        self._providers_lower = np.array([name.lower() for name in self.providers], dtype=object)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _string(self, column: str, i: int) -> Optional[str]:
+        nulls = self._columns.get(f"{column}.null")
+        if nulls is not None and nulls[i]:
+            return None
+        offsets = self._columns[f"{column}.offsets"]
+        return self._columns[f"{column}.data"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    @staticmethod
+    def _isin(values: np.ndarray, codes: Sequence[int], size: int) -> np.ndarray:
+        """``np.isin`` for small non-negative codes (or -1), as one lookup-table gather."""
+        table = np.zeros(size + 1, dtype=bool)
+        table[list(codes)] = True
+        # -1 (unknown) lands on the last slot, which is only set when -1 is among the codes
+        return table[values]
+
+    def mask(self, filters: Optional[Dict[str, Any]], index: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Boolean mask of the rows (all, or those at ``index``) matching ``filters``,
+        with the same semantics as filter_courses_by_constraints / CatalogStore.search.
+        """
+        def column(values: np.ndarray) -> np.ndarray:
+            return values if index is None else values[index]
+
+        size = self.rows if index is None else len(index)
+        keep = np.ones(size, dtype=bool)
+        filters = filters or {}
+
+        levels = {l.lower() for l in filters.get("level") or []}
+        if levels:
+            # Courses without a level are never filtered out by level
+            codes = [LEVELS.index(l) for l in levels if l in LEVELS] + [-1]
+            keep &= self._isin(column(self.level_code), codes, len(LEVELS))
+        pricing = {p.lower() for p in filters.get("pricing") or []}
+        if pricing and pricing != {"free", "paid"}:
+            keep &= column(self.is_free) == (1 if "free" in pricing else 0)
+        providers = {p.lower() for p in filters.get("provider") or []}
+        if providers:
+            ids = np.flatnonzero(np.isin(self._providers_lower, list(providers)))
+            keep &= self._isin(column(self.provider_id), ids, len(self.providers))
+        durations = list(filters.get("duration") or [])
+        if durations:
+            codes = [DURATION_BUCKETS.index(d) for d in durations if d in DURATION_BUCKETS]
+            keep &= self._isin(column(self.duration_bucket), codes, len(DURATION_BUCKETS))
+        return keep
+
+    def filter(self, filters: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Positions of all rows matching ``filters``."""
+        return np.flatnonzero(self.mask(filters))
+
+    def top_rated(self, limit: int) -> np.ndarray:
+        """Positions of the ``limit`` best rated rows (unrated last)."""
+        rating = np.nan_to_num(self.rating, nan=-np.inf)
+        if limit >= self.rows:
+            return np.argsort(-rating, kind="stable")
+        best = np.argpartition(-rating, limit)[:limit]
+        return best[np.argsort(-rating[best], kind="stable")]
+
+    def strings(self, column: str, index: Sequence[int]) -> List[Optional[str]]:
+        return [self._string(column, int(i)) for i in index]
+
+    def positions(self, row_ids: Sequence[int]) -> np.ndarray:
+        """Positions of catalog row ids; ids missing from the snapshot map to -1."""
+        ids = np.asarray(row_ids, dtype=np.int64)
+        found = np.searchsorted(self.row_id, ids)
+        found[found >= self.rows] = 0
+        return np.where(self.row_id[found] == ids, found, -1) if self.rows else np.full(len(ids), -1)
+
+    def search(self, row_ids: Sequence[int], scores: Sequence[float], filters: Optional[Dict[str, Any]],
+               limit: int, offset: int = 0) -> List[CourseDetails]:
+        """
+        Filter and page a complete set of full-text matches: order by match score
+        (lower is better), then rating (unrated last), then id, like CatalogStore.search.
+        """
+        index = self.positions(row_ids)
+        present = index >= 0
+        index, scores = index[present], np.asarray(scores, dtype=np.float64)[present]
+        keep = self.mask(filters, index)
+        index, scores = index[keep], scores[keep]
+        rating = np.nan_to_num(self.rating[index], nan=-np.inf)
+        order = np.lexsort((self.row_id[index], -rating, scores))[offset:offset + limit]
+        return self.courses(index[order])
+
+    def course_rows(self, index: Sequence[int]) -> List[list]:
+        """Packed course rows (COURSE_FIELDS order), decoding text only for these rows."""
+        rows = []
+        for i in (int(i) for i in index):
+            rating = float(self.rating[i])
+            rows.append([
+                self._string("title", i),
+                self._string("url", i),
+                self.providers[self.provider_id[i]],
+                self._string("description", i),
+                self._string("duration", i),
+                self._string("level", i),
+                None if rating != rating else rating,
+                self._string("price", i),
+            ])
+        return rows
+
+    def courses(self, index: Sequence[int]) -> List[CourseDetails]:
+        # Rows were validated as CourseDetails during ingestion
+        return construct_courses(self.course_rows(index))
+
+    def close(self) -> None:
+        # The mapping can only be closed once no array views into it remain
+        self._columns.clear()
+        for name in ("row_id", "level_code", "is_free", "duration_bucket", "duration_hours", "rating", "provider_id"):
+            setattr(self, name, None)
+        self._mmap.close()
+
+
+def open_snapshot(path: str, expected_rows: Optional[int] = None) -> Optional[ColumnarCatalog]:
+    """Open a snapshot if one exists and matches the catalog's size; None otherwise."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snapshot = ColumnarCatalog(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable columnar catalog snapshot %s: %s", path, e)
+        return None
+    if expected_rows is not None and snapshot.rows != expected_rows:
+        logger.warning(
+            "Ignoring columnar catalog snapshot %s: %s rows, catalog has %s (re-export it)",
+            path, snapshot.rows, expected_rows,
+        )
+        snapshot.close()
+        return None
+    logger.info("Opened columnar catalog snapshot %s (%s courses)", path, snapshot.rows)
+    return snapshot
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export the course catalog as a memory-mappable columnar snapshot.")
+    parser.add_argument("--db", default=None, help="Catalog database path (default: CATALOG_PATH setting)")
+    parser.add_argument("--out", default=None, help="Snapshot path (default: CATALOG_COLUMNAR_PATH setting)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from app.config import settings
+    rows = export_snapshot(args.db or settings.CATALOG_PATH, args.out or settings.CATALOG_COLUMNAR_PATH)
+    print(json.dumps({"rows": rows}))
+
+
+if __name__ == "__main__":
+    main()
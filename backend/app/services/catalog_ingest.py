@@ -0,0 +1,237 @@
+"""
+Bulk ingestion of provider catalog dumps into the local course catalog.
+
+Streams CSV / JSONL files (optionally gzip-compressed) in fixed-size chunks,
+normalizes each record into a CourseDetails-compatible row on a process pool
+and writes the rows into the SQLite catalog. Memory stays bounded by
+``workers * 2`` chunks in flight; duplicates across files are dropped by the
+catalog's unique normalized-URL index (first occurrence wins).
+
+Afterwards the memory-mapped columnar snapshot read by the API
+(app.services.catalog_columnar) is re-exported from the catalog.
+
+Usage (from the backend directory):
+    python -m app.services.catalog_ingest coursera.csv edx.jsonl.gz --db catalog.db --workers 8
+"""
+
+import csv
+import gzip
+import json
+import time
+import logging
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from app.models.schemas import CourseDetails
+from app.utils.course_utils import extract_provider_from_url, normalize_url, duration_bucket
+
+logger = logging.getLogger(__name__)
+
+# Accepted source column names for each CourseDetails field, in priority order
+FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "title": ("title", "name", "course_title", "course_name"),
+    "url": ("url", "link", "course_url", "href"),
+    "provider": ("provider", "platform", "partner", "organization", "institution"),
+    "description": ("description", "summary", "headline", "about", "short_description"),
+    "duration": ("duration", "length", "estimated_time", "workload", "content_length"),
+    "level": ("level", "difficulty", "difficulty_level", "instructional_level"),
+    "rating": ("rating", "avg_rating", "average_rating", "stars"),
+    "price": ("price", "cost", "pricing", "price_detail"),
+}
+
+_LEVELS = {"beginner": "Beginner", "intermediate": "Intermediate", "advanced": "Advanced"}
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from a CSV or JSONL file one at a time."""
+    name = path[:-3] if path.endswith(".gz") else path
+    with _open_text(path) as handle:
+        if name.endswith(".csv"):
+            yield from csv.DictReader(handle)
+        elif name.endswith((".jsonl", ".ndjson", ".json")):
+            for line in handle:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping malformed JSON line in %s", path)
+        else:
+            raise ValueError(f"Unsupported catalog file type: {path}")
+
+
+def iter_chunks(paths: List[str], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    records = itertools.chain.from_iterable(iter_records(path) for path in paths)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _pick(record: Dict[str, Any], field: str) -> Optional[str]:
+    lowered = {str(k).strip().lower(): v for k, v in record.items() if k is not None}
+    for alias in FIELD_ALIASES[field]:
+        value = lowered.get(alias)
+        if value not in (None, ""):
+            return str(value).strip()
+    return None
+
+
+def _normalize_level(level: Optional[str]) -> Optional[str]:
+    if not level:
+        return None
+    lowered = level.lower()
+    for key, label in _LEVELS.items():
+        if key in lowered:
+            return label
+    if "all" in lowered or "intro" in lowered:
+        return "Beginner"
+    return None
+
+
+def normalize_record(record: Dict[str, Any]) -> Optional[Tuple]:
+    """
+    Normalize one raw record into a catalog row, applying the same provider,
+    URL and duration rules as the agent pipeline. Returns None for unusable records.
+    """
+    title = _pick(record, "title")
+    url = _pick(record, "url")
+    if not title or not url:
+        return None
+
+    provider_from_url = extract_provider_from_url(url)
+    provider = provider_from_url if provider_from_url != "Unknown" else (_pick(record, "provider") or "Unknown")
+
+    rating = None
+    raw_rating = _pick(record, "rating")
+    if raw_rating:
+        try:
+            rating = float(raw_rating)
+        except ValueError:
+            rating = None
+
+    price = _pick(record, "price")
+    if price and "free" in price.lower():
+        price = "Free"
+    duration = _pick(record, "duration")
+
+    try:
+        # Validate once here so the API can serve catalog rows without re-validating them
+        course = CourseDetails(
+            title=title,
+            url=url,
+            provider=provider,
+            description=_pick(record, "description") or "",
+            duration=duration,
+            level=_normalize_level(_pick(record, "level")),
+            rating=rating,
+            price=price,
+        )
+    except Exception:
+        return None
+
+    course_url = str(course.url)
+    # Same free/paid labelling as filter_courses_by_constraints
+    is_free = 0 if course.price and "free" not in course.price.lower() else 1
+    return (
+        normalize_url(course_url),
+        course.title,
+        course_url,
+        course.provider,
+        course.description,
+        course.duration,
+        duration_bucket(course.duration),
+        course.level,
+        course.rating,
+        course.price,
+        is_free,
+    )
+
+
+def normalize_chunk(records: List[Dict[str, Any]]) -> List[Tuple]:
+    """Process-pool entry point: normalize a chunk and drop unusable records."""
+    rows = []
+    for record in records:
+        row = normalize_record(record)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def ingest(paths: List[str], db_path: str, workers: int = 4, chunk_size: int = 5000,
+           columnar_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Run the full pipeline and return counters (records read, rows inserted, catalog
+    size). With ``columnar_path``, the columnar snapshot is re-exported afterwards.
+    """
+    from app.services.catalog import CatalogStore
+    from app.services.catalog_columnar import export_snapshot
+
+    store = CatalogStore(db_path)
+    stats = {"read": 0, "valid": 0, "inserted": 0}
+    max_in_flight = max(1, workers) * 2
+    started = time.monotonic()
+
+    def insert(future) -> None:
+        rows = future.result()
+        stats["valid"] += len(rows)
+        stats["inserted"] += store.insert_rows(rows)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Chunks are normalized in parallel but inserted in input order (oldest future
+        # first), so the first occurrence of a duplicate URL is the one that is kept
+        pending = deque()
+        for chunk in iter_chunks(paths, chunk_size):
+            stats["read"] += len(chunk)
+            pending.append(pool.submit(normalize_chunk, chunk))
+            if len(pending) >= max_in_flight:
+                insert(pending.popleft())
+                logger.info("Ingested %s courses from %s records so far", stats["inserted"], stats["read"])
+        while pending:
+            insert(pending.popleft())
+
+    store.rebuild_search_index()
+    stats["catalog_size"] = store.count()
+    store.close()
+    if columnar_path:
+        export_snapshot(db_path, columnar_path)
+    logger.info(
+        "Catalog ingestion finished in %.1fs: %s read, %s valid, %s new, %s total",
+        time.monotonic() - started, stats["read"], stats["valid"], stats["inserted"], stats["catalog_size"],
+    )
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest provider catalog dumps into the local course catalog.")
+    parser.add_argument("files", nargs="+", help="CSV / JSONL files (optionally .gz)")
+    parser.add_argument("--db", default=None, help="Catalog database path (default: CATALOG_PATH setting)")
+    parser.add_argument("--workers", type=int, default=4, help="Normalization processes")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Records per chunk")
+    parser.add_argument("--columnar", default=None,
+                        help="Columnar snapshot to re-export afterwards (default: CATALOG_COLUMNAR_PATH setting, '' to skip)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from app.config import settings
+    if args.db is None:
+        args.db = settings.CATALOG_PATH
+    if args.columnar is None:
+        args.columnar = settings.CATALOG_COLUMNAR_PATH
+    stats = ingest(args.files, args.db, workers=args.workers, chunk_size=args.chunk_size,
+                   columnar_path=args.columnar)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.utils.admission import AdmissionRejected
+from app.utils.profiling import active_profile
+from app.utils.tracing import RequestTrace, trace_store, use_trace
+
+logger = logging.getLogger(__name__)
+
+JobFunction = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class Job:
+    """One unit of background work and, once finished, its result."""
+    job_id: str
+    name: str
+    fn: JobFunction
+    # Context of the submitting request, so the job's log records keep its request id
+    context: contextvars.Context
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    trace_id: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "trace_id": self.trace_id,
+        }
+
+
+class JobManager:
+    """
+    Bounded in-process job queue drained by a fixed pool of asyncio workers.
+
+    Submitting only enqueues and returns the job, so the HTTP request ends at once;
+    when ``max_queue`` jobs are already waiting, submission is refused with
+    AdmissionRejected instead. Finished jobs are kept for ``ttl_seconds`` so
+    clients can poll (or long-poll) for the result. Jobs live in one worker
+    process: with several workers, poll through a sticky route.
+    """
+
+    def __init__(self, workers: int, max_queue: int, ttl_seconds: float):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.ttl_seconds = ttl_seconds
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Smoothed job duration, used to estimate Retry-After when the queue is full
+        self._avg_run_seconds = 10.0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self._jobs.values():
+            if job.status in ("queued", "running"):
+                self._finish(job, "failed", error="Server shut down before the job finished")
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, name: str, fn: JobFunction) -> Job:
+        """Enqueue a job; raises AdmissionRejected when the queue is full."""
+        self.start()
+        self._purge()
+        job = Job(job_id=uuid.uuid4().hex, name=name, fn=fn, context=contextvars.copy_context())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            retry_after = max(1.0, self.max_queue / self.workers * self._avg_run_seconds)
+            logger.warning("Job queue full (%s waiting); rejecting '%s' job", self.max_queue, name)
+            raise AdmissionRejected("Job queue is full", retry_after) from None
+        self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        """Long-poll: return once the job has finished or ``timeout`` seconds have passed."""
+        if timeout > 0 and not job.done.is_set():
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.fn = None  # Release the closure (and whatever it captured)
+        job.done.set()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                # Run in the submitter's context (request id for logs), in a fresh task
+                await asyncio.create_task(self._execute(job), context=job.context)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job) -> None:
+        # Background jobs get their own trace, and never join the submitting request's profile
+        active_profile.set(None)
+        trace = RequestTrace(f"job {job.name}", {"job.id": job.job_id})
+        job.trace_id = trace.trace_id
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            with use_trace(trace):
+                result = await job.fn()
+        except Exception as e:
+            logger.exception("Job %s (%s) failed: %s", job.job_id, job.name, e)
+            self._finish(job, "failed", error=str(e) or type(e).__name__)
+        else:
+            self._finish(job, "done", result=result)
+        finally:
+            trace.finish()
+            trace_store.add(trace)
+            if job.finished_at is not None:
+                self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * (job.finished_at - job.started_at)
+
+
+job_manager = JobManager(
+    workers=settings.JOBS_WORKERS,
+    max_queue=settings.JOBS_MAX_QUEUE,
+    ttl_seconds=settings.JOBS_RESULT_TTL_SECONDS,
+)
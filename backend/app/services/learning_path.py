@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.config import settings
+from app.services.cache_backends import CacheBackend, encode_value, decode_value
+from app.services.catalog import get_catalog
+from app.services.result_cache import cache_backend, recommendation_cache, make_cache_key, compute_etag
+from app.utils.course_utils import LEVELS, level_rank, duration_hours
+from app.utils.serialization import COURSE_FIELDS, pack_courses, rows_to_dicts
+
+logger = logging.getLogger(__name__)
+
+# One stage per level, easiest first: (title, description)
+STAGES = (
+    ("Foundations", "Build your core understanding"),
+    ("Hands-on Practice", "Apply your knowledge with real projects"),
+    ("Advanced Mastery", "Take your skills to the next level"),
+)
+
+_LEVEL = COURSE_FIELDS.index("level")
+_DURATION = COURSE_FIELDS.index("duration")
+_RATING = COURSE_FIELDS.index("rating")
+
+
+def _by_duration(row: list) -> Tuple[bool, float, float]:
+    """Shortest first (unknown durations last), better rated first among equals."""
+    hours = duration_hours(row[_DURATION])
+    return hours is None, hours or 0.0, -(row[_RATING] or 0.0)
+
+
+def build_learning_path(rows: List[list], per_stage: int) -> List[Dict[str, Any]]:
+    """
+    Arrange a candidate set into staged steps without any model call.
+
+    Courses with a known level go to that level's stage. Courses without one fill
+    the stages that are still short, shortest courses into the earliest stages.
+    Within a stage, shorter and better rated courses come first. Empty stages are
+    dropped and the remaining ones renumbered.
+    """
+    stages: List[List[list]] = [[] for _ in STAGES]
+    unleveled: List[list] = []
+    for row in rows:
+        rank = level_rank(row[_LEVEL])
+        (stages[rank] if rank is not None else unleveled).append(row)
+    for stage in stages:
+        stage.sort(key=_by_duration)
+        del stage[per_stage:]
+    for row in sorted(unleveled, key=_by_duration):
+        open_stage = next((stage for stage in stages if len(stage) < per_stage), None)
+        if open_stage is None:
+            break
+        open_stage.append(row)
+
+    path = []
+    for (title, description), level, stage in zip(STAGES, LEVELS, stages):
+        if not stage:
+            continue
+        hours = [duration_hours(row[_DURATION]) for row in stage]
+        path.append({
+            "step": len(path) + 1,
+            "title": title,
+            "description": description,
+            "level": level,
+            "estimated_hours": round(sum(h for h in hours if h is not None), 1) or None,
+            "courses": rows_to_dicts(stage),
+        })
+    return path
+
+
+class LearningPathCache:
+    """
+    Built paths per topic in the shared cache backend. Each path remembers the
+    ETag of the candidate set it was built from, so it is rebuilt only when that
+    set changes (new agent run, extended pool, catalog refresh).
+    """
+
+    namespace = "path:"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, topic_key: str, source_etag: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        payload = decode_value(self.backend.get(self.namespace + topic_key))
+        if not payload or (source_etag is not None and payload["source_etag"] != source_etag):
+            return None
+        return payload["path"]
+
+    def set(self, topic_key: str, source_etag: str, path: Dict[str, Any]) -> None:
+        payload = {"source_etag": source_etag, "path": path}
+        self.backend.set(self.namespace + topic_key, encode_value(payload), self.ttl_seconds)
+
+
+async def get_learning_path(topic: str) -> Optional[Dict[str, Any]]:
+    """
+    The staged path for a topic, built from the topic's cached (unfiltered) result
+    set, or from the local catalog when the topic has not been searched. None when
+    neither has any course for it.
+    """
+    topic_key = " ".join(topic.lower().split())
+    entry = recommendation_cache.get_stale(make_cache_key(topic, None))
+    if entry is not None:
+        path = learning_path_cache.get(topic_key, entry.etag)
+        if path is None:
+            path = _path_payload(topic, entry.rows, "cache")
+            learning_path_cache.set(topic_key, entry.etag, path)
+        return path
+
+    path = learning_path_cache.get(topic_key)
+    if path is not None:
+        return path
+    rows = await _catalog_rows(topic)
+    if not rows:
+        return None
+    path = _path_payload(topic, rows, "catalog")
+    learning_path_cache.set(topic_key, compute_etag(rows), path)
+    return path
+
+
+def _path_payload(topic: str, rows: List[list], source: str) -> Dict[str, Any]:
+    return {
+        "topic": topic,
+        "source": source,
+        "stages": build_learning_path(rows, settings.LEARNING_PATH_COURSES_PER_STAGE),
+    }
+
+
+async def _catalog_rows(topic: str) -> List[list]:
+    catalog = get_catalog()
+    if catalog is None:
+        return []
+    try:
+        courses = await asyncio.to_thread(catalog.search, topic, None, settings.LEARNING_PATH_CATALOG_CANDIDATES)
+    except Exception as e:
+        logger.warning("Catalog lookup for the learning path of '%s' failed: %s", topic, e)
+        return []
+    return pack_courses(courses)
+
+
+learning_path_cache = LearningPathCache(
+    backend=cache_backend,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+)
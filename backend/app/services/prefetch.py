@@ -0,0 +1,199 @@
+import time
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+
+from app.models.schemas import CourseDetails
+from app.config import settings
+from app.services.result_cache import (
+    RecommendationCache,
+    recommendation_cache,
+    make_cache_key,
+    normalize_filters,
+)
+from app.utils.admission import AdmissionRejected, agent_admission
+
+logger = logging.getLogger(__name__)
+
+
+class PopularityTracker:
+    """
+    Compact, decaying popularity counter for topic + filter keys.
+
+    Counts live in a count-min sketch (fixed memory regardless of how many distinct
+    keys are seen); a small candidate table remembers the parameters of the
+    heaviest keys so they can be refreshed later.
+    """
+
+    def __init__(self, width: int = 1024, depth: int = 4, max_candidates: int = 80):
+        self.width = width
+        self.depth = depth
+        self.max_candidates = max_candidates
+        self._table: List[List[float]] = [[0.0] * width for _ in range(depth)]
+        self._candidates: Dict[str, Tuple[str, Dict[str, List[str]]]] = {}
+
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def record(self, key: str, topic: str, filters: Optional[Dict[str, Any]]) -> float:
+        """Count one request for a key and return its new estimate."""
+        indexes = self._indexes(key)
+        for row, col in enumerate(indexes):
+            self._table[row][col] += 1.0
+        estimate = min(self._table[row][col] for row, col in enumerate(indexes))
+
+        if key not in self._candidates:
+            self._candidates[key] = (topic.strip(), normalize_filters(filters))
+            if len(self._candidates) > self.max_candidates:
+                coldest = min(self._candidates, key=self.estimate)
+                del self._candidates[coldest]
+        return estimate
+
+    def estimate(self, key: str) -> float:
+        return min(self._table[row][col] for row, col in enumerate(self._indexes(key)))
+
+    def decay(self, factor: float) -> None:
+        """Scale every counter by ``factor`` (0 < factor <= 1)."""
+        for row in self._table:
+            for col in range(self.width):
+                row[col] *= factor
+
+    def top(self, k: int, min_hits: float = 0.0) -> List[Tuple[str, str, Dict[str, List[str]], float]]:
+        """Return up to k (key, topic, filters, estimate) tuples, hottest first."""
+        ranked = sorted(
+            ((key, topic, filters, self.estimate(key)) for key, (topic, filters) in self._candidates.items()),
+            key=lambda item: item[3],
+            reverse=True,
+        )
+        return [item for item in ranked if item[3] >= min_hits][:k]
+
+
+class PrefetchScheduler:
+    """
+    Background task that keeps hot topics warm in the recommendation cache.
+
+    On every tick it decays the popularity counts, then — only while no foreground
+    agent runs are active and the hourly refresh budget is not spent — re-runs the
+    agent for the hottest keys that are missing from the cache or about to expire.
+    Refreshes run one at a time, each in an agent admission slot taken without
+    queuing, so they never compete with user requests.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, Dict[str, Any]], Awaitable[List[CourseDetails]]],
+        cache: RecommendationCache,
+        tracker: Optional[PopularityTracker] = None,
+    ):
+        self.fetch = fetch
+        self.cache = cache
+        self.tracker = tracker or PopularityTracker(max_candidates=settings.PREFETCH_TOP_K * 4)
+        self._active = 0
+        self._refreshes: deque = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._last_decay = time.monotonic()
+
+    def record(self, topic: str, filters: Optional[Dict[str, Any]]) -> None:
+        """Count a user request for a topic + filter combination."""
+        self.tracker.record(make_cache_key(topic, filters), topic, filters)
+
+    @contextmanager
+    def foreground(self):
+        """Mark a user-facing agent run as in progress (prefetch backs off meanwhile)."""
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+
+    def is_idle(self) -> bool:
+        if agent_admission.active or agent_admission.waiting:
+            return False
+        return self._active <= settings.PREFETCH_IDLE_MAX_ACTIVE
+
+    def _budget_left(self) -> int:
+        cutoff = time.monotonic() - 3600
+        while self._refreshes and self._refreshes[0] < cutoff:
+            self._refreshes.popleft()
+        return settings.PREFETCH_MAX_REFRESHES_PER_HOUR - len(self._refreshes)
+
+    def _apply_decay(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_decay
+        self._last_decay = now
+        if settings.PREFETCH_HALF_LIFE_SECONDS > 0 and elapsed > 0:
+            self.tracker.decay(0.5 ** (elapsed / settings.PREFETCH_HALF_LIFE_SECONDS))
+
+    async def run_once(self) -> int:
+        """Run one prefetch pass and return how many keys were refreshed."""
+        self._apply_decay()
+        refreshed = 0
+        for key, topic, filters, hits in self.tracker.top(settings.PREFETCH_TOP_K, settings.PREFETCH_MIN_HITS):
+            if not self.is_idle() or self._budget_left() <= 0:
+                break
+            expires_in = self.cache.expires_in(key)
+            if expires_in is not None and expires_in > settings.PREFETCH_REFRESH_AHEAD_SECONDS:
+                continue
+            stale = self.cache.get_stale(key)
+            if stale is not None and stale.source == "catalog":
+                # Catalog-backed topics are cheap to rebuild on demand: keep the LLM budget
+                continue
+
+            self._refreshes.append(time.monotonic())
+            try:
+                results = await self.fetch(topic, filters)
+            except AdmissionRejected:
+                # A user request took the slot first: give the budget back and wait for the next tick
+                self._refreshes.pop()
+                break
+            except Exception as e:
+                logger.warning("Prefetch failed for '%s': %s", topic, e)
+                continue
+            if results:
+                self.cache.set(key, topic, filters, results)
+                refreshed += 1
+                logger.info("Prefetched '%s' (%.1f recent hits, %s courses)", topic, hits, len(results))
+            # Yield between refreshes so user requests always get the loop first
+            await asyncio.sleep(0)
+        return refreshed
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PREFETCH_INTERVAL_SECONDS)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Prefetch pass failed: %s", e)
+
+    def start(self) -> None:
+        if settings.PREFETCH_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Prefetch scheduler started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def _fetch_recommendations(topic: str, filters: Dict[str, Any]) -> List[CourseDetails]:
+    # Imported lazily so the scheduler does not pull in the agent stack at import time
+    from app.utils.llm_agent import run_cohere_agent_for_recommendations
+    # Never queue for a slot: AdmissionRejected makes the scheduler skip this pass
+    async with agent_admission.try_slot():
+        return await run_cohere_agent_for_recommendations(topic, filters)
+
+
+prefetch_scheduler = PrefetchScheduler(fetch=_fetch_recommendations, cache=recommendation_cache)
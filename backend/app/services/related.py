@@ -0,0 +1,193 @@
+import time
+import heapq
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from app.config import settings
+from app.utils.course_utils import normalize_url
+from app.utils.serialization import COURSE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+_URL = COURSE_FIELDS.index("url")
+
+# Course URLs remembered per topic for the overlap signal
+_MAX_URLS_PER_TOPIC = 50
+# A URL in more result sets than this (a catch-all course) says little about relatedness;
+# it is no longer indexed for further topics, which also bounds the work per update
+_MAX_TOPICS_PER_URL = 100
+
+# Weight of a full course overlap (Jaccard 1.0) relative to one shared session
+OVERLAP_WEIGHT = 3.0
+
+
+def _topic_key(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+class RelatedTopicsGraph:
+    """
+    Weighted graph over topics that returned courses, with each topic's top-k
+    neighbours precomputed so a lookup is a dict read.
+
+    Two signals make an edge: topics searched one after another in the same client
+    session (co-occurrence count), and course overlap between the topics' result
+    sets (Jaccard over normalized URLs, found through a URL -> topics index). Every
+    recorded search updates only the edges it touches and re-ranks only the topics
+    at their ends. When the graph is full, the least recently searched topic and its
+    edges are dropped.
+    """
+
+    def __init__(self, max_topics: int, top_k: int, session_window: int,
+                 max_sessions: int, session_ttl_seconds: float):
+        self.max_topics = max_topics
+        self.top_k = top_k
+        self.session_window = session_window
+        self.max_sessions = max_sessions
+        self.session_ttl_seconds = session_ttl_seconds
+        # Topic key -> display text, least recently searched first
+        self._topics: "OrderedDict[str, str]" = OrderedDict()
+        self._urls: Dict[str, Set[str]] = {}
+        # Hash of the raw URL list each topic's overlap was computed from
+        self._url_hashes: Dict[str, int] = {}
+        self._url_topics: Dict[str, Set[str]] = {}
+        self._cooccur: Dict[str, Counter] = {}
+        self._overlap: Dict[str, Dict[str, float]] = {}
+        self._neighbors: Dict[str, List[Tuple[str, float]]] = {}
+        # Session id -> (last seen, recent topic keys)
+        self._sessions: "OrderedDict[str, Tuple[float, deque]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record_search(self, topic: str, rows: List[list], session_id: Optional[str] = None) -> None:
+        """Add a search that returned ``rows`` (packed courses) to the graph."""
+        key = _topic_key(topic)
+        if not key or not rows:
+            return
+        raw_urls = tuple(row[_URL] for row in rows[:_MAX_URLS_PER_TOPIC])
+        url_hash = hash(raw_urls)
+        with self._lock:
+            if key not in self._topics and len(self._topics) >= self.max_topics:
+                self._evict(next(iter(self._topics)))
+            self._topics[key] = topic.strip()
+            self._topics.move_to_end(key)
+            changed: Set[str] = set()
+            # Repeat searches usually return the same result set: skip the overlap work
+            if self._url_hashes.get(key) != url_hash:
+                self._url_hashes[key] = url_hash
+                changed |= self._update_overlap(key, {normalize_url(url) for url in raw_urls})
+            if session_id:
+                changed |= self._update_sessions(key, session_id)
+            if changed:
+                self._rank(key)
+            for other in changed:
+                self._offer(other, key)
+
+    def related(self, topic: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            neighbors = self._neighbors.get(_topic_key(topic), [])[:limit]
+            return [{"topic": self._topics[key], "score": round(score, 3)} for key, score in neighbors]
+
+    def _update_overlap(self, key: str, urls: Set[str]) -> Set[str]:
+        old = self._urls.get(key, set())
+        for url in old - urls:
+            holders = self._url_topics.get(url)
+            if holders is not None:
+                holders.discard(key)
+                if not holders:
+                    del self._url_topics[url]
+        for url in urls - old:
+            holders = self._url_topics.setdefault(url, set())
+            if len(holders) < _MAX_TOPICS_PER_URL:
+                holders.add(key)
+        self._urls[key] = urls
+
+        shared = Counter(other for url in urls for other in self._url_topics.get(url, ()) if other != key)
+        previous = set(self._overlap.get(key, {}))
+        for other in previous - set(shared):
+            self._set_overlap(key, other, 0.0)
+        for other, common in shared.items():
+            union = len(urls) + len(self._urls[other]) - common
+            self._set_overlap(key, other, common / union)
+        return previous | set(shared)
+
+    def _set_overlap(self, a: str, b: str, value: float) -> None:
+        for x, y in ((a, b), (b, a)):
+            if value > 0:
+                self._overlap.setdefault(x, {})[y] = value
+            elif x in self._overlap:
+                self._overlap[x].pop(y, None)
+
+    def _update_sessions(self, key: str, session_id: str) -> Set[str]:
+        now = time.time()
+        last_seen, recent = self._sessions.pop(session_id, (now, None))
+        if recent is None or now - last_seen > self.session_ttl_seconds:
+            recent = deque(maxlen=self.session_window)
+        changed: Set[str] = set()
+        # Repeating a topic within a session does not count its pairs again
+        if key not in recent:
+            for other in recent:
+                if other in self._topics:
+                    self._cooccur.setdefault(key, Counter())[other] += 1
+                    self._cooccur.setdefault(other, Counter())[key] += 1
+                    changed.add(other)
+            recent.append(key)
+        self._sessions[session_id] = (now, recent)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return changed
+
+    def _evict(self, key: str) -> None:
+        """Remove a topic and its edges, re-ranking the topics that listed it."""
+        del self._topics[key]
+        self._neighbors.pop(key, None)
+        self._url_hashes.pop(key, None)
+        for url in self._urls.pop(key, set()):
+            holders = self._url_topics.get(url)
+            if holders is not None:
+                holders.discard(key)
+                if not holders:
+                    del self._url_topics[url]
+        for other in set(self._overlap.pop(key, {})) | set(self._cooccur.pop(key, {})):
+            self._overlap.get(other, {}).pop(key, None)
+            self._cooccur.get(other, Counter()).pop(key, None)
+            if any(neighbor == key for neighbor, _ in self._neighbors.get(other, [])):
+                self._rank(other)
+
+    def _score(self, a: str, b: str) -> float:
+        return self._cooccur.get(a, Counter()).get(b, 0) + OVERLAP_WEIGHT * self._overlap.get(a, {}).get(b, 0.0)
+
+    def _rank(self, key: str) -> None:
+        """Recompute a topic's top-k list from all of its edges."""
+        others = set(self._overlap.get(key, {})) | set(self._cooccur.get(key, {}))
+        scores = ((other, self._score(key, other)) for other in others)
+        self._neighbors[key] = heapq.nlargest(self.top_k, scores, key=lambda item: item[1])
+
+    def _offer(self, key: str, other: str) -> None:
+        """Update ``key``'s top-k list after its edge to ``other`` changed."""
+        if key not in self._topics:
+            return
+        score = self._score(key, other)
+        neighbors = self._neighbors.get(key, [])
+        current = next((s for n, s in neighbors if n == other), None)
+        if current is not None and score < current:
+            # A listed edge got weaker: something outside the list may now rank higher
+            self._rank(key)
+            return
+        if current is None and len(neighbors) >= self.top_k and score <= neighbors[-1][1]:
+            return
+        if score <= 0:
+            return
+        neighbors = [(n, s) for n, s in neighbors if n != other] + [(other, score)]
+        neighbors.sort(key=lambda item: item[1], reverse=True)
+        self._neighbors[key] = neighbors[:self.top_k]
+
+
+related_topics = RelatedTopicsGraph(
+    max_topics=settings.RELATED_MAX_TOPICS,
+    top_k=settings.RELATED_TOP_K,
+    session_window=settings.RELATED_SESSION_WINDOW,
+    max_sessions=settings.RELATED_MAX_SESSIONS,
+    session_ttl_seconds=settings.RELATED_SESSION_TTL_SECONDS,
+)
@@ -0,0 +1,220 @@
+import json
+import time
+import hashlib
+import logging
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import List, Dict, Any, Optional
+
+from app.models.schemas import CourseDetails
+from app.config import settings
+from app.services.cache_backends import CacheBackend, create_backend, encode_value, decode_value
+from app.utils.serialization import pack_courses, unpack_courses
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Return a canonical copy of the filter dict (stable keys, sorted values)."""
+    normalized: Dict[str, List[str]] = {}
+    for name in ("level", "pricing", "provider", "duration"):
+        values = (filters or {}).get(name) or []
+        normalized[name] = sorted({str(v).strip() for v in values if str(v).strip()})
+    return normalized
+
+
+def make_cache_key(topic: str, filters: Optional[Dict[str, Any]]) -> str:
+    """Build the cache key for a topic + filter combination."""
+    topic_key = " ".join(topic.lower().split())
+    filter_key = json.dumps(normalize_filters(filters), sort_keys=True, separators=(",", ":"))
+    return f"{topic_key}|{filter_key}"
+
+
+def compute_etag(rows: List[list]) -> str:
+    """Quoted content hash of the packed result list (the basis of the page ETags)."""
+    raw = json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached recommendation result set. Courses stay packed until ``results`` is
+    first read, so conditional requests can be answered from the ETag alone.
+
+    The rows double as the candidate pool that later result pages are cut from;
+    ``search_start`` is the next Google CSE page to read when the pool runs out.
+    ``source`` records where the pool came from ("agent" or "catalog"), which
+    decides how it is extended.
+    """
+    topic: str
+    filters: Dict[str, List[str]]
+    rows: List[list]
+    stored_at: float = field(default_factory=time.time)
+    etag: str = ""
+    search_start: int = 1
+    exhausted: bool = False
+    source: str = "agent"
+
+    @cached_property
+    def results(self) -> List[CourseDetails]:
+        return unpack_courses(self.rows)
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def expires_in(self, ttl_seconds: float) -> float:
+        return ttl_seconds - self.age()
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return self.expires_in(ttl_seconds) > 0
+
+
+class RecommendationCache:
+    """
+    Recommendation results keyed by topic + filters, stored in a pluggable backend
+    so that every worker sharing the backend sees the same entries.
+    """
+
+    namespace = "rec:"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int, stale_seconds: int = 0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+
+    def _load(self, key: str) -> Optional[CacheEntry]:
+        payload = decode_value(self.backend.get(self.namespace + key))
+        if not payload:
+            return None
+        try:
+            return CacheEntry(
+                topic=payload["topic"],
+                filters=payload["filters"],
+                rows=payload["results"],
+                stored_at=payload["stored_at"],
+                etag=payload.get("etag") or compute_etag(payload["results"]),
+                search_start=payload.get("search_start", 1),
+                exhausted=payload.get("exhausted", False),
+                source=payload.get("source", "agent"),
+            )
+        except Exception as e:
+            logger.warning("Discarding malformed cache entry for '%s': %s", key, e)
+            return None
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the fresh entry for a key, or None on a miss."""
+        entry = self._load(key)
+        if entry is None or not entry.is_fresh(self.ttl_seconds):
+            return None
+        return entry
+
+    def get_stale(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for a key even if past its TTL (last known good result)."""
+        return self._load(key)
+
+    def set(self, key: str, topic: str, filters: Optional[Dict[str, Any]], results: List[CourseDetails],
+            search_start: int = 1, exhausted: bool = False, source: str = "agent") -> CacheEntry:
+        """Store a fresh result set for the configured TTL."""
+        return self._store(key, CacheEntry(
+            topic=topic,
+            filters=normalize_filters(filters),
+            rows=pack_courses(results),
+            search_start=search_start,
+            exhausted=exhausted,
+            source=source,
+        ))
+
+    def extend(self, key: str, entry: CacheEntry, more: List[CourseDetails],
+               search_start: int, exhausted: bool) -> CacheEntry:
+        """Append newly found candidates to an entry without resetting its expiry."""
+        return self._store(key, CacheEntry(
+            topic=entry.topic,
+            filters=entry.filters,
+            rows=entry.rows + pack_courses(more),
+            stored_at=entry.stored_at,
+            search_start=search_start,
+            exhausted=exhausted,
+            source=entry.source,
+        ))
+
+    def _store(self, key: str, entry: CacheEntry) -> CacheEntry:
+        entry.etag = compute_etag(entry.rows)
+        payload = {
+            "topic": entry.topic,
+            "filters": entry.filters,
+            "results": entry.rows,
+            "stored_at": entry.stored_at,
+            "etag": entry.etag,
+            "search_start": entry.search_start,
+            "exhausted": entry.exhausted,
+            "source": entry.source,
+        }
+        # Keep the entry around past its TTL so it can still be served as a stale fallback
+        ttl = entry.expires_in(self.ttl_seconds) + self.stale_seconds
+        if ttl > 0:
+            self.backend.set(self.namespace + key, encode_value(payload), ttl)
+        return entry
+
+    def expires_in(self, key: str) -> Optional[float]:
+        """Seconds until the entry for a key expires, or None if it is not cached."""
+        entry = self._load(key)
+        if entry is None:
+            return None
+        return entry.expires_in(self.ttl_seconds)
+
+
+# False while running work whose search results must not reach the shared cache (shadow variants)
+_search_cache_writes: contextvars.ContextVar[bool] = contextvars.ContextVar("search_cache_writes", default=True)
+
+
+@contextmanager
+def search_cache_read_only():
+    """Serve search_cache hits as usual but drop every write made in this context."""
+    token = _search_cache_writes.set(False)
+    try:
+        yield
+    finally:
+        _search_cache_writes.reset(token)
+
+
+class SearchCache:
+    """Raw Google CSE result items keyed by query, shared through the same backend."""
+
+    namespace = "search:"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def make_key(query: str, num: int, start: int = 1) -> str:
+        return f"{' '.join(query.lower().split())}|{num}|{start}"
+
+    def get(self, query: str, num: int, start: int = 1) -> Optional[List[Dict[str, str]]]:
+        rows = decode_value(self.backend.get(self.namespace + self.make_key(query, num, start)))
+        if rows is None:
+            return None
+        return [{"title": t, "link": l, "snippet": s} for t, l, s in rows]
+
+    def set(self, query: str, num: int, items: List[Dict[str, Any]], start: int = 1) -> None:
+        if not _search_cache_writes.get():
+            return
+        rows = [[i.get("title", ""), i.get("link", ""), i.get("snippet", "")] for i in items]
+        self.backend.set(self.namespace + self.make_key(query, num, start), encode_value(rows), self.ttl_seconds)
+
+
+cache_backend = create_backend(settings.CACHE_BACKEND_URL, max_entries=settings.RESULT_CACHE_MAX_ENTRIES)
+
+recommendation_cache = RecommendationCache(
+    backend=cache_backend,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    stale_seconds=settings.RESULT_CACHE_STALE_SECONDS,
+)
+
+search_cache = SearchCache(
+    backend=cache_backend,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+)
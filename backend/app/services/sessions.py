@@ -0,0 +1,64 @@
+import time
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.config import settings
+from app.services.cache_backends import CacheBackend, encode_value, decode_value
+from app.services.result_cache import cache_backend
+
+logger = logging.getLogger(__name__)
+
+
+def make_result_id(rows: List[list]) -> str:
+    """Content-derived id: the same result list always maps to the same session."""
+    digest = hashlib.blake2b(encode_value(rows), digest_size=12).hexdigest()
+    return f"r_{digest}"
+
+
+@dataclass
+class ResultSession:
+    """A result list the client can refer to by id instead of re-uploading it."""
+    result_id: str
+    topic: str
+    rows: List[list]
+    created_at: float
+
+
+class ResultSessionStore:
+    """
+    Server-side result sessions kept in the shared cache backend, so any worker can
+    resolve an id. Entries expire after ``ttl_seconds``; the memory backend is also
+    bounded by its LRU size.
+    """
+
+    namespace = "session:"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    def save(self, topic: str, rows: List[list]) -> str:
+        """Store already-validated course rows and return their result id."""
+        result_id = make_result_id(rows)
+        payload = {"topic": topic, "rows": rows, "created_at": time.time()}
+        self.backend.set(self.namespace + result_id, encode_value(payload), self.ttl_seconds)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[ResultSession]:
+        payload = decode_value(self.backend.get(self.namespace + result_id))
+        if not payload:
+            return None
+        return ResultSession(
+            result_id=result_id,
+            topic=payload["topic"],
+            rows=payload["rows"],
+            created_at=payload["created_at"],
+        )
+
+
+result_sessions = ResultSessionStore(
+    backend=cache_backend,
+    ttl_seconds=settings.RESULT_SESSION_TTL_SECONDS,
+)
@@ -0,0 +1,257 @@
+import time
+import random
+import asyncio
+import logging
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from app.models.schemas import CourseDetails
+from app.config import settings
+from app.services.result_cache import search_cache_read_only
+from app.utils.admission import AdmissionRejected, agent_admission
+from app.utils.course_utils import normalize_url
+from app.utils.llm_agent import AgentBudget, fetch_additional_courses, run_cohere_agent_for_recommendations
+from app.utils.profiling import active_profile
+from app.utils.resilience import BreakerScope, isolated_breakers
+from app.utils.tracing import RequestTrace, active_trace, trace_store, use_trace
+
+logger = logging.getLogger(__name__)
+
+# A pipeline variant: (topic, filters, limit) -> courses, like run_cohere_agent_for_recommendations
+ShadowVariant = Callable[[str, Dict[str, Any], int], Awaitable[List[CourseDetails]]]
+
+
+def _trace_tokens(trace: Optional[RequestTrace]) -> int:
+    if trace is None:
+        return 0
+    return trace.counters["prompt_tokens"] + trace.counters["completion_tokens"]
+
+
+@dataclass
+class PrimaryRun:
+    """Latency / token baseline of the production pipeline for one request."""
+    started: float = field(default_factory=time.monotonic)
+    tokens_before: int = field(default_factory=lambda: _trace_tokens(active_trace.get()))
+    latency_ms: float = 0.0
+    tokens: int = 0
+
+    def finish(self) -> "PrimaryRun":
+        self.latency_ms = (time.monotonic() - self.started) * 1000
+        self.tokens = _trace_tokens(active_trace.get()) - self.tokens_before
+        return self
+
+
+@dataclass
+class ShadowComparison:
+    """One primary / variant pair for the same request."""
+    topic: str
+    latency_ms: float
+    primary_latency_ms: float
+    tokens: int
+    primary_tokens: int
+    results: int
+    primary_results: int
+    # Jaccard similarity of the two result sets, by normalized URL
+    overlap: float
+    # Share of the primary's courses the variant also found
+    recall: float
+    trace_id: str
+    error: Optional[str] = None
+
+
+def compare_results(primary: List[CourseDetails], variant: List[CourseDetails]) -> Dict[str, float]:
+    """Overlap of two result lists by normalized URL: Jaccard similarity and recall of the primary."""
+    primary_urls = {normalize_url(c.url) for c in primary}
+    variant_urls = {normalize_url(c.url) for c in variant}
+    union = primary_urls | variant_urls
+    shared = primary_urls & variant_urls
+    return {
+        "overlap": len(shared) / len(union) if union else 1.0,
+        "recall": len(shared) / len(primary_urls) if primary_urls else 1.0,
+    }
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(pct * len(ordered)))], 1)
+
+
+class ShadowRunner:
+    """
+    Runs alternative pipelines alongside production without affecting responses.
+
+    A sampled share of agent-backed /api/recommend requests is replayed against
+    every enabled variant in a background task, after the user's result is known.
+    Each run gets its own trace (so its model / tool calls and tokens are counted
+    separately) and is compared with the primary on latency, tokens and URL overlap.
+    Variants never write to the result or search cache and go through their own
+    circuit breakers, so a failing variant cannot trip the breakers live traffic
+    uses. Each run takes an agent admission slot without queuing: it is skipped
+    when none is free or user requests are waiting for one.
+    """
+
+    def __init__(self, sample_rate: float, max_concurrent: int, window: int, timeout_seconds: float):
+        self.sample_rate = sample_rate
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout_seconds = timeout_seconds
+        self._variants: Dict[str, ShadowVariant] = {}
+        self._enabled: List[str] = []
+        self._window = window
+        self._comparisons: Dict[str, deque] = {}
+        self._skipped = 0
+        self._tasks: set = set()
+        self._breakers = BreakerScope("shadow")
+
+    def register(self, name: str, variant: ShadowVariant) -> None:
+        """Make a variant available; it only runs once listed in SHADOW_VARIANTS (or enable())."""
+        self._variants[name] = variant
+
+    def enable(self, names: List[str]) -> None:
+        unknown = [name for name in names if name not in self._variants]
+        for name in unknown:
+            logger.warning("Unknown shadow variant '%s' ignored", name)
+        self._enabled = [name for name in names if name in self._variants]
+
+    @property
+    def active(self) -> int:
+        return len(self._tasks)
+
+    def start_primary(self) -> PrimaryRun:
+        """Call right before the production pipeline runs; pass the result to submit()."""
+        return PrimaryRun()
+
+    def submit(self, primary: PrimaryRun, topic: str, filters: Dict[str, Any], limit: int,
+               primary_results: List[CourseDetails]) -> bool:
+        """Maybe replay this request against the enabled variants. Never blocks or raises."""
+        if not self._enabled or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        primary.finish()
+        if len(self._tasks) >= self.max_concurrent or agent_admission.waiting > 0:
+            self._skipped += 1
+            return False
+        for name in self._enabled:
+            task = asyncio.create_task(self._run(name, primary, topic, filters, limit, primary_results))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, name: str, primary: PrimaryRun, topic: str, filters: Dict[str, Any], limit: int,
+                   primary_results: List[CourseDetails]) -> None:
+        try:
+            async with agent_admission.try_slot():
+                comparison = await self._compare(name, primary, topic, filters, limit, primary_results)
+        except AdmissionRejected:
+            self._skipped += 1
+            return
+        self._comparisons.setdefault(name, deque(maxlen=self._window)).append(comparison)
+        logger.info(
+            "Shadow '%s' for '%s': %.0f ms vs %.0f ms, overlap %.2f%s",
+            name, topic, comparison.latency_ms, comparison.primary_latency_ms, comparison.overlap,
+            f" (error: {comparison.error})" if comparison.error else "",
+            extra={"sampled": True},
+        )
+
+    async def _compare(self, name: str, primary: PrimaryRun, topic: str, filters: Dict[str, Any], limit: int,
+                       primary_results: List[CourseDetails]) -> ShadowComparison:
+        # A separate trace keeps the variant's calls out of the user request's trace and profile
+        trace = RequestTrace(f"shadow {name}", {"shadow.variant": name, "topic": topic})
+        active_profile.set(None)
+        started = time.monotonic()
+        results: List[CourseDetails] = []
+        error: Optional[str] = None
+        try:
+            with use_trace(trace), isolated_breakers(self._breakers), search_cache_read_only():
+                results = await asyncio.wait_for(self._variants[name](topic, filters, limit), self.timeout_seconds)
+            results = results[:limit]
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            trace.finish()
+            trace_store.add(trace)
+
+        return ShadowComparison(
+            topic=topic,
+            latency_ms=(time.monotonic() - started) * 1000,
+            primary_latency_ms=primary.latency_ms,
+            tokens=_trace_tokens(trace),
+            primary_tokens=primary.tokens,
+            results=len(results),
+            primary_results=len(primary_results),
+            trace_id=trace.trace_id,
+            error=error,
+            **compare_results(primary_results, results),
+        )
+
+    async def stop(self) -> None:
+        """Cancel shadow runs still in flight (on shutdown)."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-variant aggregates over the most recent comparisons."""
+        variants = {}
+        for name in sorted(set(self._enabled) | set(self._comparisons)):
+            runs = list(self._comparisons.get(name, ()))
+            ok = [c for c in runs if c.error is None]
+            latencies = [c.latency_ms for c in ok]
+            primary_latencies = [c.primary_latency_ms for c in ok]
+            variants[name] = {
+                "enabled": name in self._enabled,
+                "runs": len(runs),
+                "errors": len(runs) - len(ok),
+                "latency_ms": {"p50": _percentile(latencies, 0.5), "p95": _percentile(latencies, 0.95)},
+                "primary_latency_ms": {
+                    "p50": _percentile(primary_latencies, 0.5),
+                    "p95": _percentile(primary_latencies, 0.95),
+                },
+                "mean_tokens": round(statistics.fmean(c.tokens for c in ok), 1) if ok else None,
+                "mean_primary_tokens": round(statistics.fmean(c.primary_tokens for c in ok), 1) if ok else None,
+                "mean_results": round(statistics.fmean(c.results for c in ok), 2) if ok else None,
+                "mean_overlap": round(statistics.fmean(c.overlap for c in ok), 3) if ok else None,
+                "mean_recall": round(statistics.fmean(c.recall for c in ok), 3) if ok else None,
+            }
+        return {
+            "sample_rate": self.sample_rate,
+            "active": self.active,
+            "skipped": self._skipped,
+            "variants": variants,
+        }
+
+    def recent(self, name: str, limit: int) -> List[ShadowComparison]:
+        return list(self._comparisons.get(name, ()))[-limit:][::-1]
+
+
+async def _direct_search_variant(topic: str, filters: Dict[str, Any], limit: int) -> List[CourseDetails]:
+    """Non-agent pipeline: read CSE result pages directly and build courses from them, no LLM."""
+    courses, _, _ = await fetch_additional_courses(topic, filters, 1, set(), limit)
+    return courses
+
+
+async def _lean_agent_variant(topic: str, filters: Dict[str, Any], limit: int) -> List[CourseDetails]:
+    """The production agent with roughly half the per-request budget."""
+    budget = AgentBudget(
+        max_turns=max(2, settings.AGENT_MAX_TURNS // 2),
+        max_tool_calls=max(1, settings.AGENT_MAX_TOOL_CALLS // 2),
+        max_tokens=settings.AGENT_MAX_TOKENS // 2,
+        deadline_seconds=settings.AGENT_DEADLINE_SECONDS / 2,
+    )
+    return await run_cohere_agent_for_recommendations(topic, filters, limit=limit, budget=budget)
+
+
+shadow_runner = ShadowRunner(
+    sample_rate=settings.SHADOW_SAMPLE_RATE,
+    max_concurrent=settings.SHADOW_MAX_CONCURRENT,
+    window=settings.SHADOW_WINDOW,
+    timeout_seconds=settings.AGENT_TIMEOUT_SECONDS,
+)
+shadow_runner.register("direct_search", _direct_search_variant)
+shadow_runner.register("lean_agent", _lean_agent_variant)
+shadow_runner.enable([name.strip() for name in settings.SHADOW_VARIANTS.split(",") if name.strip()])
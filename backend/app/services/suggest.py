@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.config import settings
+from app.services.catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_topic(text: str) -> str:
+    """Same normalization as the topic part of a result cache key, so a picked suggestion hits the cache."""
+    return " ".join(text.lower().split())
+
+
+@dataclass
+class _Topic:
+    text: str
+    successes: int = 0
+
+
+class PrefixIndex:
+    """
+    Sorted array of (key, entry id) pairs searched with bisect: every key starting
+    with a prefix sits in one contiguous run. Each entry is indexed under the start
+    of every word, so "learn" also finds "machine learning".
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _word_suffixes(text: str) -> List[str]:
+        words = text.split()
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def add(self, text: str, entry_id: int) -> None:
+        for key in self._word_suffixes(text):
+            insort(self._keys, (key, entry_id))
+
+    def bulk_load(self, items: List[Tuple[str, int]]) -> None:
+        """Replace the contents at once (one sort instead of one insort per key)."""
+        self._keys = sorted((key, entry_id) for text, entry_id in items for key in self._word_suffixes(text))
+
+    def remove(self, text: str, entry_id: int) -> None:
+        for key in self._word_suffixes(text):
+            i = bisect_left(self._keys, (key, entry_id))
+            if i < len(self._keys) and self._keys[i] == (key, entry_id):
+                del self._keys[i]
+
+    def search(self, prefix: str, max_scan: int) -> List[int]:
+        """Distinct ids of entries with a word run starting with ``prefix``, scanning at most ``max_scan`` keys."""
+        ids: List[int] = []
+        seen = set()
+        i = bisect_left(self._keys, (prefix,))
+        end = min(len(self._keys), i + max_scan)
+        while i < end and self._keys[i][0].startswith(prefix):
+            entry_id = self._keys[i][1]
+            if entry_id not in seen:
+                seen.add(entry_id)
+                ids.append(entry_id)
+            i += 1
+        return ids
+
+
+class TopicSuggester:
+    """
+    Autocomplete over topics that previously returned results, ranked by how often
+    they succeeded, followed by catalog course titles. Successful topics are added
+    as they happen; catalog titles are loaded once in the background.
+    """
+
+    def __init__(self, max_topics: int, max_catalog_titles: int, max_scan: int = 500):
+        self.max_topics = max_topics
+        self.max_catalog_titles = max_catalog_titles
+        self.max_scan = max_scan
+        self._topics: Dict[int, _Topic] = {}
+        self._topic_ids: Dict[str, int] = {}
+        self._topic_index = PrefixIndex()
+        self._titles: List[str] = []
+        self._title_index = PrefixIndex()
+        self._next_id = 0
+        # Answers per (prefix, limit), valid until the next change to the index
+        self._memo: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record_success(self, topic: str) -> None:
+        """Count a search for ``topic`` that returned courses."""
+        key = normalize_topic(topic)
+        if not key:
+            return
+        with self._lock:
+            topic_id = self._topic_ids.get(key)
+            if topic_id is None:
+                if len(self._topics) >= self.max_topics:
+                    self._evict_least_popular()
+                topic_id = self._next_id
+                self._next_id += 1
+                self._topic_ids[key] = topic_id
+                self._topics[topic_id] = _Topic(text=topic.strip())
+                self._topic_index.add(key, topic_id)
+            self._topics[topic_id].successes += 1
+            self._memo.clear()
+
+    def _evict_least_popular(self) -> None:
+        topic_id = min(self._topics, key=lambda i: self._topics[i].successes)
+        topic = self._topics.pop(topic_id)
+        key = normalize_topic(topic.text)
+        del self._topic_ids[key]
+        self._topic_index.remove(key, topic_id)
+
+    def load_catalog_titles(self) -> int:
+        catalog = get_catalog()
+        if catalog is None or self.max_catalog_titles <= 0:
+            return 0
+        try:
+            titles = list(dict.fromkeys(catalog.titles(self.max_catalog_titles)))
+        except Exception as e:
+            logger.warning("Could not load catalog titles for suggestions: %s", e)
+            return 0
+        index = PrefixIndex()
+        index.bulk_load([(normalize_topic(title), i) for i, title in enumerate(titles)])
+        with self._lock:
+            self._titles, self._title_index = titles, index
+            self._memo.clear()
+        logger.info("Loaded %s catalog titles for suggestions", len(titles))
+        return len(titles)
+
+    def suggest(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        key = normalize_topic(prefix)
+        if not key:
+            return []
+        with self._lock:
+            memoized = self._memo.get((key, limit))
+            if memoized is not None:
+                return memoized
+            topics = [self._topics[i] for i in self._topic_index.search(key, self.max_scan)]
+            topics.sort(key=lambda t: (-t.successes, len(t.text), t.text))
+            suggestions = [
+                {"text": t.text, "source": "topic", "popularity": t.successes} for t in topics[:limit]
+            ]
+            if len(suggestions) < limit:
+                taken = {normalize_topic(s["text"]) for s in suggestions}
+                # Title ids follow catalog rating order
+                titles = [self._titles[i] for i in sorted(self._title_index.search(key, self.max_scan))]
+                for title in titles:
+                    if len(suggestions) >= limit:
+                        break
+                    if normalize_topic(title) not in taken:
+                        taken.add(normalize_topic(title))
+                        suggestions.append({"text": title, "source": "catalog", "popularity": 0})
+            if len(self._memo) >= 4096:
+                self._memo.clear()
+            self._memo[(key, limit)] = suggestions
+        return suggestions
+
+    def start(self) -> None:
+        """Load catalog titles in the background; topic suggestions work meanwhile."""
+        if self._task is None:
+            self._task = asyncio.create_task(asyncio.to_thread(self.load_catalog_titles))
+
+
+topic_suggester = TopicSuggester(
+    max_topics=settings.SUGGEST_MAX_TOPICS,
+    max_catalog_titles=settings.SUGGEST_MAX_CATALOG_TITLES,
+)
@@ -0,0 +1,23 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.config import settings
+
+
+def admin_token_matches(token: Optional[str]) -> bool:
+    """Constant-time check of a caller-supplied token against ADMIN_TOKEN."""
+    return bool(settings.ADMIN_TOKEN and token) and hmac.compare_digest(token, settings.ADMIN_TOKEN)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency for diagnostic endpoints. Fails closed: without an
+    ADMIN_TOKEN the endpoints do not exist (404), and with one the
+    X-Admin-Token header must match (403 otherwise).
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not admin_token_matches(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """The server is at capacity for agent runs; the caller should retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Caps concurrent agent runs. Up to ``max_concurrent`` run at once; up to
+    ``max_queue`` more may wait, each for at most ``max_wait_seconds``. Anything
+    beyond that is rejected immediately instead of piling up until it times out.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._active = 0
+        self._waiting = 0
+        # Smoothed duration of a run, used to estimate Retry-After
+        self._avg_run_seconds = 10.0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def retry_after(self) -> float:
+        """Rough time until a slot frees up for a new caller."""
+        backlog = (self._waiting + 1) / self.max_concurrent
+        return max(1.0, backlog * self._avg_run_seconds)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        retry_after = self.retry_after()
+        logger.warning(
+            "Admission '%s' rejected a request (%s; %s active, %s waiting)",
+            self.name, reason, self._active, self._waiting,
+        )
+        return AdmissionRejected(f"Server is busy ({reason})", retry_after)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one agent-run slot for the duration of the block, or raise AdmissionRejected."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                raise self._reject("queue full")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait_seconds)
+            except asyncio.TimeoutError:
+                raise self._reject("queue wait exceeded") from None
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        async with self._held():
+            yield
+
+    @asynccontextmanager
+    async def try_slot(self):
+        """
+        Low-priority, non-blocking variant of slot() for background work: take a free
+        slot immediately, or raise AdmissionRejected without queuing. Never takes a
+        slot while anyone is waiting in slot(), so interactive callers keep priority.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self._semaphore.locked() or self._waiting:
+            raise AdmissionRejected("No free slot", self.retry_after())
+        await self._semaphore.acquire()
+        async with self._held():
+            yield
+
+    @asynccontextmanager
+    async def _held(self):
+        self._active += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * (time.monotonic() - started)
+
+
+agent_admission = AdmissionController(
+    "agent",
+    max_concurrent=settings.AGENT_MAX_CONCURRENT,
+    max_queue=settings.AGENT_MAX_QUEUE,
+    max_wait_seconds=settings.AGENT_MAX_QUEUE_WAIT_SECONDS,
+)
@@ -0,0 +1,175 @@
+import re
+import logging
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+
+from app.models.schemas import CourseDetails
+
+logger = logging.getLogger(__name__)
+
+
+def extract_provider_from_url(url: str) -> str:
+    """Extract provider name from URL domain."""
+    try:
+        parsed = urlparse(url)
+        domain = parsed.netloc.lower()
+        
+        # Remove www. prefix
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        
+        # Extract main domain (e.g., coursera.org -> coursera)
+        domain_parts = domain.split('.')
+        if len(domain_parts) >= 2:
+            main_domain = domain_parts[-2]  # Get second-to-last part (e.g., 'coursera' from 'coursera.org')
+        else:
+            main_domain = domain_parts[0] if domain_parts else domain
+        
+        # Map common domains to provider names
+        provider_map = {
+            'coursera': 'Coursera',
+            'edx': 'edX',
+            'udemy': 'Udemy',
+            'khan': 'Khan Academy',
+            'khanacademy': 'Khan Academy',
+            'udacity': 'Udacity',
+            'pluralsight': 'Pluralsight',
+            'linkedin': 'LinkedIn Learning',
+            'linkedinlearning': 'LinkedIn Learning',
+            'skillshare': 'Skillshare',
+            'codecademy': 'Codecademy',
+            'freecodecamp': 'freeCodeCamp',
+            'mit': 'MIT OpenCourseWare',
+            'youtube': 'YouTube',
+            'youtu': 'YouTube',
+        }
+        
+        # Check if domain matches any known provider
+        for key, value in provider_map.items():
+            if key in main_domain:
+                return value
+        
+        # If no match, capitalize the main domain
+        return main_domain.capitalize()
+    except Exception as e:
+        logger.warning("Error extracting provider from URL %s: %s", url, e)
+        return "Unknown"
+
+
+def normalize_url(url: str) -> str:
+    """Normalize URL for deduplication (lowercase host, strip trailing slash)."""
+    try:
+        parsed = urlparse(url)
+        netloc = parsed.netloc.lower()
+        path = parsed.path.rstrip("/")
+        normalized = parsed._replace(netloc=netloc, path=path).geturl()
+        return normalized
+    except Exception:
+        return url
+
+# Duration filter values, shortest first
+DURATION_BUCKETS = ("Short (< 4 weeks)", "Medium (4-12 weeks)", "Long (> 12 weeks)")
+
+
+def duration_bucket(duration: Optional[str]) -> Optional[str]:
+    """Roughly bucket duration into Short / Medium / Long."""
+    if not duration:
+        return None
+    d = duration.lower()
+    short, medium, long = DURATION_BUCKETS
+    # weeks
+    num_match = re.search(r"(\d+)", d)
+    num = int(num_match.group(1)) if num_match else None
+    if "week" in d:
+        if num is not None:
+            if num < 4:
+                return short
+            if num <= 12:
+                return medium
+            return long
+    if "month" in d:
+        return long
+    if "hour" in d or "hr" in d:
+        if num is not None:
+            if num < 20:
+                return short
+            if num < 60:
+                return medium
+            return long
+    return None
+
+# Course levels, easiest first
+LEVELS = ("beginner", "intermediate", "advanced")
+
+# Rough study hours per duration unit, for comparing "6 weeks" with "12 hours"
+_HOURS_PER_UNIT = {"min": 1 / 60, "hour": 1.0, "hr": 1.0, "day": 3.0, "week": 5.0, "wk": 5.0, "month": 20.0}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*(min|hour|hr|day|week|wk|month)[a-z]*")
+_PER_WEEK = re.compile(r"\s*(?:/|per\b|a\b)\s*(?:week|wk)")
+
+
+def level_rank(level: Optional[str]) -> Optional[int]:
+    """Index of a free-text level in LEVELS (0 = beginner), or None when it is unknown."""
+    if not level:
+        return None
+    lowered = level.lower()
+    for rank, name in enumerate(LEVELS):
+        if name in lowered:
+            return rank
+    if "intro" in lowered or "all" in lowered:
+        return 0
+    if "expert" in lowered:
+        return len(LEVELS) - 1
+    return None
+
+
+def duration_hours(duration: Optional[str]) -> Optional[float]:
+    """Estimate total study hours from a free-text duration ("6 weeks", "3 hours/week for 4 weeks")."""
+    if not duration:
+        return None
+    d = duration.lower()
+    parts = [(float(m.group(1)), m.group(2), m.end()) for m in _DURATION_PART.finditer(d)]
+    if not parts:
+        return None
+    weeks = next((num for num, unit, _ in parts if unit in ("week", "wk")), None)
+    for num, unit, end in parts:
+        # A weekly workload times the number of weeks
+        if unit in ("hour", "hr") and weeks is not None and _PER_WEEK.match(d, end):
+            return num * weeks
+    num, unit, _ = parts[0]
+    return num * _HOURS_PER_UNIT[unit]
+
+
+def filter_courses_by_constraints(courses: List[CourseDetails], filters: Optional[Dict[str, Any]]) -> List[CourseDetails]:
+    """Apply strict server-side filtering on the structured courses."""
+    if not filters:
+        return courses
+    level_filters = set(filters.get("level") or [])
+    pricing_filters = set(filters.get("pricing") or [])
+    provider_filters = set([p.lower() for p in (filters.get("provider") or [])])
+    duration_filters = set(filters.get("duration") or [])
+
+    filtered: List[CourseDetails] = []
+    for course in courses:
+        # Level
+        if level_filters and course.level:
+            if course.level.lower() not in level_filters:
+                continue
+        # Pricing (free/paid)
+        if pricing_filters:
+            label = "free"
+            if course.price and "free" not in course.price.lower():
+                label = "paid"
+            if label not in pricing_filters:
+                continue
+        # Provider
+        if provider_filters:
+            prov = (course.provider or "").lower()
+            if prov not in provider_filters:
+                continue
+        # Duration
+        if duration_filters:
+            bucket = duration_bucket(course.duration)
+            if bucket not in duration_filters:
+                continue
+        filtered.append(course)
+    return filtered
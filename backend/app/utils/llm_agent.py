@@ -1,11 +1,12 @@
 import os
+import time
 import logging
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 import asyncio
-from urllib.parse import urlparse
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 import sys
@@ -15,13 +16,26 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 # LangChain 0.2.x imports
 from langchain.agents import create_agent
 from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, BaseMessage
 from langchain_core.tools import BaseTool
 from googleapiclient.discovery import build
+import httplib2
 
 
 from app.models.schemas import CourseDetails
 from app.config import settings
+from app.services.result_cache import search_cache
+from app.utils.resilience import UpstreamUnavailable, call_abandoned, llm_breaker, search_breaker
+from app.utils.model_router import ModelRouter
+from app.utils.profiling import profiled, profile_call
+from app.utils.tracing import trace_span, agent_callbacks
+from app.utils.search_filters import SearchConstraints, compile_search_constraints, active_search_constraints
+from app.utils.course_utils import (
+    extract_provider_from_url,
+    normalize_url,
+    duration_bucket,
+    filter_courses_by_constraints,
+)
 
 
 class GoogleSearchTool(BaseTool):
@@ -36,18 +50,84 @@ class GoogleSearchTool(BaseTool):
     google_api_key: str
     google_cse_id: str
     
+    def search_items(self, query: str, start: int = 1, num: int = 10) -> List[Dict[str, str]]:
+        """Return raw CSE result items for one page (``start`` is 1-based)."""
+        # Serve repeated queries from the shared search cache
+        items = search_cache.get(query, num=num, start=start)
+        if items is None and call_abandoned():
+            # The agent run this search belongs to has timed out: spend no more CSE quota
+            return []
+        if items is None:
+            # Raises UpstreamUnavailable on timeout/error or while the breaker is open
+            items = search_breaker.call(self._fetch_page, query, start, num)
+            search_cache.set(query, num=num, items=items, start=start)
+        return items
+
+    def search_constrained(
+        self,
+        query: str,
+        constraints: Optional[SearchConstraints],
+        start: int = 1,
+        num: int = 10,
+        max_results: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Search with the request's filters pushed down: one query per provider site,
+        issued in parallel, with pricing/level keywords. Results are interleaved
+        across providers and deduplicated.
+        """
+        if constraints is None or constraints.is_empty():
+            return self.search_items(query, start, num)
+
+        queries = constraints.queries(query)
+        if len(queries) == 1:
+            pages = [self.search_items(queries[0], start, num)]
+        else:
+            def run(q: str):
+                try:
+                    return self.search_items(q, start, num)
+                except UpstreamUnavailable as e:
+                    return e
+
+            with ThreadPoolExecutor(max_workers=min(len(queries), settings.SEARCH_MAX_PARALLEL_QUERIES)) as pool:
+                outcomes = list(pool.map(profiled(run), queries))
+            pages = [o for o in outcomes if not isinstance(o, Exception)]
+            if not pages:
+                raise outcomes[0]
+
+        merged: List[Dict[str, str]] = []
+        seen = set()
+        for rank in range(max((len(p) for p in pages), default=0)):
+            for page in pages:
+                if rank < len(page):
+                    norm_url = normalize_url(page[rank].get("link", ""))
+                    if norm_url not in seen:
+                        seen.add(norm_url)
+                        merged.append(page[rank])
+        return merged[:max_results] if max_results else merged
+
+    def _fetch_page(self, query: str, start: int, num: int) -> List[Dict[str, str]]:
+        http = httplib2.Http(timeout=settings.SEARCH_TIMEOUT_SECONDS)
+        service = build("customsearch", "v1", developerKey=self.google_api_key, http=http)
+        result = service.cse().list(
+            q=query,
+            cx=self.google_cse_id,
+            num=num,
+            start=start
+        ).execute()
+        return result.get("items", [])
+
     def _run(self, query: str) -> str:
         """Execute the Google search."""
+        # Tool calls run on LangGraph's worker threads: profile them there too
+        return profile_call(self._search_and_format, query)
+
+    def _search_and_format(self, query: str) -> str:
         try:
-            service = build("customsearch", "v1", developerKey=self.google_api_key)
-            result = service.cse().list(
-                q=query,
-                cx=self.google_cse_id,
-                num=10
-            ).execute()
+            # Apply the current request's filters at the search level
+            items = self.search_constrained(query, active_search_constraints.get(), max_results=10)
             
             # Format results as a readable string
-            items = result.get("items", [])
             if not items:
                 return "No search results found."
             
@@ -59,13 +139,16 @@ class GoogleSearchTool(BaseTool):
                 formatted_results.append(f"Title: {title}\nURL: {link}\nDescription: {snippet}\n")
             
             return "\n".join(formatted_results)
+        except UpstreamUnavailable as e:
+            logger.warning("Google Search unavailable: %s", e)
+            return "Search is temporarily unavailable. Answer with the information you already have."
         except Exception as e:
-            logger.error(f"Google Search API error: {e}")
+            logger.error("Google Search API error: %s", e)
             return f"Error performing search: {str(e)}"
     
     async def _arun(self, query: str) -> str:
-        """Async version of the search."""
-        return self._run(query)
+        """Async version of the search: the blocking CSE calls run off the event loop."""
+        return await asyncio.to_thread(self._run, query)
 
 
 def initialize_search_tool():
@@ -83,174 +166,82 @@ def initialize_search_tool():
         return search_tool
 
     except Exception as e:
-        logger.error(f"Failed to initialize search tool: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("Failed to initialize search tool: %s", e)
         return None
 
 
-def initialize_agent_executor(tools: list):
+def _create_groq_model(name: str) -> ChatGroq:
+    return ChatGroq(
+        groq_api_key=settings.GROQ_API_KEY,
+        model=name,
+        temperature=0,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_retries=1
+    )
+
+
+def initialize_model_router() -> Optional[ModelRouter]:
+    if not settings.GROQ_API_KEY:
+        logger.warning("GROQ_API_KEY is not set. The agent will not be available.")
+        return None
+    router = ModelRouter.from_spec(
+        settings.MODEL_POOL,
+        _create_groq_model,
+        task_tiers={"search": settings.MODEL_TIER_SEARCH, "refine": settings.MODEL_TIER_REFINE},
+        max_attempts=settings.MODEL_MAX_ATTEMPTS,
+        explore_rate=settings.MODEL_EXPLORE_RATE,
+    )
+    logger.info("Model router initialized with %s", ", ".join(f"{m.name} ({m.tier})" for m in router.models))
+    return router
+
+
+def initialize_llm(router: Optional[ModelRouter], task: str = "search"):
+    """Chat model for one task: every call goes to the fastest healthy model of the task's tier."""
+    return router.chat_model(task) if router is not None else None
+
+
+def initialize_agent_executor(tools: list, llm=None):
     try:
-        if not settings.GROQ_API_KEY:
+        if llm is None:
             raise ValueError("GROQ_API_KEY is not set.")
 
-        llm = ChatGroq(
-            groq_api_key=settings.GROQ_API_KEY,
-            model="llama-3.1-8b-instant",
-            temperature=0
-        )
-
         # Create agent using LangChain 0.2.x API
         agent_graph = create_agent(
             model=llm,
             tools=tools,
-            debug=True,  # Equivalent to verbose=True
+            debug=settings.AGENT_DEBUG,  # Step-by-step graph output on stdout, for local debugging only
         )
 
         logger.info("Groq agent initialized successfully")
         return agent_graph
 
     except Exception as e:
-        logger.error(f"Failed to initialize agent: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("Failed to initialize agent: %s", e)
         return None
 
 
 tools = []
+model_router = None
+llm = None
+refine_llm = None
 agent_executor = None
+refine_executor = None
+search_tool = None
 
 try:
     search_tool = initialize_search_tool()
     if search_tool:
         tools = [search_tool]
 
-    agent_executor = initialize_agent_executor(tools)
+    model_router = initialize_model_router()
+    llm = initialize_llm(model_router, "search")
+    agent_executor = initialize_agent_executor(tools, llm)
+    # Refinement only reorders / filters a given list: it may use a different model tier
+    refine_llm = initialize_llm(model_router, "refine")
+    refine_executor = initialize_agent_executor(tools, refine_llm)
 
 except Exception as e:
-    logger.error(f"Global initialization failed. Some features may not work. Error: {e}")
-
-def extract_provider_from_url(url: str) -> str:
-    """Extract provider name from URL domain."""
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-        
-        # Remove www. prefix
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        
-        # Extract main domain (e.g., coursera.org -> coursera)
-        domain_parts = domain.split('.')
-        if len(domain_parts) >= 2:
-            main_domain = domain_parts[-2]  # Get second-to-last part (e.g., 'coursera' from 'coursera.org')
-        else:
-            main_domain = domain_parts[0] if domain_parts else domain
-        
-        # Map common domains to provider names
-        provider_map = {
-            'coursera': 'Coursera',
-            'edx': 'edX',
-            'udemy': 'Udemy',
-            'khan': 'Khan Academy',
-            'khanacademy': 'Khan Academy',
-            'udacity': 'Udacity',
-            'pluralsight': 'Pluralsight',
-            'linkedin': 'LinkedIn Learning',
-            'linkedinlearning': 'LinkedIn Learning',
-            'skillshare': 'Skillshare',
-            'codecademy': 'Codecademy',
-            'freecodecamp': 'freeCodeCamp',
-            'mit': 'MIT OpenCourseWare',
-            'youtube': 'YouTube',
-            'youtu': 'YouTube',
-        }
-        
-        # Check if domain matches any known provider
-        for key, value in provider_map.items():
-            if key in main_domain:
-                return value
-        
-        # If no match, capitalize the main domain
-        return main_domain.capitalize()
-    except Exception as e:
-        logger.warning(f"Error extracting provider from URL {url}: {e}")
-        return "Unknown"
-
-
-def normalize_url(url: str) -> str:
-    """Normalize URL for deduplication (lowercase host, strip trailing slash)."""
-    try:
-        parsed = urlparse(url)
-        netloc = parsed.netloc.lower()
-        path = parsed.path.rstrip("/")
-        normalized = parsed._replace(netloc=netloc, path=path).geturl()
-        return normalized
-    except Exception:
-        return url
-
-def duration_bucket(duration: Optional[str]) -> Optional[str]:
-    """Roughly bucket duration into Short / Medium / Long."""
-    if not duration:
-        return None
-    d = duration.lower()
-    # weeks
-    import re
-    num_match = re.search(r"(\d+)", d)
-    num = int(num_match.group(1)) if num_match else None
-    if "week" in d:
-        if num is not None:
-            if num < 4:
-                return "Short (< 4 weeks)"
-            if num <= 12:
-                return "Medium (4-12 weeks)"
-            return "Long (> 12 weeks)"
-    if "month" in d:
-        return "Long (> 12 weeks)"
-    if "hour" in d or "hr" in d:
-        if num is not None:
-            if num < 20:
-                return "Short (< 4 weeks)"
-            if num < 60:
-                return "Medium (4-12 weeks)"
-            return "Long (> 12 weeks)"
-    return None
-
-def filter_courses_by_constraints(courses: List[CourseDetails], filters: Optional[Dict[str, Any]]) -> List[CourseDetails]:
-    """Apply strict server-side filtering on the structured courses."""
-    if not filters:
-        return courses
-    level_filters = set(filters.get("level") or [])
-    pricing_filters = set(filters.get("pricing") or [])
-    provider_filters = set([p.lower() for p in (filters.get("provider") or [])])
-    duration_filters = set(filters.get("duration") or [])
-
-    filtered: List[CourseDetails] = []
-    for course in courses:
-        # Level
-        if level_filters and course.level:
-            if course.level.lower() not in level_filters:
-                continue
-        # Pricing (free/paid)
-        if pricing_filters:
-            label = "free"
-            if course.price and "free" not in course.price.lower():
-                label = "paid"
-            if label not in pricing_filters:
-                continue
-        # Provider
-        if provider_filters:
-            prov = (course.provider or "").lower()
-            if prov not in provider_filters:
-                continue
-        # Duration
-        if duration_filters:
-            bucket = duration_bucket(course.duration)
-            if bucket not in duration_filters:
-                continue
-        filtered.append(course)
-    return filtered
-
+    logger.error("Global initialization failed. Some features may not work. Error: %s", e)
 
 def parse_course_data(raw_text: str) -> List[CourseDetails]:
     """Parse raw text response into CourseDetails objects."""
@@ -298,7 +289,10 @@ def parse_course_data(raw_text: str) -> List[CourseDetails]:
                             agent_provider_lower not in extracted_provider_lower and
                             extracted_provider != "Unknown"):
                             # Provider mismatch - use URL-based provider
-                            logger.info(f"Provider mismatch for {url_str}: agent said '{agent_provider}', URL suggests '{extracted_provider}'. Using URL-based provider.")
+                            logger.debug(
+                                "Provider mismatch for %s: agent said '%s', URL suggests '%s'. Using URL-based provider.",
+                                url_str, agent_provider, extracted_provider, extra={"sampled": True},
+                            )
                             final_provider = extracted_provider
                         else:
                             final_provider = agent_provider
@@ -317,22 +311,177 @@ def parse_course_data(raw_text: str) -> List[CourseDetails]:
                     )
                     courses.append(course)
             except Exception as e:
-                logger.warning(f"Failed to parse course block: {e}")
+                logger.warning("Failed to parse course block: %s", e, extra={"sampled": True})
                 continue
                 
     except Exception as e:
-        logger.error(f"Error parsing course data: {e}")
+        logger.error("Error parsing course data: %s", e)
         
     return courses
 
+def _courses_from_agent_result(result: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> List[CourseDetails]:
+    """Parse the agent's final answer, clean up the courses and enforce the filters."""
+    # Extract the final message content from the result
+    # The result is a dict with "messages" key containing the conversation
+    messages = result.get("messages", [])
+    if messages:
+        # Get the last AI message which contains the final answer
+        final_message = messages[-1]
+        result_text = final_message.content if hasattr(final_message, 'content') else str(final_message)
+    else:
+        result_text = str(result)
+    
+    logger.debug("Raw agent response: %s...", result_text[:500])
+    
+    # Parse the response
+    with trace_span("agent.parse") as span:
+        courses = parse_course_data(result_text)
+        if span is not None:
+            span.attributes["courses"] = len(courses)
+
+    # Post-process: deduplicate, fix providers, normalize price labels
+    cleaned_courses: List[CourseDetails] = []
+    seen_urls = set()
+    for course in courses:
+        norm_url = normalize_url(str(course.url))
+        if norm_url in seen_urls:
+            continue
+        seen_urls.add(norm_url)
+
+        # Ensure provider matches URL domain
+        provider_from_url = extract_provider_from_url(str(course.url))
+        if provider_from_url and provider_from_url != "Unknown":
+            course.provider = provider_from_url
+
+        # Normalize price labeling for "Free"
+        if course.price:
+            price_lower = course.price.lower()
+            if "free" in price_lower:
+                course.price = "Free"
+
+        cleaned_courses.append(course)
+
+    # Enforce filters server-side
+    with trace_span("agent.filter", candidates=len(cleaned_courses)) as span:
+        filtered_courses = filter_courses_by_constraints(cleaned_courses, filters)
+        if span is not None:
+            span.attributes["courses"] = len(filtered_courses)
+    return filtered_courses
+
+
+@dataclass
+class AgentBudget:
+    """Per-request ceiling on agent work; see the AGENT_MAX_* settings."""
+    max_turns: int
+    max_tool_calls: int
+    max_tokens: int
+    deadline_seconds: float
+
+    @classmethod
+    def from_settings(cls) -> "AgentBudget":
+        return cls(
+            max_turns=settings.AGENT_MAX_TURNS,
+            max_tool_calls=settings.AGENT_MAX_TOOL_CALLS,
+            max_tokens=settings.AGENT_MAX_TOKENS,
+            deadline_seconds=settings.AGENT_DEADLINE_SECONDS,
+        )
+
+
+ANSWER_NOW_PROMPT = (
+    "You have run out of search budget. Do not call any more tools. Answer now using only "
+    "the search results above, in exactly the course format requested at the start."
+)
+
+
+def _budget_exceeded(messages: List[BaseMessage], budget: AgentBudget, deadline: float) -> Optional[str]:
+    """Name the budget the next agent step would exceed, or None if the run may continue."""
+    last = messages[-1] if messages else None
+    if isinstance(last, AIMessage) and not last.tool_calls:
+        return None  # Final answer: the graph ends on its own
+    if time.monotonic() >= deadline:
+        return "deadline"
+    ai_messages = [m for m in messages if isinstance(m, AIMessage)]
+    tokens = sum((m.usage_metadata or {}).get("total_tokens", 0) for m in ai_messages)
+    if tokens >= budget.max_tokens:
+        return "max_tokens"
+    if isinstance(last, ToolMessage) and len(ai_messages) >= budget.max_turns:
+        return "max_turns"
+    if isinstance(last, AIMessage):
+        tool_calls = sum(isinstance(m, ToolMessage) for m in messages)
+        if tool_calls + len(last.tool_calls) > budget.max_tool_calls:
+            return "max_tool_calls"
+    return None
+
+
+def _answer_now(messages: List[BaseMessage], config: Dict[str, Any], chat_model) -> List[BaseMessage]:
+    """Force a final, tool-free model turn on the conversation so far."""
+    history = list(messages)
+    # Tool calls that were never executed must not be sent back to the model
+    if history and isinstance(history[-1], AIMessage) and history[-1].tool_calls:
+        history.pop()
+    model = chat_model.bind_tools(tools, tool_choice="none") if tools else chat_model
+    final = model.invoke(history + [HumanMessage(content=ANSWER_NOW_PROMPT)], config=config)
+    return history + [final]
+
+
+def _run_agent_within_budget(
+    inputs: Dict[str, Any],
+    config: Dict[str, Any],
+    budget: AgentBudget,
+    target: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    task: str = "search"
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Stream the agent graph step by step instead of invoking it to completion.
+    Stops as soon as a model turn already contains ``target`` valid courses, and
+    when a budget runs out forces one final "answer now" turn. Once the caller has
+    given up (call_abandoned), it stops at the next step without another model call. Returns the final
+    state and the stop reason. ``task`` picks the search or refinement agent.
+    """
+    executor, model = (refine_executor, refine_llm) if task == "refine" else (agent_executor, llm)
+    deadline = time.monotonic() + budget.deadline_seconds
+    # All web_search calls of one model turn run in parallel on LangGraph's executor, in call order
+    config = {**config, "max_concurrency": settings.AGENT_MAX_TOOL_CONCURRENCY}
+    messages: List[BaseMessage] = list(inputs.get("messages", []))
+    for state in executor.stream(inputs, config=config, stream_mode="values"):
+        messages = state.get("messages", [])
+        if call_abandoned():
+            # The caller timed out and released its agent slot: no further model or tool calls
+            logger.info("Agent run abandoned by its caller; stopping")
+            return {"messages": messages}, "abandoned"
+        last = messages[-1] if messages else None
+        if target and isinstance(last, AIMessage) and last.tool_calls and last.content:
+            # The model listed courses but wants to keep searching: stop if the list is already enough
+            if len(_courses_from_agent_result({"messages": [last]}, filters)) >= target:
+                return {"messages": messages}, "enough_courses"
+        reason = _budget_exceeded(messages, budget, deadline)
+        if reason:
+            logger.info("Agent budget '%s' reached; requesting a final answer", reason)
+            return {"messages": _answer_now(messages, config, model)}, reason
+    return {"messages": messages}, "completed"
+
+
 async def run_cohere_agent_for_recommendations(
     topic: str,
-    filters: Optional[Dict[str, Any]] = None
+    filters: Optional[Dict[str, Any]] = None,
+    limit: int = 5,
+    budget: Optional[AgentBudget] = None
 ) -> List[CourseDetails]:
-    """Get course recommendations for a given topic."""
+    """
+    Get up to ``limit`` course recommendations for a given topic.
+    ``budget`` overrides the AGENT_MAX_* limits for this run.
+
+    Raises UpstreamUnavailable when Groq or Google CSE is failing, timing out or
+    tripped, so callers can tell an outage apart from "no courses found".
+    """
     if not agent_executor:
         logger.error("Agent not initialized. Check the logs for errors.")
         return []
+
+    # Fail fast instead of waiting on an upstream that is known to be down
+    llm_breaker.ensure_closed()
+    search_breaker.ensure_closed()
     
     try:
         # Clean and validate the topic
@@ -341,7 +490,7 @@ async def run_cohere_agent_for_recommendations(
             logger.warning("Empty topic provided")
             return []
             
-        logger.info(f"Starting course search for topic: {topic} with filters: {filters}")
+        logger.info("Starting course search for topic: %s with filters: %s", topic, filters)
         
         # Build filter constraints for the query
         filter_constraints = []
@@ -371,7 +520,7 @@ async def run_cohere_agent_for_recommendations(
         
         # Create a detailed query that explicitly requests all required fields
         query = f"""
-        Find 5 high-quality online courses about: {topic}{filter_text}
+        Find {limit} high-quality online courses about: {topic}{filter_text}
         
         For each course, you MUST provide ALL of the following information:
         1. Title - The full course title
@@ -404,69 +553,103 @@ async def run_cohere_agent_for_recommendations(
         - If information is not available, use "Not specified" or "Not available" as appropriate
         """
         
-        logger.debug(f"Executing agent with query: {query[:100]}...")
+        logger.debug("Executing agent with query: %s...", query[:100])
         
         try:
-            # Execute the agent using LangChain 0.2.x API
-            result = agent_executor.invoke({
-                "messages": [HumanMessage(content=query)]
-            })
-            
-            # Extract the final message content from the result
-            # The result is a dict with "messages" key containing the conversation
-            messages = result.get("messages", [])
-            if messages:
-                # Get the last AI message which contains the final answer
-                final_message = messages[-1]
-                result_text = final_message.content if hasattr(final_message, 'content') else str(final_message)
-            else:
-                result_text = str(result)
-            
-            logger.debug(f"Raw agent response: {result_text[:500]}...")
+            # Execute the agent off the event loop, bounded by a wall-clock timeout.
+            # The filters are pushed down into every web_search the agent issues.
+            constraints_token = active_search_constraints.set(compile_search_constraints(filters))
+            try:
+                with trace_span("agent.run", topic=topic, limit=limit) as span:
+                    result, stop_reason = await llm_breaker.call_async(
+                        _run_agent_within_budget,
+                        {"messages": [HumanMessage(content=query)]},
+                        {"callbacks": agent_callbacks()},
+                        budget or AgentBudget.from_settings(),
+                        target=limit,
+                        filters=filters,
+                        timeout=settings.AGENT_TIMEOUT_SECONDS,
+                    )
+                    if span is not None:
+                        span.attributes["agent.stop_reason"] = stop_reason
+            finally:
+                active_search_constraints.reset(constraints_token)
             
-            # Parse the response
-            courses = parse_course_data(result_text)
-
-            # Post-process: deduplicate, fix providers, normalize price labels
-            cleaned_courses: List[CourseDetails] = []
-            seen_urls = set()
-            for course in courses:
-                norm_url = normalize_url(str(course.url))
-                if norm_url in seen_urls:
-                    continue
-                seen_urls.add(norm_url)
-
-                # Ensure provider matches URL domain
-                provider_from_url = extract_provider_from_url(str(course.url))
-                if provider_from_url and provider_from_url != "Unknown":
-                    course.provider = provider_from_url
-
-                # Normalize price labeling for "Free"
-                if course.price:
-                    price_lower = course.price.lower()
-                    if "free" in price_lower:
-                        course.price = "Free"
-
-                cleaned_courses.append(course)
-
-            # Enforce filters server-side
-            filtered_courses = filter_courses_by_constraints(cleaned_courses, filters)
-
-            logger.info(f"Successfully parsed {len(filtered_courses)} courses after filtering")
+            # Parsing and filtering run as one synchronous step so it can be profiled
+            filtered_courses = profile_call(_courses_from_agent_result, result, filters)
+
+            logger.info("Successfully parsed %s courses after filtering", len(filtered_courses))
             
             return filtered_courses
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            logger.error(f"Error executing agent: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("Error executing agent: %s", e)
             return []
             
+    except UpstreamUnavailable as e:
+        logger.warning("Upstream unavailable for topic '%s': %s", topic, e)
+        raise
     except Exception as e:
-        logger.error(f"Error in run_cohere_agent_for_recommendations: {e}")
+        logger.error("Error in run_cohere_agent_for_recommendations: %s", e)
         return []
 
 
+# Google CSE never returns results past the 100th
+MAX_SEARCH_START = 91
+
+
+async def fetch_additional_courses(
+    topic: str,
+    filters: Optional[Dict[str, Any]],
+    start: int,
+    exclude_urls: set,
+    needed: int
+) -> Tuple[List[CourseDetails], int, bool]:
+    """
+    Extend a candidate set without another agent run by reading further CSE result
+    pages directly. Returns (new courses, next CSE start index, exhausted flag).
+    Raises UpstreamUnavailable if the search API is failing.
+    """
+    if not search_tool:
+        return [], start, True
+
+    query = f"{topic.strip()} online course"
+    constraints = compile_search_constraints(filters)
+    found: List[CourseDetails] = []
+    seen = set(exclude_urls)
+    while len(found) < needed:
+        if start > MAX_SEARCH_START:
+            return found, start, True
+        with trace_span("search.extend", start=start):
+            items = await asyncio.to_thread(profiled(search_tool.search_constrained), query, constraints, start)
+        start += 10
+        if not items:
+            return found, start, True
+
+        page: List[CourseDetails] = []
+        for item in items:
+            link = item.get("link", "")
+            norm_url = normalize_url(link)
+            if not link or norm_url in seen:
+                continue
+            seen.add(norm_url)
+            try:
+                page.append(CourseDetails(
+                    title=item.get("title", "").strip() or link,
+                    url=link,
+                    provider=extract_provider_from_url(link),
+                    description=item.get("snippet", "").strip(),
+                ))
+            except Exception as e:
+                logger.warning("Skipping search result %s: %s", link, e)
+        found.extend(filter_courses_by_constraints(page, filters))
+
+    logger.info("Fetched %s additional courses for '%s' (next start %s)", len(found), topic, start)
+    return found, start, False
+
+
 async def refine_recommendations(
     courses: List[CourseDetails],
     refinement_query: str
@@ -475,13 +658,15 @@ async def refine_recommendations(
     Refine course recommendations based on a user query.
     The agent receives the original search results and processes the refinement request.
     """
-    if not agent_executor:
+    if not refine_executor:
         logger.error("Agent not initialized. Check the logs for errors.")
         return []
     
     if not courses:
         logger.warning("No courses provided for refinement")
         return []
+
+    llm_breaker.ensure_closed()
     
     try:
         # Format the courses as a readable list for the agent
@@ -523,14 +708,22 @@ Description: {course.description}"""
         If no courses match, return an empty response.
         """
         
-        logger.info(f"Refining recommendations with query: {refinement_query}")
-        logger.debug(f"Executing agent with refinement query: {query[:200]}...")
+        logger.info("Refining recommendations with query: %s", refinement_query)
+        logger.debug("Executing agent with refinement query: %s...", query[:200])
         
         try:
-            # Execute the agent
-            result = agent_executor.invoke({
-                "messages": [HumanMessage(content=query)]
-            })
+            # Execute the agent off the event loop, bounded by a wall-clock timeout
+            with trace_span("agent.refine", courses=len(courses)) as span:
+                result, stop_reason = await llm_breaker.call_async(
+                    _run_agent_within_budget,
+                    {"messages": [HumanMessage(content=query)]},
+                    {"callbacks": agent_callbacks()},
+                    AgentBudget.from_settings(),
+                    task="refine",
+                    timeout=settings.AGENT_TIMEOUT_SECONDS,
+                )
+                if span is not None:
+                    span.attributes["agent.stop_reason"] = stop_reason
             
             # Extract the final message content
             messages = result.get("messages", [])
@@ -540,22 +733,26 @@ Description: {course.description}"""
             else:
                 result_text = str(result)
             
-            logger.debug(f"Raw refinement response: {result_text[:500]}...")
+            logger.debug("Raw refinement response: %s...", result_text[:500])
             
             # Parse the response
-            refined_courses = parse_course_data(result_text)
-            logger.info(f"Successfully refined to {len(refined_courses)} courses")
+            with trace_span("agent.parse"):
+                refined_courses = profile_call(parse_course_data, result_text)
+            logger.info("Successfully refined to %s courses", len(refined_courses))
             
             return refined_courses
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            logger.error(f"Error executing refinement agent: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("Error executing refinement agent: %s", e)
             return []
             
+    except UpstreamUnavailable as e:
+        logger.warning("Upstream unavailable for refinement: %s", e)
+        raise
     except Exception as e:
-        logger.error(f"Error in refine_recommendations: {e}")
+        logger.error("Error in refine_recommendations: %s", e)
         return []
 
 # This allows running the agent directly for testing
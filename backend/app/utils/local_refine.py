@@ -0,0 +1,110 @@
+import re
+from typing import List, Dict, Optional
+
+from app.models.schemas import CourseDetails
+from app.utils.course_utils import filter_courses_by_constraints
+from app.utils.search_filters import PROVIDER_SITES
+
+# Words that carry no refinement intent of their own
+_FILLER = {
+    "show", "me", "only", "just", "the", "a", "an", "course", "courses", "from", "on", "with",
+    "and", "or", "in", "for", "that", "are", "is", "which", "give", "list", "find", "i", "want",
+    "please", "by", "of", "to", "level", "levels", "one", "ones", "option", "options", "those",
+    "them", "these", "single", "any", "all", "most", "sort", "order", "filter", "keep", "what",
+}
+_LEVELS = {
+    "beginner": "beginner", "beginners": "beginner", "intro": "beginner", "introductory": "beginner",
+    "basic": "beginner", "intermediate": "intermediate", "advanced": "advanced", "expert": "advanced",
+}
+_PRICING = {"free": "free", "paid": "paid"}
+_DURATIONS = {"short": "Short (< 4 weeks)", "quick": "Short (< 4 weeks)", "long": "Long (> 12 weeks)"}
+# Sort intents are (subject, direction). Some words carry both; the neutral ones
+# ("price", "rated") name only the subject and the direction words only the direction.
+_SORT_WORDS = {
+    "cheapest": ("price", "low"), "cheap": ("price", "low"), "cheaper": ("price", "low"),
+    "affordable": ("price", "low"), "inexpensive": ("price", "low"),
+    "best": ("rating", "high"), "top": ("rating", "high"),
+    "price": ("price", None), "prices": ("price", None), "priced": ("price", None),
+    "cost": ("price", None), "costs": ("price", None),
+    "rated": ("rating", None), "rating": ("rating", None), "ratings": ("rating", None),
+    "reviewed": ("rating", None),
+    "lowest": (None, "low"), "low": (None, "low"), "lower": (None, "low"), "least": (None, "low"),
+    "highest": (None, "high"), "high": (None, "high"), "higher": (None, "high"),
+}
+# The only sorts done locally; anything else ("highest price", "lowest rated") goes to the agent
+_SORTS = {("price", "low"), ("rating", "high")}
+_SINGLE = {"one", "single"}
+
+
+def _price_value(course: CourseDetails) -> float:
+    if course.price and "free" in course.price.lower():
+        return 0.0
+    match = re.search(r"(\d+(?:[.,]\d+)?)", course.price or "")
+    return float(match.group(1).replace(",", ".")) if match else float("inf")
+
+
+def refine_locally(courses: List[CourseDetails], query: str) -> Optional[List[CourseDetails]]:
+    """
+    Apply simple refinements ("only free", "cheapest one", "top 3", "best rated beginner
+    courses from Coursera") directly to the course list. Returns None when the query asks for
+    anything this cannot express, so the caller falls back to the agent.
+    """
+    text = query.lower()
+    filters: Dict[str, List[str]] = {"level": [], "pricing": [], "provider": [], "duration": []}
+
+    # Multi-word provider names first, so their words are not left over as unknown tokens
+    for name in sorted(PROVIDER_SITES, key=len, reverse=True):
+        if re.search(rf"\b{re.escape(name)}\b", text):
+            filters["provider"].append(name)
+            text = re.sub(rf"\b{re.escape(name)}\b", " ", text)
+
+    subjects = set()
+    directions = set()
+    single = False
+    count: Optional[int] = None
+    for word in re.findall(r"[a-z]+|\d+", text):
+        if word.isdigit():
+            # "top 2", "2 cheapest courses": one count at most, and a usable one
+            if count is not None or int(word) < 1:
+                return None
+            count = int(word)
+        elif word in _LEVELS:
+            filters["level"].append(_LEVELS[word])
+        elif word in _PRICING:
+            filters["pricing"].append(_PRICING[word])
+        elif word in _DURATIONS:
+            filters["duration"].append(_DURATIONS[word])
+        elif word in _SORT_WORDS:
+            subject, direction = _SORT_WORDS[word]
+            if subject:
+                subjects.add(subject)
+            if direction:
+                directions.add(direction)
+        elif word not in _FILLER:
+            return None
+        if word in _SINGLE:
+            single = True
+
+    sort = None
+    if subjects or directions:
+        # Needs exactly one subject and one direction, and a combination handled here
+        if len(subjects) != 1 or len(directions) != 1:
+            return None
+        sort = (subjects.pop(), directions.pop())
+        if sort not in _SORTS:
+            return None
+
+    if not any(filters.values()) and sort is None:
+        return None
+
+    refined = filter_courses_by_constraints(list(courses), {k: v for k, v in filters.items() if v})
+    if sort == ("price", "low"):
+        refined.sort(key=_price_value)
+    elif sort == ("rating", "high"):
+        refined = [c for c in refined if c.rating is not None]
+        refined.sort(key=lambda c: c.rating, reverse=True)
+    if single:
+        refined = refined[:1]
+    if count is not None:
+        refined = refined[:count]
+    return refined
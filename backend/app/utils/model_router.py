@@ -0,0 +1,173 @@
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.config import settings
+from app.utils.resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Capability tiers, weakest first. A task asking for a tier may use that tier or any stronger one.
+MODEL_TIERS = ("fast", "strong")
+
+
+@dataclass
+class RoutedModel:
+    """One model in the pool, with live latency / error statistics."""
+    name: str
+    tier: str
+    model: BaseChatModel
+    breaker: CircuitBreaker
+    # Exponentially weighted moving averages over recent calls
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, latency: float, ok: bool, alpha: float = 0.2) -> None:
+        with self._lock:
+            self.calls += 1
+            self.errors += 0 if ok else 1
+            self.latency_ewma = latency if self.latency_ewma is None else (1 - alpha) * self.latency_ewma + alpha * latency
+            self.error_ewma = (1 - alpha) * self.error_ewma + alpha * (0.0 if ok else 1.0)
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def score(self) -> float:
+        """Expected latency, penalized by the recent error rate; unknown models rank last."""
+        if self.latency_ewma is None:
+            return float("inf")
+        return self.latency_ewma * (1 + 4 * self.error_ewma)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.name,
+            "tier": self.tier,
+            "state": self.breaker.state,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_ewma, 3),
+            "calls": self.calls,
+            "errors": self.errors,
+        }
+
+
+class ModelRouter:
+    """
+    Routes each model call to the fastest healthy model that meets the task's tier.
+
+    Latency and errors are tracked per model. A model that errors or times out
+    repeatedly is tripped (skipped for a cooldown, then probed again) and the call
+    fails over to the next candidate. Slow successes raise a model's latency score,
+    so later calls move to a faster one. A small share of calls goes to a random
+    eligible model, so the estimates of models not currently preferred stay fresh.
+    """
+
+    def __init__(self, models: Sequence[RoutedModel], task_tiers: Dict[str, str],
+                 max_attempts: int = 2, explore_rate: float = 0.0):
+        if not models:
+            raise ValueError("The model pool is empty")
+        self.models = list(models)
+        self.task_tiers = dict(task_tiers)
+        self.max_attempts = max(1, max_attempts)
+        self.explore_rate = explore_rate
+
+    @classmethod
+    def from_spec(cls, spec: str, factory: Callable[[str], BaseChatModel], task_tiers: Dict[str, str],
+                  **kwargs: Any) -> "ModelRouter":
+        """Build a pool from "name:tier,name:tier" (tier defaults to fast) using ``factory`` per model."""
+        models = []
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            name, _, tier = item.strip().partition(":")
+            tier = tier or MODEL_TIERS[0]
+            if tier not in MODEL_TIERS:
+                raise ValueError(f"Unknown model tier '{tier}' for {name}; expected one of {MODEL_TIERS}")
+            models.append(RoutedModel(
+                name=name,
+                tier=tier,
+                model=factory(name),
+                breaker=CircuitBreaker(
+                    f"model:{name}",
+                    failure_threshold=settings.MODEL_FAILURE_THRESHOLD,
+                    reset_seconds=settings.MODEL_COOLDOWN_SECONDS,
+                ),
+            ))
+        return cls(models, task_tiers, **kwargs)
+
+    def candidates(self, task: str) -> List[RoutedModel]:
+        """Eligible models for a task in the order they should be tried."""
+        required = MODEL_TIERS.index(self.task_tiers.get(task, MODEL_TIERS[0]))
+        eligible = [m for m in self.models if MODEL_TIERS.index(m.tier) >= required]
+        # Stable sort: among models with no measurements yet, pool order decides
+        ranked = sorted(eligible, key=lambda m: (m.breaker.is_open(), m.score()))
+        if len(ranked) > 1 and self.explore_rate > 0 and random.random() < self.explore_rate:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    def invoke(self, task: str, messages: List[BaseMessage],
+               bind: Optional[Tuple[Sequence[Any], Dict[str, Any]]] = None, **kwargs: Any) -> Tuple[BaseMessage, str]:
+        """Run one chat call with failover; returns the reply and the model that produced it."""
+        last_error: Optional[Exception] = None
+        attempts = 0
+        for candidate in self.candidates(task):
+            if attempts >= self.max_attempts:
+                break
+            if not candidate.breaker.allow():
+                continue
+            attempts += 1
+            runnable = candidate.model.bind_tools(bind[0], **bind[1]) if bind else candidate.model
+            started = time.monotonic()
+            try:
+                # No callbacks here: the routing model reports the call once, under its own run
+                reply = runnable.invoke(messages, config={"callbacks": []}, **kwargs)
+            except Exception as e:
+                candidate.record(time.monotonic() - started, ok=False)
+                logger.warning("Model %s failed for task '%s', failing over: %s", candidate.name, task, e)
+                last_error = e
+                continue
+            candidate.record(time.monotonic() - started, ok=True)
+            return reply, candidate.name
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError(f"No model available for task '{task}' (all tripped)")
+
+    def chat_model(self, task: str) -> "RoutedChatModel":
+        """A LangChain chat model that routes every call for ``task`` through this router."""
+        return RoutedChatModel(router=self, task=task)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [m.stats() for m in self.models]
+
+
+class RoutedChatModel(BaseChatModel):
+    """Chat model facade over a ModelRouter, usable anywhere a single model is (e.g. create_agent)."""
+
+    router: Any
+    task: str
+    tool_binding: Optional[Tuple[Sequence[Any], Dict[str, Any]]] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "RoutedChatModel":
+        # Tools are bound per underlying model at call time, in each provider's own format
+        return RoutedChatModel(router=self.router, task=self.task, tool_binding=(list(tools), kwargs))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if stop is not None:
+            kwargs["stop"] = stop
+        reply, model_name = self.router.invoke(self.task, messages, bind=self.tool_binding, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=reply)], llm_output={"model_name": model_name})
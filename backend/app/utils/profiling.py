@@ -0,0 +1,164 @@
+import os
+import time
+import asyncio
+import uuid
+import pstats
+import cProfile
+import logging
+import threading
+import contextvars
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional, TypeVar
+from urllib.parse import parse_qs
+
+from app.config import settings
+from app.utils.admin_auth import admin_token_matches
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Endpoints that can be profiled on demand
+PROFILED_PATHS = ("/api/recommend", "/api/refine")
+
+# Threads that already have a profiler enabled (cProfile hooks are per thread)
+_thread_state = threading.local()
+
+
+class RequestProfile:
+    """
+    Deterministic (cProfile) profile of one request. The request's work runs in
+    several threads (the agent invoke, parallel CSE calls) so each thread is
+    profiled separately and merged into a single pstats object.
+    """
+
+    def __init__(self, profile_id: str, label: str):
+        self.profile_id = profile_id
+        self.label = label
+        self.started_at = time.time()
+        self._stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def thread(self):
+        """Profile the current thread for the duration of the block."""
+        if getattr(_thread_state, "active", False):
+            # Nested call in a thread that is already being profiled
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool owns this thread: run unprofiled
+            yield
+            return
+        _thread_state.active = True
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _thread_state.active = False
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+
+    def save(self, directory: str, max_files: int) -> Optional[str]:
+        """Write the merged profile as a .prof (pstats) file and prune old artifacts."""
+        with self._lock:
+            if self._stats is None:
+                return None
+            os.makedirs(directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self.started_at))
+            path = os.path.join(directory, f"{stamp}-{self.label}-{self.profile_id}.prof")
+            self._stats.dump_stats(path)
+        _prune(directory, max_files)
+        return path
+
+
+def _prune(directory: str, max_files: int) -> None:
+    """Keep only the newest ``max_files`` profile artifacts."""
+    try:
+        files: List[str] = [
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".prof")
+        ]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[max_files:]:
+            os.remove(path)
+    except OSError as e:
+        logger.warning("Could not prune profile directory %s: %s", directory, e)
+
+
+# Profile of the request currently being handled, if profiling was requested
+active_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+
+
+def profiled(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    Bind ``fn`` to the active request profile so it is profiled in whichever thread
+    runs it (asyncio.to_thread, a ThreadPoolExecutor, ...). Returns ``fn`` itself
+    when profiling is off.
+    """
+    profile = active_profile.get()
+    if profile is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        with profile.thread():
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def profile_call(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a synchronous step under the active request profile, if any."""
+    return profiled(fn)(*args, **kwargs)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware enabling per-request profiling of the recommendation endpoints.
+
+    A request is profiled when it carries ``X-Admin-Token: <ADMIN_TOKEN>`` together
+    with ``X-Profile: 1`` or ``?profile=1``. The response gets an ``X-Profile-Id``
+    header naming the artifact written to ``PROFILE_DIR``. With no ADMIN_TOKEN
+    configured, requests pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not settings.ADMIN_TOKEN or scope["type"] != "http" or scope["path"] not in PROFILED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        wants_profile = headers.get("x-profile") == "1" or query.get("profile", [""])[0] == "1"
+        if not wants_profile or not admin_token_matches(headers.get("x-admin-token")):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(uuid.uuid4().hex[:12], scope["path"].rsplit("/", 1)[-1])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile.profile_id.encode())]
+            await send(message)
+
+        token = active_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            active_profile.reset(token)
+            path = await asyncio.to_thread(profile.save, settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
+            if path:
+                logger.info("Wrote request profile %s", path)
@@ -0,0 +1,219 @@
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.config import settings
+from app.utils.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream dependency (Groq or Google CSE) failed, timed out, or is tripped."""
+
+    def __init__(self, upstream: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{upstream}: {message}")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+# Set for the worker thread of call_async(); flips once the caller stops waiting for it
+_abandoned: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("call_abandoned", default=None)
+
+
+def call_abandoned() -> bool:
+    """
+    True inside a call_async() worker whose caller has timed out or been cancelled.
+    Long-running callees check it between steps and stop instead of spending more quota.
+    """
+    event = _abandoned.get()
+    return event is not None and event.is_set()
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and every
+    call fails fast for ``reset_seconds``. The first call after that is let through
+    as a probe: success closes the breaker again, failure re-opens it.
+
+    Inside ``isolated_breakers(scope)`` every breaker transparently delegates to a
+    private twin, so that traffic neither trips nor is rejected by the shared one.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _scoped(self) -> "CircuitBreaker":
+        scope = _breaker_scope.get()
+        return self if scope is None else scope.twin(self)
+
+    @property
+    def state(self) -> str:
+        scoped = self._scoped()
+        if scoped is not self:
+            return scoped.state
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe call through (0 when closed)."""
+        scoped = self._scoped()
+        if scoped is not self:
+            return scoped.retry_after()
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected. Does not consume the half-open probe."""
+        scoped = self._scoped()
+        if scoped is not self:
+            return scoped.is_open()
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            return self._probing or time.monotonic() - self._opened_at < self.reset_seconds
+
+    def allow(self) -> bool:
+        """Check whether a call may proceed; claims the probe slot when half-open."""
+        scoped = self._scoped()
+        if scoped is not self:
+            return scoped.allow()
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        scoped = self._scoped()
+        if scoped is not self:
+            return scoped.record_success()
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit breaker '%s' closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        scoped = self._scoped()
+        if scoped is not self:
+            return scoped.record_failure()
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    logger.warning("Circuit breaker '%s' opened after %s failures", self.name, self._failures)
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def ensure_closed(self) -> None:
+        """Raise UpstreamUnavailable immediately if the breaker rejects calls."""
+        if self.is_open():
+            raise UpstreamUnavailable(self.name, "circuit breaker is open", self.retry_after())
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking call through the breaker (the callee enforces its own timeout)."""
+        if not self.allow():
+            raise UpstreamUnavailable(self.name, "circuit breaker is open", self.retry_after())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure()
+            raise UpstreamUnavailable(self.name, str(e) or type(e).__name__, self.retry_after()) from e
+        self.record_success()
+        return result
+
+    async def call_async(self, fn: Callable[..., T], *args: Any, timeout: float, **kwargs: Any) -> T:
+        """
+        Run a blocking call in a worker thread with a wall-clock timeout.
+        On timeout (or cancellation) the caller is released immediately and the thread
+        sees call_abandoned() turn true, so it can stop at its next checkpoint.
+        """
+        if not self.allow():
+            raise UpstreamUnavailable(self.name, "circuit breaker is open", self.retry_after())
+        abandoned = threading.Event()
+        # wait_for wraps the call in a task, which copies the context with the event set
+        token = _abandoned.set(abandoned)
+        try:
+            result = await asyncio.wait_for(asyncio.to_thread(profiled(fn), *args, **kwargs), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            self.record_failure()
+            raise UpstreamUnavailable(self.name, f"timed out after {timeout:g}s", self.retry_after()) from e
+        except Exception as e:
+            self.record_failure()
+            raise UpstreamUnavailable(self.name, str(e) or type(e).__name__, self.retry_after()) from e
+        finally:
+            abandoned.set()
+            _abandoned.reset(token)
+        self.record_success()
+        return result
+
+
+class BreakerScope:
+    """Private twins of the shared breakers (same thresholds), created on first use."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self._twins: Dict[int, CircuitBreaker] = {}
+        self._twin_ids: set = set()
+        self._lock = threading.Lock()
+
+    def twin(self, breaker: CircuitBreaker) -> CircuitBreaker:
+        with self._lock:
+            if id(breaker) in self._twin_ids:
+                return breaker
+            twin = self._twins.get(id(breaker))
+            if twin is None:
+                twin = CircuitBreaker(f"{breaker.name}:{self.label}", breaker.failure_threshold, breaker.reset_seconds)
+                self._twins[id(breaker)] = twin
+                self._twin_ids.add(id(twin))
+            return twin
+
+
+_breaker_scope: contextvars.ContextVar[Optional[BreakerScope]] = contextvars.ContextVar("breaker_scope", default=None)
+
+
+@contextmanager
+def isolated_breakers(scope: BreakerScope):
+    """Route every breaker check and outcome in this context (and threads spawned from it) to ``scope``."""
+    token = _breaker_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _breaker_scope.reset(token)
+
+
+llm_breaker = CircuitBreaker(
+    "groq",
+    failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.BREAKER_RESET_SECONDS,
+)
+
+search_breaker = CircuitBreaker(
+    "google_cse",
+    failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.BREAKER_RESET_SECONDS,
+)
@@ -0,0 +1,81 @@
+import contextvars
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+# Site restrictions for providers we know the domain of
+PROVIDER_SITES: Dict[str, str] = {
+    "coursera": "coursera.org",
+    "edx": "edx.org",
+    "udemy": "udemy.com",
+    "khan academy": "khanacademy.org",
+    "udacity": "udacity.com",
+    "pluralsight": "pluralsight.com",
+    "linkedin learning": "linkedin.com/learning",
+    "skillshare": "skillshare.com",
+    "codecademy": "codecademy.com",
+    "freecodecamp": "freecodecamp.org",
+    "mit opencourseware": "ocw.mit.edu",
+    "youtube": "youtube.com",
+}
+
+LEVEL_KEYWORDS = {"beginner", "intermediate", "advanced"}
+
+
+@dataclass
+class SearchConstraints:
+    """
+    Search-level form of the user's filters, pushed down into every CSE query.
+    ``scopes`` holds one restriction per requested provider (``site:`` for known
+    domains, the quoted name otherwise); ``keywords`` apply to every query.
+    """
+    scopes: List[str] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.scopes and not self.keywords
+
+    def queries(self, query: str) -> List[str]:
+        """
+        Expand a base query into the queries to issue: one per requested provider
+        (run in parallel by the caller), each carrying the pricing/level keywords.
+        """
+        base = " ".join([query.strip()] + [k for k in self.keywords if k.lower() not in query.lower()])
+        if not self.scopes:
+            return [base]
+        return [f"{base} {scope}" for scope in self.scopes]
+
+
+def compile_search_constraints(filters: Optional[Dict[str, Any]]) -> SearchConstraints:
+    """Compile provider / pricing / level filters into site restrictions and keywords."""
+    constraints = SearchConstraints()
+    if not filters:
+        return constraints
+
+    for provider in filters.get("provider") or []:
+        site = PROVIDER_SITES.get(provider.strip().lower())
+        if site:
+            constraints.scopes.append(f"site:{site}")
+        elif provider.strip():
+            # Unknown provider: the best we can do is require its name
+            constraints.scopes.append(f'"{provider.strip()}"')
+
+    pricing = {p.lower() for p in filters.get("pricing") or []}
+    if pricing == {"free"}:
+        constraints.keywords.append("free")
+    elif pricing == {"paid"}:
+        constraints.keywords.append("certificate")
+
+    levels = sorted({l.lower() for l in filters.get("level") or []} & LEVEL_KEYWORDS)
+    if len(levels) == 1:
+        constraints.keywords.append(levels[0])
+    elif 1 < len(levels) < len(LEVEL_KEYWORDS):
+        constraints.keywords.append("(" + " OR ".join(levels) + ")")
+
+    return constraints
+
+
+# Constraints for the request currently running the agent. Worker threads started
+# with asyncio.to_thread / LangChain's executors inherit it through context copying.
+active_search_constraints: contextvars.ContextVar[Optional[SearchConstraints]] = contextvars.ContextVar(
+    "active_search_constraints", default=None
+)
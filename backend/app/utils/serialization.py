@@ -0,0 +1,58 @@
+from typing import List, Dict, Any
+
+import orjson
+from fastapi.responses import Response
+
+from app.models.schemas import CourseDetails
+
+# Course fields in the order they are packed into cache entries and responses
+COURSE_FIELDS = ("title", "url", "provider", "description", "duration", "level", "rating", "price")
+
+
+def pack_courses(courses: List[CourseDetails]) -> List[list]:
+    """Pack validated courses into positional rows (no repeated field names in the payload)."""
+    return [[str(getattr(c, name)) if name == "url" else getattr(c, name) for name in COURSE_FIELDS] for c in courses]
+
+
+def unpack_courses(rows: List[list]) -> List[CourseDetails]:
+    """Rebuild CourseDetails objects (with validation) from packed rows."""
+    return [CourseDetails(**dict(zip(COURSE_FIELDS, row))) for row in rows]
+
+
+def construct_courses(rows: List[list]) -> List[CourseDetails]:
+    """Rebuild CourseDetails from rows that were validated before they were stored (no re-validation)."""
+    return [CourseDetails.model_construct(**dict(zip(COURSE_FIELDS, row))) for row in rows]
+
+
+def rows_to_dicts(rows: List[list]) -> List[Dict[str, Any]]:
+    """Turn packed rows into JSON-ready dicts without constructing models."""
+    return [dict(zip(COURSE_FIELDS, row)) for row in rows]
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def recommendation_response(topic: str, rows: List[list], **extra: Any) -> FastJSONResponse:
+    """
+    Render a RecommendationResponse body directly with orjson.
+
+    Courses are validated once when they are parsed from the agent output; rows
+    built from those objects (or read back from the cache) are already in the
+    response schema's shape, so FastAPI's response_model re-validation and its
+    default JSON encoder are skipped entirely.
+    """
+    content: Dict[str, Any] = {
+        "topic": topic,
+        "results": rows_to_dicts(rows),
+        "cursor": None,
+        "result_id": None,
+        "degraded": False,
+        "stale": False,
+    }
+    content.update(extra)
+    return FastJSONResponse(content=content)
@@ -0,0 +1,360 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Endpoints that get a trace per request
+TRACED_PATHS = ("/api/recommend", "/api/refine")
+
+# OTLP span kinds / status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: int = STATUS_OK
+    status_message: str = ""
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = STATUS_ERROR
+            self.status_message = str(error) or type(error).__name__
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class RequestTrace:
+    """
+    Span tree for one API request: the request itself, the agent run, every model
+    call and tool call made by the agent, and the local parse / filter stages.
+    Also keeps running totals so looping or over-searching runs stand out.
+    """
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.counters: Dict[str, int] = {
+            "llm_calls": 0,
+            "tool_calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self._lock = threading.Lock()
+        self.root = self.start_span(name, None, SPAN_KIND_SERVER, attributes)
+
+    def start_span(self, name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                   attributes: Optional[Dict[str, Any]] = None) -> Span:
+        span = Span(span_id=os.urandom(8).hex(), parent_id=parent_id, name=name, kind=kind,
+                    attributes=dict(attributes or {}))
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def finish(self, status_code: Optional[int] = None) -> None:
+        self.root.attributes.update(self.counters)
+        if status_code is not None:
+            self.root.attributes["http.status_code"] = status_code
+            if status_code >= 500:
+                self.root.status = STATUS_ERROR
+        self.root.end()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start_time": self.root.start_ns / 1e9,
+            "duration_ms": round(self.root.duration_ms, 1),
+            "status_code": self.root.attributes.get("http.status_code"),
+            **self.counters,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Export as OTLP/JSON (``ExportTraceServiceRequest``), accepted by OTLP/HTTP collectors."""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": "course-advisor-backend"})},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [self._otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+
+    def _otlp_span(self, span: Span) -> Dict[str, Any]:
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "status": {"code": span.status, "message": span.status_message},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    converted = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            encoded = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded = {"doubleValue": value}
+        else:
+            encoded = {"stringValue": str(value)}
+        converted.append({"key": key, "value": encoded})
+    return converted
+
+
+class TraceStore:
+    """Most recent request traces, bounded in size (per worker process)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._traces: "OrderedDict[str, RequestTrace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: RequestTrace) -> None:
+        with self._lock:
+            self._traces[trace.trace_id] = trace
+            while len(self._traces) > self.max_entries:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[RequestTrace]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def recent(self, limit: int) -> List[RequestTrace]:
+        with self._lock:
+            return list(self._traces.values())[-limit:][::-1]
+
+
+# Trace of the request being handled and the span new local spans are children of
+active_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("active_trace", default=None)
+_current_span_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span_id", default=None)
+
+
+@contextmanager
+def trace_span(name: str, **attributes: Any):
+    """Record a local stage as a child of the current span; no-op outside a traced request."""
+    trace = active_trace.get()
+    if trace is None:
+        yield None
+        return
+    span = trace.start_span(name, _current_span_id.get() or trace.root.span_id, attributes=attributes)
+    token = _current_span_id.set(span.span_id)
+    try:
+        yield span
+    except BaseException as e:
+        span.end(error=e)
+        raise
+    else:
+        span.end()
+    finally:
+        _current_span_id.reset(token)
+
+
+@contextmanager
+def use_trace(trace: RequestTrace):
+    """Make ``trace`` the active trace for the block, with new spans attached to its root."""
+    trace_token = active_trace.set(trace)
+    span_token = _current_span_id.set(trace.root.span_id)
+    try:
+        yield trace
+    finally:
+        _current_span_id.reset(span_token)
+        active_trace.reset(trace_token)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that turns the agent's model and tool runs into spans.
+    Run ids are mapped to spans so nested runs attach to the right parent; graph
+    nodes in between are folded into their parent to keep the tree readable.
+    """
+
+    def __init__(self, trace: RequestTrace, parent_id: str):
+        self.trace = trace
+        self.parent_id = parent_id
+        self._spans: Dict[UUID, Span] = {}
+        self._aliases: Dict[UUID, str] = {}
+
+    def _parent(self, parent_run_id: Optional[UUID]) -> str:
+        if parent_run_id is None:
+            return self.parent_id
+        if parent_run_id in self._spans:
+            return self._spans[parent_run_id].span_id
+        return self._aliases.get(parent_run_id, self.parent_id)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Span]:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.end(error=error)
+        return span
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs):
+        if parent_run_id is None:
+            self._spans[run_id] = self.trace.start_span("agent.graph", self.parent_id)
+        else:
+            self._aliases[run_id] = self._parent(parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+        self._aliases.pop(run_id, None)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end(run_id, error)
+        self._aliases.pop(run_id, None)
+
+    def _start_llm(self, serialized, run_id: UUID, parent_run_id: Optional[UUID], kwargs: Dict[str, Any]) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") or (serialized or {}).get("name", "llm")
+        self.trace.count("llm_calls")
+        self._spans[run_id] = self.trace.start_span(
+            "llm.chat", self._parent(parent_run_id), SPAN_KIND_CLIENT, {"llm.model": model}
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs):
+        self._start_llm(serialized, run_id, parent_run_id, kwargs)
+        self._spans[run_id].attributes["llm.input_messages"] = sum(len(batch) for batch in messages)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs):
+        self._start_llm(serialized, run_id, parent_run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        span = self._end(run_id)
+        if span is None:
+            return
+        # A routed model only knows which model answered once the call is done
+        routed_to = (response.llm_output or {}).get("model_name")
+        if routed_to:
+            span.attributes["llm.model"] = routed_to
+        prompt_tokens, completion_tokens = _token_usage(response)
+        span.attributes["llm.prompt_tokens"] = prompt_tokens
+        span.attributes["llm.completion_tokens"] = completion_tokens
+        self.trace.count("prompt_tokens", prompt_tokens)
+        self.trace.count("completion_tokens", completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str: str, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self.trace.count("tool_calls")
+        attributes = {"tool.input": input_str[:500]}
+        inputs = kwargs.get("inputs")
+        if isinstance(inputs, dict) and "query" in inputs:
+            attributes["search.query"] = str(inputs["query"])
+        self._spans[run_id] = self.trace.start_span(
+            f"tool.{name}", self._parent(parent_run_id), SPAN_KIND_CLIENT, attributes
+        )
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        span = self._end(run_id)
+        if span is not None:
+            text = getattr(output, "content", output)
+            text = text if isinstance(text, str) else str(text)
+            span.attributes["tool.output_chars"] = len(text)
+            span.attributes["tool.results"] = text.count("URL:")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end(run_id, error)
+
+
+def _token_usage(response) -> tuple:
+    """Extract (prompt, completion) token counts from an LLMResult, whichever way the provider reports them."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += int(metadata.get("input_tokens") or 0)
+            completion += int(metadata.get("output_tokens") or 0)
+    return prompt, completion
+
+
+def agent_callbacks() -> List[BaseCallbackHandler]:
+    """Callbacks to pass to an agent invoke so its steps land in the current request's trace."""
+    trace = active_trace.get()
+    if trace is None:
+        return []
+    return [TraceCallbackHandler(trace, _current_span_id.get() or trace.root.span_id)]
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that records a trace for each recommendation / refinement request
+    and returns its id in the ``X-Trace-Id`` response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not settings.TRACING_ENABLED or scope["type"] != "http" or scope["path"] not in TRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(
+            f"{scope['method']} {scope['path']}",
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        status_code: Optional[int] = None
+
+        async def send_with_trace_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.trace_id.encode())]
+            await send(message)
+
+        try:
+            with use_trace(trace):
+                await self.app(scope, receive, send_with_trace_id)
+        finally:
+            trace.finish(status_code)
+            trace_store.add(trace)
+
+
+trace_store = TraceStore(max_entries=settings.TRACE_MAX_ENTRIES)
@@ -0,0 +1,84 @@
+"""
+Benchmark for recommendation response serialization.
+
+Compares, for result sets of increasing size:
+1. Default FastAPI path - dump the returned RecommendationResponse, re-validate it
+   against the response_model (including every HttpUrl) and encode with json
+2. Fast path - pack the already-validated courses into rows and encode with orjson
+3. Cache-hit path - encode rows read back from the result cache with orjson
+
+Run from the backend directory:
+    python bench_serialization.py
+"""
+
+import sys
+import json
+import timeit
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.models.schemas import CourseDetails, RecommendationResponse
+from app.utils.serialization import pack_courses, recommendation_response
+
+SIZES = [5, 100, 500, 1000]
+
+
+def make_courses(count: int):
+    """Build validated courses resembling real agent output."""
+    return [
+        CourseDetails(
+            title=f"Machine Learning Specialization Part {i}",
+            url=f"https://www.coursera.org/learn/machine-learning-{i}",
+            provider="Coursera",
+            description="Build and train supervised models, neural networks and decision trees. " * 2,
+            duration=f"{4 + i % 10} weeks",
+            level=("Beginner", "Intermediate", "Advanced")[i % 3],
+            rating=4.0 + (i % 10) / 10,
+            price="Free" if i % 2 else "$49",
+        )
+        for i in range(count)
+    ]
+
+
+def default_path(courses):
+    # What FastAPI does with response_model: dump, validate again, encode
+    response = RecommendationResponse(topic="machine learning", results=courses)
+    validated = RecommendationResponse.model_validate(response.model_dump())
+    return json.dumps(validated.model_dump(mode="json")).encode("utf-8")
+
+
+def fast_path(courses):
+    return recommendation_response("machine learning", pack_courses(courses)).body
+
+
+def cache_hit_path(rows):
+    return recommendation_response("machine learning", rows).body
+
+
+def bench(fn, arg, repeat: int = 5) -> float:
+    """Best-of-N time per call in milliseconds."""
+    number = max(1, 2000 // max(1, len(arg)))
+    return min(timeit.repeat(lambda: fn(arg), number=number, repeat=repeat)) / number * 1000
+
+
+def run():
+    print("=" * 72)
+    print("RESPONSE SERIALIZATION BENCHMARK (ms per response, best of 5)")
+    print("=" * 72)
+    print(f"{'courses':>8} {'default':>12} {'fast':>12} {'cache hit':>12} {'speedup':>10}")
+
+    for size in SIZES:
+        courses = make_courses(size)
+        rows = pack_courses(courses)
+        assert json.loads(default_path(courses)) == json.loads(fast_path(courses))
+
+        default_ms = bench(default_path, courses)
+        fast_ms = bench(fast_path, courses)
+        cached_ms = bench(cache_hit_path, rows)
+        print(f"{size:>8} {default_ms:>12.3f} {fast_ms:>12.3f} {cached_ms:>12.3f} {default_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -20,6 +20,9 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 # Import after setting path
 from app.config import settings
+from app.utils.logging_setup import setup_logging
+
+setup_logging()
 from app.utils.llm_agent import (
     initialize_search_tool,
     initialize_agent_executor,
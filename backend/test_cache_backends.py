@@ -0,0 +1,242 @@
+"""
+Tests for the Redis cache backend, run against an in-process fake Redis server.
+
+The fake speaks enough RESP2 (AUTH / SELECT / GET / SET PX / DEL) to exercise the
+real client code over a real socket, so no Redis installation is needed.
+
+This script tests:
+1. GET / SET round trip, including AUTH and SELECT on connect
+2. PX expiry and DEL
+3. Connection loss: commands degrade to cache misses, then the client reconnects
+4. Server down: commands degrade to cache misses instead of raising
+5. Failed connects back off instead of reconnecting on every command
+
+Run with ``python test_cache_backends.py`` or ``pytest test_cache_backends.py``.
+"""
+
+import sys
+import time
+import socket
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.cache_backends import RedisBackend, create_backend, encode_value, decode_value
+
+
+class FakeRedis:
+    """Single-process RESP2 server holding keys in a dict, one thread per client."""
+
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}
+        self.commands = []
+        self._clients = []
+        self._lock = threading.Lock()
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._clients.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _read_command(reader):
+        header = reader.readline()
+        if not header.startswith(b"*"):
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int(reader.readline()[1:-2])
+            args.append(reader.read(length + 2)[:-2])
+        return args
+
+    def _serve(self, conn):
+        reader = conn.makefile("rb")
+        authed = self.password is None
+        try:
+            while True:
+                args = self._read_command(reader)
+                if args is None:
+                    return
+                name = args[0].decode().upper()
+                self.commands.append(name)
+                if name == "AUTH":
+                    authed = args[1].decode() == self.password
+                    conn.sendall(b"+OK\r\n" if authed else b"-ERR invalid password\r\n")
+                elif not authed:
+                    conn.sendall(b"-NOAUTH Authentication required.\r\n")
+                elif name == "SELECT":
+                    conn.sendall(b"+OK\r\n")
+                elif name == "GET":
+                    value = self._get(args[1])
+                    conn.sendall(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+                elif name == "SET":
+                    ttl_ms = int(args[4]) if len(args) > 4 and args[3].upper() == b"PX" else None
+                    expires = time.monotonic() + ttl_ms / 1000 if ttl_ms is not None else None
+                    self.data[args[1]] = (args[2], expires)
+                    conn.sendall(b"+OK\r\n")
+                elif name == "DEL":
+                    conn.sendall(b":%d\r\n" % int(self.data.pop(args[1], None) is not None))
+                else:
+                    conn.sendall(b"-ERR unknown command\r\n")
+        except OSError:
+            return
+        finally:
+            reader.close()
+            conn.close()
+
+    def _get(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and time.monotonic() >= expires:
+            self.data.pop(key, None)
+            return None
+        return value
+
+    def drop_connections(self):
+        """Simulate a server restart / network blip: close every client socket."""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for conn in clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+    def close(self):
+        self._server.close()
+        self.drop_connections()
+
+
+def test_get_set_round_trip():
+    """Values written through the backend come back byte for byte."""
+    print("=" * 60)
+    print("TEST 1: GET / SET round trip")
+    print("=" * 60)
+    server = FakeRedis(password="secret")
+    backend = create_backend(f"redis://:secret@127.0.0.1:{server.port}/2")
+    try:
+        assert isinstance(backend, RedisBackend)
+        assert backend.get("missing") is None
+        backend.set("topic", encode_value([["Python", "https://example.com"]]), ttl_seconds=60)
+        assert decode_value(backend.get("topic")) == [["Python", "https://example.com"]]
+        # AUTH and SELECT are sent once, when the connection is opened
+        assert server.commands[:2] == ["AUTH", "SELECT"]
+        assert server.commands.count("AUTH") == 1
+        print("✅ Round trip OK")
+    finally:
+        backend.close()
+        server.close()
+
+
+def test_expiry_and_delete():
+    """SET uses millisecond PX TTLs; DEL removes a key."""
+    print("\n" + "=" * 60)
+    print("TEST 2: Expiry and DEL")
+    print("=" * 60)
+    server = FakeRedis()
+    backend = RedisBackend(port=server.port, host="127.0.0.1")
+    try:
+        backend.set("short", b"v", ttl_seconds=0.05)
+        backend.set("long", b"v", ttl_seconds=60)
+        assert backend.get("short") == b"v"
+        time.sleep(0.1)
+        assert backend.get("short") is None
+        assert backend.get("long") == b"v"
+        backend.delete("long")
+        assert backend.get("long") is None
+        # Sub-millisecond TTLs are rounded up rather than sent as PX 0 (which Redis rejects)
+        backend.set("tiny", b"v", ttl_seconds=0.0001)
+        assert server.data[b"tiny"][1] is not None
+        print("✅ Expiry and DEL OK")
+    finally:
+        backend.close()
+        server.close()
+
+
+def test_connection_loss_degrades_and_reconnects():
+    """A dropped connection turns into one cache miss, then the client reconnects."""
+    print("\n" + "=" * 60)
+    print("TEST 3: Connection loss")
+    print("=" * 60)
+    server = FakeRedis()
+    backend = RedisBackend(port=server.port, host="127.0.0.1")
+    try:
+        backend.set("key", b"v", ttl_seconds=60)
+        assert backend.get("key") == b"v"
+        server.drop_connections()
+        # The broken socket is only noticed on use: a miss, not an exception
+        assert backend.get("key") is None
+        # The next command opens a fresh connection
+        assert backend.get("key") == b"v"
+        print("✅ Connection loss degrades to a miss and recovers")
+    finally:
+        backend.close()
+        server.close()
+
+
+def test_server_down():
+    """With nothing listening, every command is a miss or a no-op."""
+    print("\n" + "=" * 60)
+    print("TEST 4: Server down")
+    print("=" * 60)
+    server = FakeRedis()
+    port = server.port
+    server.close()
+    backend = RedisBackend(port=port, host="127.0.0.1", timeout=0.2)
+    assert backend.get("key") is None
+    backend.set("key", b"v", ttl_seconds=60)
+    backend.delete("key")
+    backend.close()
+    print("✅ Unreachable server degrades to misses")
+
+
+def test_failed_connect_backs_off():
+    """After a failed connect, commands are misses without new attempts until retry_seconds pass."""
+    print("\n" + "=" * 60)
+    print("TEST 5: Reconnect backoff")
+    print("=" * 60)
+    server = FakeRedis(password="secret")
+    backend = RedisBackend(port=server.port, host="127.0.0.1", password="wrong", retry_seconds=0.2)
+    try:
+        started = time.monotonic()
+        for _ in range(20):
+            assert backend.get("key") is None
+            backend.set("key", b"v", ttl_seconds=60)
+        # One connect (rejected at AUTH) serves all 40 commands
+        assert server.commands.count("AUTH") == 1
+        assert time.monotonic() - started < 0.2
+        time.sleep(0.25)
+        assert backend.get("key") is None
+        assert server.commands.count("AUTH") == 2
+        print("✅ Failed connects are retried at most once per retry_seconds")
+    finally:
+        backend.close()
+        server.close()
+
+
+if __name__ == "__main__":
+    tests = [test_get_set_round_trip, test_expiry_and_delete, test_connection_loss_degrades_and_reconnects,
+             test_server_down, test_failed_connect_backs_off]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
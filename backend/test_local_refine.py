@@ -0,0 +1,97 @@
+"""
+Tests for refinements answered without the agent (app.utils.local_refine).
+
+This script tests:
+1. Counts ("top 2", "2 cheapest courses") limit the refined list
+2. Sort words need an unambiguous subject and direction
+3. Queries that cannot be expressed locally fall through to the agent (None)
+
+Run with ``python test_local_refine.py`` or ``pytest test_local_refine.py``.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.models.schemas import CourseDetails
+from app.utils.local_refine import refine_locally
+
+# (title, price, rating)
+COURSES = [
+    CourseDetails(
+        title=title,
+        url=f"https://www.coursera.org/learn/{title}",
+        provider="Coursera",
+        description="A course",
+        price=price,
+        rating=rating,
+        level="Beginner",
+    )
+    for title, price, rating in [
+        ("a", "$50", 4.1),
+        ("b", "Free", 4.8),
+        ("c", "$20", 3.2),
+        ("d", "$35", 4.5),
+        ("e", "$90", 4.9),
+    ]
+]
+
+
+def titles(query):
+    refined = refine_locally(COURSES, query)
+    return None if refined is None else [c.title for c in refined]
+
+
+def test_counts():
+    """A number in the query caps the result, like the agent would."""
+    print("=" * 60)
+    print("TEST 1: Counts")
+    print("=" * 60)
+    assert titles("top 2") == ["e", "b"]
+    assert titles("show me the best 3") == ["e", "b", "d"]
+    assert titles("2 cheapest courses") == ["b", "c"]
+    assert titles("cheapest 1") == ["b"]
+    assert titles("top 10") == ["e", "b", "d", "a", "c"]
+    # Zero or several numbers are left to the agent
+    assert titles("top 0") is None
+    assert titles("top 2 of 3") is None
+    print("✅ Counts limit the refined list")
+
+
+def test_sort_intents():
+    """Sorts need one subject and one direction, and only two combinations run locally."""
+    print("\n" + "=" * 60)
+    print("TEST 2: Sort intents")
+    print("=" * 60)
+    assert titles("cheapest one") == ["b"]
+    assert titles("lowest price") == ["b", "c", "d", "a", "e"]
+    assert titles("highest rated") == ["e", "b", "d", "a", "c"]
+    for query in ("highest price", "lowest rated", "cheapest best rated", "sort by price", "lowest"):
+        assert titles(query) is None, query
+    print("✅ Ambiguous or contradicting sorts go to the agent")
+
+
+def test_unknown_words():
+    """Anything outside the small local vocabulary falls through to the agent."""
+    print("\n" + "=" * 60)
+    print("TEST 3: Unknown words")
+    print("=" * 60)
+    assert titles("only free") == ["b"]
+    assert titles("courses taught in spanish") is None
+    assert titles("under 40 dollars") is None
+    print("✅ Unknown refinements return None")
+
+
+if __name__ == "__main__":
+    tests = [test_counts, test_sort_intents, test_unknown_words]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
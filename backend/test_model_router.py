@@ -0,0 +1,212 @@
+"""
+Tests for the model router, using stub chat models instead of Groq.
+
+This script tests:
+1. Failover order: fastest eligible model first, next candidate on error
+2. Tier requirements: tasks only use models of their tier or stronger
+3. Tripped models are skipped until their cooldown ends
+4. EWMA latency updates move calls to the faster model
+5. explore_rate sends a call to a non-preferred model
+
+Run with ``python test_model_router.py`` or ``pytest test_model_router.py``.
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+from typing import Any, List, Optional
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.utils.model_router import ModelRouter, RoutedModel
+from app.utils.resilience import CircuitBreaker
+
+MESSAGES = [HumanMessage(content="hello")]
+
+
+class StubChatModel(BaseChatModel):
+    """Answers with its own name after ``delay`` seconds, or raises while ``failing``."""
+
+    label: str
+    delay: float = 0.0
+    failing: bool = False
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.failing:
+            raise RuntimeError(f"{self.label} is down")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.label))])
+
+
+def make_model(name: str, tier: str = "fast", delay: float = 0.0, failure_threshold: int = 2,
+               reset_seconds: float = 60.0) -> RoutedModel:
+    return RoutedModel(
+        name=name,
+        tier=tier,
+        model=StubChatModel(label=name, delay=delay),
+        breaker=CircuitBreaker(f"model:{name}", failure_threshold=failure_threshold, reset_seconds=reset_seconds),
+    )
+
+
+def make_router(*models: RoutedModel, **kwargs: Any) -> ModelRouter:
+    return ModelRouter(models, task_tiers={"search": "fast", "refine": "strong"}, **kwargs)
+
+
+def test_failover_order():
+    """Unmeasured models are tried in pool order; an error fails over to the next one."""
+    print("=" * 60)
+    print("TEST 1: Failover order")
+    print("=" * 60)
+    a, b, c = make_model("a"), make_model("b"), make_model("c")
+    router = make_router(a, b, c, max_attempts=2)
+    assert [m.name for m in router.candidates("search")] == ["a", "b", "c"]
+
+    a.model.failing = True
+    reply, used = router.invoke("search", MESSAGES)
+    assert (reply.content, used) == ("b", "b")
+    assert (a.model.calls, b.model.calls, c.model.calls) == (1, 1, 0)
+    assert a.errors == 1 and a.error_ewma > 0
+
+    # max_attempts bounds the failover chain; the last error is re-raised
+    b.model.failing = True
+    try:
+        router.invoke("search", MESSAGES)
+        raise AssertionError("expected the last model error")
+    except RuntimeError as e:
+        assert "is down" in str(e)
+    assert c.model.calls == 0
+    print("✅ Failover follows the candidate order and stops after max_attempts")
+
+
+def test_tier_requirements():
+    """A 'strong' task never runs on a 'fast' model."""
+    print("\n" + "=" * 60)
+    print("TEST 2: Tier requirements")
+    print("=" * 60)
+    fast, strong = make_model("fast-1"), make_model("strong-1", tier="strong")
+    router = make_router(fast, strong)
+    assert [m.name for m in router.candidates("search")] == ["fast-1", "strong-1"]
+    assert [m.name for m in router.candidates("refine")] == ["strong-1"]
+
+    strong.model.failing = True
+    try:
+        router.invoke("refine", MESSAGES)
+        raise AssertionError("expected the strong model's error")
+    except RuntimeError:
+        pass
+    assert fast.model.calls == 0
+    print("✅ Tasks only use models of their tier or stronger")
+
+
+def test_open_breaker_is_skipped():
+    """A tripped model is ranked last and not called until its cooldown ends."""
+    print("\n" + "=" * 60)
+    print("TEST 3: Open breakers are skipped")
+    print("=" * 60)
+    a = make_model("a", failure_threshold=1, reset_seconds=0.2)
+    b = make_model("b")
+    router = make_router(a, b, max_attempts=1)
+    a.breaker.record_failure()
+    assert a.breaker.state == "open"
+    assert [m.name for m in router.candidates("search")] == ["b", "a"]
+
+    # Even when only tripped models are left, they are not called
+    b.breaker.record_failure()
+    b.breaker.record_failure()
+    try:
+        router.invoke("search", MESSAGES)
+        raise AssertionError("expected no model to be available")
+    except RuntimeError as e:
+        assert "all tripped" in str(e)
+    assert a.model.calls == 0 and b.model.calls == 0
+
+    # After the cooldown the breaker lets one probe through, and success closes it
+    time.sleep(0.25)
+    _, used = router.invoke("search", MESSAGES)
+    assert used == "a" and a.breaker.state == "closed"
+    print("✅ Tripped models are skipped, then probed after the cooldown")
+
+
+def test_latency_ewma_moves_traffic():
+    """Once a model gets slower than another, calls move to the faster one."""
+    print("\n" + "=" * 60)
+    print("TEST 4: EWMA latency")
+    print("=" * 60)
+    a, b = make_model("a", delay=0.002), make_model("b", delay=0.002)
+    router = make_router(a, b)
+    router.invoke("search", MESSAGES)
+    # b has no measurement yet, so it ranks behind a
+    assert [m.name for m in router.candidates("search")] == ["a", "b"]
+    b.record(0.001, ok=True)
+    assert router.candidates("search")[0].name == "b"
+
+    # The EWMA weights the newest sample by 0.2, so one slow call is enough to demote b
+    before = b.latency_ewma
+    b.record(0.101, ok=True)
+    assert abs(b.latency_ewma - (0.8 * before + 0.2 * 0.101)) < 1e-9
+    assert router.candidates("search")[0].name == "a"
+
+    # A slowdown of the model itself shows up in the live estimate the same way
+    a.model.delay = 0.2
+    used = [router.invoke("search", MESSAGES)[1] for _ in range(2)]
+    assert used == ["a", "b"], used
+
+    # Errors inflate the score even for a fast model
+    fast_but_flaky = make_model("c")
+    fast_but_flaky.record(0.001, ok=True)
+    for _ in range(10):
+        fast_but_flaky.record(0.001, ok=False)
+    assert fast_but_flaky.score() > 0.001 * 4
+    print("✅ Tier choice follows the EWMA latency and error rate")
+
+
+def test_explore_rate():
+    """With explore_rate, some calls go to a non-preferred model; without it, none do."""
+    print("\n" + "=" * 60)
+    print("TEST 5: explore_rate")
+    print("=" * 60)
+    a, b, c = make_model("a"), make_model("b"), make_model("c")
+    for model, latency in ((a, 0.001), (b, 0.01), (c, 0.1)):
+        model.record(latency, ok=True)
+
+    random.seed(7)
+    greedy = make_router(a, b, c, explore_rate=0.0)
+    assert {greedy.candidates("search")[0].name for _ in range(200)} == {"a"}
+
+    exploring = make_router(a, b, c, explore_rate=0.3)
+    firsts = [exploring.candidates("search")[0].name for _ in range(2000)]
+    explored = sum(name != "a" for name in firsts) / len(firsts)
+    assert 0.2 < explored < 0.4, explored
+    assert {"b", "c"} <= set(firsts)
+    # Exploring only promotes one model; the rest keep their ranked order
+    for _ in range(50):
+        ranked = [m.name for m in exploring.candidates("search")]
+        assert [name for name in ranked if name != ranked[0]] == [n for n in ("a", "b", "c") if n != ranked[0]]
+    print("✅ explore_rate promotes a random other model on roughly that share of calls")
+
+
+if __name__ == "__main__":
+    tests = [test_failover_order, test_tier_requirements, test_open_breaker_is_skipped,
+             test_latency_ewma_moves_traffic, test_explore_rate]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)